@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+ZABAL Newsletter Bot - Async Web Interface
+ASGI app serving the same routes as web_app.py. The /generate/* routes run on
+AsyncOpenAI, so a single process can hold hundreds of in-flight generations
+instead of one per worker thread; every other route (the UI, /history/*,
+/prompts/*, /memory/*) is the Flask app itself, mounted through a WSGI bridge.
+
+Run: uvicorn asgi_app:app --port 5000
+Needs: pip install starlette uvicorn a2wsgi
+"""
+
+import os
+import json
+import asyncio
+import contextlib
+from dotenv import load_dotenv
+
+try:
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route, Mount
+    from a2wsgi import WSGIMiddleware
+except ImportError as e:
+    raise ImportError("Async serving needs starlette and a2wsgi. Run: pip install starlette uvicorn a2wsgi") from e
+
+from web_app import app as flask_app, newsletter_payload, social_payload, candidate_count
+from src.newsletter_generator_simple import NewsletterGenerator
+from src.social_generator_simple import SocialGenerator
+from src.single_flight import get_single_flight
+from src.providers import get_async_openai_client, GROQ_BASE_URL
+from src.warmup import aconnect
+from src.debug_logger import logger
+
+load_dotenv()
+
+# Threads for the Flask routes behind the bridge - they're quick (storage and
+# memory reads), apart from /prompts/improve
+WSGI_WORKERS = 16
+
+# Speculative generations keep running if the client disconnects (the result
+# is still archived), so hold a reference until they finish
+_background = set()
+
+async def read_json(request):
+    """Request body as a dict ({} if missing or not JSON)"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+async def generate_newsletter(request):
+    """Generate newsletter from daily input"""
+    try:
+        data = await read_json(request)
+        daily_input = data.get('daily_input', '')
+
+        if not daily_input:
+            return JSONResponse({'error': 'Daily input is required'}, status_code=400)
+
+        gen = await asyncio.to_thread(NewsletterGenerator)
+        args = (
+            daily_input,
+            data.get('badass_quote', ''),
+            data.get('lens_override', None),
+            data.get('roj_context', ''),
+            data.get('editing_instructions', ''),
+            data.get('parameters', None)
+        )
+        candidates = candidate_count(data)
+        key = await asyncio.to_thread(gen.fingerprint, *args, candidates=candidates)
+        result, coalesced = await get_single_flight().ado(key, lambda: gen.agenerate_newsletter(*args, candidates=candidates, prepared=data.get('prepared_token')))
+
+        return JSONResponse(newsletter_payload(result, coalesced))
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def generate_newsletter_speculative(request):
+    """Draft with the small local model, then refine with the large one (NDJSON stream)"""
+    data = await read_json(request)
+    daily_input = data.get('daily_input', '')
+    if not daily_input:
+        return JSONResponse({'error': 'Daily input is required'}, status_code=400)
+
+    events = asyncio.Queue()
+
+    async def run():
+        try:
+            gen = await asyncio.to_thread(NewsletterGenerator)
+
+            def on_draft(draft, seconds):
+                events.put_nowait({'type': 'draft', 'draft': draft, 'seconds': round(seconds, 2), 'model': gen.draft_model})
+
+            args = (
+                daily_input,
+                data.get('badass_quote', ''),
+                data.get('lens_override', None),
+                data.get('roj_context', ''),
+                data.get('editing_instructions', ''),
+                data.get('parameters', None)
+            )
+            key = await asyncio.to_thread(gen.fingerprint, *args, mode="speculative")
+            result, coalesced = await get_single_flight().ado(key, lambda: gen.agenerate_speculative(*args, on_draft=on_draft, prepared=data.get('prepared_token')))
+            # Joined requests missed the leader's draft event
+            if coalesced and result['draft']:
+                on_draft(result['draft'], result['timings']['draft_seconds'] or 0)
+            events.put_nowait({'type': 'final', **newsletter_payload(result, coalesced), 'timings': result['timings']})
+        except Exception as e:
+            events.put_nowait({'type': 'error', 'error': str(e)})
+
+    task = asyncio.create_task(run())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+    async def stream():
+        while True:
+            event = await events.get()
+            yield json.dumps(event) + "\n"
+            if event['type'] != 'draft':
+                break
+
+    return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+async def revise_newsletter(request):
+    """Apply editing instructions to an existing newsletter as paragraph edits"""
+    try:
+        data = await read_json(request)
+        newsletter = data.get('newsletter', '')
+        instructions = data.get('editing_instructions', '')
+
+        if not newsletter or not instructions:
+            return JSONResponse({'error': 'Newsletter and editing instructions are required'}, status_code=400)
+
+        gen = await asyncio.to_thread(NewsletterGenerator)
+        args = (newsletter, instructions, data.get('daily_input') or None, data.get('parameters', None))
+        key = await asyncio.to_thread(gen.revision_fingerprint, *args)
+        result, coalesced = await get_single_flight().ado(key, lambda: gen.arevise(*args))
+
+        return JSONResponse(newsletter_payload(result, coalesced))
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def generate_social(request):
+    """Generate social content from newsletter"""
+    try:
+        data = await read_json(request)
+        newsletter_content = data.get('newsletter_content', '')
+
+        if not newsletter_content:
+            return JSONResponse({'error': 'Newsletter content is required'}, status_code=400)
+
+        gen = await asyncio.to_thread(SocialGenerator)
+        args = (newsletter_content, data.get('newsletter_link', ''), data.get('has_video', False))
+        key = await asyncio.to_thread(gen.fingerprint, *args)
+        result, coalesced = await get_single_flight().ado(key, lambda: gen.agenerate_social_content(*args))
+
+        return JSONResponse(social_payload(result, coalesced))
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Open the async client's pooled connections inside the serving loop (web_app warms the rest)"""
+    try:
+        await aconnect(get_async_openai_client(api_key=os.getenv("GROQ_API_KEY", "gsk_demo_key_placeholder"), base_url=GROQ_BASE_URL))
+    except Exception as e:
+        logger.log("WARMUP FAILED", f"async provider: {e}", "basic", force=True)
+    yield
+
+app = Starlette(lifespan=lifespan, routes=[
+    Route('/generate/newsletter', generate_newsletter, methods=['POST']),
+    Route('/generate/newsletter/speculative', generate_newsletter_speculative, methods=['POST']),
+    Route('/generate/newsletter/revise', revise_newsletter, methods=['POST']),
+    Route('/generate/social', generate_social, methods=['POST']),
+    Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_WORKERS))
+])
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, port=5000)
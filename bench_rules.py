@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Rule engine benchmark
+Runs the editorial rule engine over archived newsletters (plus any extra files)
+and reports throughput and what it found
+
+Run: python bench_rules.py [--repeat N] [--files path ...]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.archive import get_archive
+from src.storage import get_storage
+from src.constitution_checker import get_checker
+from src.rule_engine import Document
+
+
+def load_newsletters(extra_paths):
+    """Archived newsletters, legacy output/newsletters/*.txt and any extra files"""
+    texts = []
+
+    archive = get_archive()
+    for entry in archive.list(kind="newsletter"):
+        try:
+            texts.append(archive.get(entry["id"]))
+        except KeyError:
+            pass
+
+    storage = get_storage()
+    for key in storage.list("output/newsletters/"):
+        if key.endswith(".txt"):
+            texts.append(storage.read(key))
+
+    for path in extra_paths:
+        files = [os.path.join(path, f) for f in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, "r") as f:
+                texts.append(f.read())
+
+    return [text for text in texts if text.strip()]
+
+
+def timed(fn, docs):
+    start = time.perf_counter()
+    results = [fn(doc) for doc in docs]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the editorial rule engine")
+    parser.add_argument("--repeat", type=int, default=50, help="Run the corpus this many times (default: 50)")
+    parser.add_argument("--files", nargs="*", default=[], help="Extra newsletter files or folders")
+    args = parser.parse_args()
+
+    corpus = load_newsletters(args.files)
+    if not corpus:
+        print("✗ No newsletters found - generate some first or pass --files")
+        sys.exit(1)
+
+    docs = corpus * args.repeat
+    engine = get_checker().engine("newsletter")
+    chars = sum(len(doc) for doc in docs)
+
+    print(f"{len(corpus)} newsletters × {args.repeat} = {len(docs)} documents ({chars / 1e6:.1f}M chars)\n")
+
+    tokenize_seconds, parsed = timed(Document, docs)
+    check_seconds, findings = timed(engine.run, docs)
+
+    for label, seconds in (("tokenize only", tokenize_seconds), ("full rule pass", check_seconds)):
+        print(f"{label:<15} {seconds:7.3f}s  {len(docs) / seconds:9.0f} docs/s  {seconds / len(docs) * 1e6:7.1f} µs/doc")
+
+    sentences = sum(len(doc.sentences) for doc in parsed[:len(corpus)])
+    paragraphs = sum(len(doc.paragraphs) for doc in parsed[:len(corpus)])
+    print(f"\nper newsletter: {paragraphs / len(corpus):.1f} paragraphs, {sentences / len(corpus):.1f} sentences")
+
+    codes = Counter(f["code"] for result in findings[:len(corpus)] for f in result)
+    clean = sum(1 for result in findings[:len(corpus)] if not result)
+    print(f"clean: {clean}/{len(corpus)}")
+    for code, count in codes.most_common():
+        print(f"  {code:<26} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check
+Fails if the CLI or the serverless cold start imports more than budgeted
+
+Run: python check_import_time.py [target ...]
+Budgets live in config/import_budget.json
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUDGET_PATH = os.path.join(ROOT, "config", "import_budget.json")
+
+
+def run_importtime(args):
+    """
+    Run the interpreter with -X importtime
+
+    Returns:
+        list of (module_name, depth, cumulative_us) in import order
+    """
+    # importtime lines and tracebacks both go to stderr. The web app's warmup
+    # thread preloads on purpose (off the import path), so keep it out of the
+    # measurement
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "ZABAL_WARMUP": "false"}
+    )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(errors[-1] if errors else f"exited with status {result.returncode}")
+
+    return entries
+
+
+def measure(args, baseline, runs):
+    """Best-of-N milliseconds spent importing modules the bare interpreter doesn't"""
+    best = None
+    modules = set()
+
+    for _ in range(runs):
+        entries = run_importtime(args)
+
+        total_us = sum(us for name, depth, us in entries if depth == 0 and name not in baseline)
+        modules = {name for name, depth, us in entries}
+        best = total_us if best is None else min(best, total_us)
+
+    return best / 1000.0, modules
+
+
+def main():
+    with open(BUDGET_PATH, 'r') as f:
+        budget = json.load(f)
+
+    runs = budget.get("runs", 3)
+    targets = budget["targets"]
+    selected = sys.argv[1:] or list(targets)
+
+    baseline_entries = run_importtime(["-c", "pass"])
+    baseline = {name for name, depth, us in baseline_entries}
+
+    failures = []
+    for name in selected:
+        target = targets[name]
+
+        try:
+            ms, modules = measure(target["args"], baseline, runs)
+        except RuntimeError as e:
+            failures.append(name)
+            print(f"✗ {name}: could not measure ({e})")
+            continue
+
+        leaked = sorted(
+            forbidden for forbidden in target.get("forbidden", [])
+            if any(m == forbidden or m.startswith(forbidden + ".") for m in modules)
+        )
+
+        ok = ms <= target["max_ms"] and not leaked
+        status = "✓" if ok else "✗"
+        print(f"{status} {name}: {ms:.1f} ms (budget {target['max_ms']} ms) - {target.get('description', '')}")
+        if leaked:
+            print(f"    eagerly imported: {', '.join(leaked)}")
+
+        if not ok:
+            failures.append(name)
+
+    if failures:
+        print(f"\nImport budget exceeded: {', '.join(failures)}")
+        sys.exit(1)
+
+    print("\nAll import budgets met")
+
+
+if __name__ == "__main__":
+    main()
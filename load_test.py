@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Load harness for the web app
+Fires concurrent POST /generate/newsletter requests and reports throughput
+and latency, to compare the Flask app (web_app.py, one generation per worker
+thread) with the async app (asgi_app.py, AsyncOpenAI)
+
+By default the server under test talks to a local stand-in for the Groq API
+that answers after --upstream-latency seconds, so runs are repeatable and
+don't spend quota. --url tests an already running server as-is.
+
+Each request's daily input is unique, so identical in-flight requests aren't
+coalesced into one upstream call (src/single_flight.py) and the numbers
+measure concurrency; --same-input sends one input to measure coalescing.
+
+Run:
+    python load_test.py --compare -n 200 -c 200
+    python load_test.py --server flask --workers 4 --threads 8
+    python load_test.py --url http://localhost:5000 -n 10 -c 5
+    python load_test.py --same-input -n 100 -c 100
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLE_INPUT = "Spent the morning fixing a bug that turned out to be a typo. Laughed about it, then shipped."
+STAND_IN_NEWSLETTER = """Day 1 - Load test
+
+A quiet morning, a small fix, a good laugh.
+
+Mindful Moment: Notice the small things.
+
+- Zaal"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_upstream(latency):
+    """Stand-in for the OpenAI-compatible chat completions API"""
+    body = json.dumps({
+        "id": "load-test",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "load-test",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": STAND_IN_NEWSLETTER},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 2500, "completion_tokens": 400, "total_tokens": 2900}
+    }).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def start_server(kind, port, upstream_url, workers, threads):
+    """Launch web_app (gunicorn) or asgi_app (uvicorn) against the stand-in API"""
+    env = dict(
+        os.environ,
+        GROQ_BASE_URL=upstream_url,
+        GROQ_API_KEY="load-test",
+        ZABAL_STORAGE="memory",
+        ZABAL_PROMPT_WATCH="false"
+    )
+
+    if kind == "flask":
+        cmd = [sys.executable, "-m", "gunicorn", "web_app:app",
+               "--workers", str(workers), "--threads", str(threads),
+               "--bind", f"127.0.0.1:{port}", "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "asgi_app:app",
+               "--port", str(port), "--log-level", "warning"]
+
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            urllib.request.urlopen(url + "/", timeout=1).read()
+            return process, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+
+    process.kill()
+    log.seek(0)
+    output = log.read().decode("utf-8", "replace").strip().splitlines()
+    raise RuntimeError(f"{kind} server didn't start: {output[-1] if output else 'no output'}")
+
+
+def post(url, index=None):
+    """One generation (index makes the input unique); returns (seconds, error or None)"""
+    daily_input = SAMPLE_INPUT if index is None else f"{SAMPLE_INPUT} (request {index})"
+    payload = json.dumps({"daily_input": daily_input}).encode("utf-8")
+    req = urllib.request.Request(url + "/generate/newsletter", data=payload, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=300) as response:
+            response.read()
+        return time.perf_counter() - start, None
+    except urllib.error.HTTPError as e:
+        return time.perf_counter() - start, f"HTTP {e.code}"
+    except OSError as e:
+        return time.perf_counter() - start, str(e)
+
+
+def run_load(url, requests, concurrency, same_input=False):
+    """Fire requests with at most concurrency in flight"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda i: post(url, None if same_input else i), range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(seconds for seconds, error in results if error is None)
+    errors = [error for seconds, error in results if error is not None]
+
+    def percentile(fraction):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(round(fraction * (len(latencies) - 1))))]
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_seconds": round(wall, 2),
+        "throughput": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50": round(percentile(0.5), 2),
+        "p95": round(percentile(0.95), 2)
+    }
+
+
+def print_result(label, result):
+    print(
+        f"{label:<8} {result['ok']}/{result['requests']} ok  "
+        f"{result['throughput']:>7.2f} req/s  "
+        f"p50 {result['p50']:>6.2f}s  p95 {result['p95']:>6.2f}s  "
+        f"wall {result['wall_seconds']:.1f}s"
+    )
+    if result["errors"]:
+        print(f"         {result['errors']} errors (first: {result['first_error']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the web app")
+    parser.add_argument("--server", choices=["flask", "asgi"], default="asgi", help="Server to launch (default: asgi)")
+    parser.add_argument("--compare", action="store_true", help="Run flask then asgi with the same load")
+    parser.add_argument("--url", help="Test an already running server instead of launching one")
+    parser.add_argument("-n", "--requests", type=int, default=100, help="Total requests (default: 100)")
+    parser.add_argument("-c", "--concurrency", type=int, default=100, help="Requests in flight (default: 100)")
+    parser.add_argument("--upstream-latency", type=float, default=3.0, help="Stand-in API response time in seconds (default: 3)")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers for flask (default: 2)")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker for flask (default: 4)")
+    parser.add_argument("--same-input", action="store_true", help="Send the same daily input every time (measures request coalescing)")
+    args = parser.parse_args()
+
+    if args.url:
+        print_result("server", run_load(args.url.rstrip("/"), args.requests, args.concurrency, args.same_input))
+        return
+
+    upstream, upstream_url = start_upstream(args.upstream_latency)
+    inputs = "one shared input" if args.same_input else "unique inputs"
+    print(f"{args.requests} requests ({inputs}), {args.concurrency} in flight, stand-in API latency {args.upstream_latency:g}s")
+    if args.compare or args.server == "flask":
+        print(f"flask: gunicorn {args.workers} workers × {args.threads} threads")
+
+    results = {}
+    try:
+        for kind in (["flask", "asgi"] if args.compare else [args.server]):
+            process, url = start_server(kind, free_port(), upstream_url, args.workers, args.threads)
+            try:
+                results[kind] = run_load(url, args.requests, args.concurrency, args.same_input)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+            print_result(kind, results[kind])
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    finally:
+        upstream.shutdown()
+
+    if len(results) == 2 and results["flask"]["throughput"]:
+        print(f"\nasgi throughput: {results['asgi']['throughput'] / results['flask']['throughput']:.1f}× flask")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Output Archive - Content-addressed, compressed store for generated output
+Replaces one-.txt-per-regeneration with deduplicated blobs plus a small index
+
+Layout (inside the configured storage backend):
+    archive/index.json          - one entry per (kind, date, version)
+    archive/blobs/ab/<sha256>   - compressed full text, or a line delta against
+                                  an earlier version of the same day
+"""
+
+import re
+import json
+import gzip
+import difflib
+import hashlib
+import threading
+from datetime import datetime
+from src.storage import get_storage
+from src.debug_logger import logger
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+INDEX_KEY = "archive/index.json"
+
+# Rebuild a full snapshot every few versions so reads never walk long chains
+MAX_DELTA_CHAIN = 8
+
+# Only keep a delta when it's meaningfully smaller than the full text
+DELTA_MAX_RATIO = 0.7
+
+LEGACY_PREFIXES = {
+    "newsletter": "output/newsletters/",
+    "social": "output/social/"
+}
+
+LEGACY_DATE_PATTERN = re.compile(r"(\d{8})(?:_(\d{6}))?")
+LEGACY_DAY_PATTERN = re.compile(r"day_(\d+)_")
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def params_hash(params):
+    """Stable hash of the generation parameters (None if there are none)"""
+    if not params:
+        return None
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def compress(payload):
+    if ZSTD_AVAILABLE:
+        return b"Z" + zstandard.ZstdCompressor(level=10).compress(payload)
+    return b"G" + gzip.compress(payload, compresslevel=9)
+
+
+def decompress(blob):
+    codec, body = blob[:1], blob[1:]
+    if codec == b"Z":
+        if not ZSTD_AVAILABLE:
+            raise ImportError("Archive blob is zstd-compressed. Run: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if codec == b"G":
+        return gzip.decompress(body)
+    raise ValueError(f"Unknown archive codec: {codec!r}")
+
+
+def make_delta(base_text, new_text):
+    """Line-level delta: copy ranges from base plus inserted text"""
+    base_lines = base_text.splitlines(keepends=True)
+    new_lines = new_text.splitlines(keepends=True)
+
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif j2 > j1:
+            ops.append(["i", "".join(new_lines[j1:j2])])
+    return ops
+
+
+def apply_delta(base_text, ops):
+    base_lines = base_text.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if op[0] == "c":
+            parts.extend(base_lines[op[1]:op[2]])
+        else:
+            parts.append(op[1])
+    return "".join(parts)
+
+
+def entry_sources(entry):
+    """Files an index entry was imported from (identical files share one entry)"""
+    return ([entry["source"]] if entry.get("source") else []) + entry.get("sources", [])
+
+
+class OutputArchive:
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
+        self._lock = threading.Lock()
+
+    def _blob_key(self, digest):
+        return f"archive/blobs/{digest[:2]}/{digest}"
+
+    def load_index(self):
+        """Load the archive index (cached by the storage layer until it changes)"""
+        try:
+            return json.loads(self.storage.read(INDEX_KEY))
+        except KeyError:
+            return {"entries": []}
+
+    def _save_index(self, index):
+        # Callers hold storage.lock(INDEX_KEY); backends replace the file atomically (tmp + os.replace)
+        self.storage.write(INDEX_KEY, json.dumps(index, indent=1))
+
+    def put(self, kind, content, date=None, day_num=None, lens=None, params=None, source=None, template_version=None):
+        """
+        Archive one generated output
+
+        Args:
+            kind: "newsletter", "social", ...
+            content: Full text
+            date: Issue date (datetime, defaults to today)
+            day_num: Day number of the issue (optional)
+            lens: Mindful lens used (optional)
+            params: Generation parameters, stored as a hash (optional)
+            source: Original file this was imported from (optional)
+            template_version: Version hash of the prompt template used (optional)
+
+        Returns:
+            Index entry dict (an identical re-generation returns the existing entry)
+        """
+        date_str = (date or datetime.now()).strftime("%Y-%m-%d")
+        digest = content_hash(content)
+
+        # The index is shared with other processes (CLI and web app), so the
+        # whole load-modify-save runs under the storage's cross-process lock
+        with self._lock, self.storage.lock(INDEX_KEY):
+            index = self.load_index()
+            same_day = [e for e in index["entries"] if e["kind"] == kind and e["date"] == date_str]
+
+            # Identical to the latest version of this day - nothing new to store,
+            # but remember the imported file so migration doesn't count it again
+            if same_day and same_day[-1]["hash"] == digest:
+                latest = same_day[-1]
+                if source and source not in entry_sources(latest):
+                    if latest.get("source"):
+                        latest.setdefault("sources", []).append(source)
+                    else:
+                        latest["source"] = source
+                    self._save_index(index)
+                return latest
+
+            blob_key = self._blob_key(digest)
+            existing = next((e for e in index["entries"] if e["hash"] == digest), None)
+
+            with self.storage.batch():
+                if existing is not None:
+                    base, depth, stored_size = existing.get("base"), existing.get("depth", 0), 0
+                else:
+                    base, depth, blob = None, 0, compress(b"F" + content.encode("utf-8"))
+
+                    previous = same_day[-1] if same_day else None
+                    if previous and previous.get("depth", 0) < MAX_DELTA_CHAIN:
+                        delta = json.dumps({
+                            "base": previous["hash"],
+                            "ops": make_delta(self._read_hash(previous["hash"]), content)
+                        }).encode("utf-8")
+                        delta_blob = compress(b"D" + delta)
+                        if len(delta_blob) < len(blob) * DELTA_MAX_RATIO:
+                            blob, base, depth = delta_blob, previous["hash"], previous.get("depth", 0) + 1
+
+                    self.storage.write_bytes(blob_key, blob)
+                    stored_size = len(blob)
+
+                entry = {
+                    "id": f"{kind}_{date_str}_v{len(same_day) + 1}",
+                    "hash": digest,
+                    "kind": kind,
+                    "date": date_str,
+                    "day_num": day_num,
+                    "version": len(same_day) + 1,
+                    "lens": lens,
+                    "params_hash": params_hash(params),
+                    "title": content.split("\n", 1)[0][:200],
+                    "size": len(content.encode("utf-8")),
+                    "stored_size": stored_size,
+                    "base": base,
+                    "depth": depth,
+                    "created": datetime.now().isoformat()
+                }
+                if source:
+                    entry["source"] = source
+                if template_version:
+                    entry["template_version"] = template_version
+
+                index["entries"].append(entry)
+                self._save_index(index)
+
+        logger.log("ARCHIVED", f"{entry['id']} ({entry['size']} → {stored_size} bytes{', delta' if base else ''})", "verbose")
+        return entry
+
+    def _read_hash(self, digest):
+        """Rebuild full text for a content hash (following delta bases)"""
+        payload = decompress(self.storage.read_bytes(self._blob_key(digest)))
+        if payload[:1] == b"F":
+            return payload[1:].decode("utf-8")
+
+        delta = json.loads(payload[1:].decode("utf-8"))
+        return apply_delta(self._read_hash(delta["base"]), delta["ops"])
+
+    def get(self, entry_id):
+        """Get the full text of an entry by id (KeyError if unknown)"""
+        entry = self.find(entry_id)
+        if entry is None:
+            raise KeyError(entry_id)
+        return self._read_hash(entry["hash"])
+
+    def find(self, entry_id):
+        for entry in self.load_index()["entries"]:
+            if entry["id"] == entry_id:
+                return entry
+        return None
+
+    def list(self, kind=None, date=None):
+        """Index entries, newest first"""
+        entries = [
+            e for e in self.load_index()["entries"]
+            if (kind is None or e["kind"] == kind) and (date is None or e["date"] == date)
+        ]
+        return sorted(entries, key=lambda e: (e["date"], e["version"]), reverse=True)
+
+    def stats(self):
+        entries = self.load_index()["entries"]
+        return {
+            "entries": len(entries),
+            "unique_blobs": len({e["hash"] for e in entries}),
+            "deltas": sum(1 for e in entries if e.get("base") and e.get("stored_size")),
+            "original_bytes": sum(e["size"] for e in entries),
+            "stored_bytes": sum(e.get("stored_size", 0) for e in entries),
+            "codec": "zstd" if ZSTD_AVAILABLE else "gzip"
+        }
+
+    def imported_sources(self):
+        """Every legacy file already imported into the archive"""
+        return {source for e in self.load_index()["entries"] for source in entry_sources(e)}
+
+    def migrate_text_files(self, delete=False):
+        """
+        Import legacy output/newsletters and output/social .txt files
+
+        Files are imported oldest first so versions of the same day line up
+        with when they were written. Already-imported files are skipped.
+
+        Returns:
+            dict with imported, skipped and deleted counts
+        """
+        imported_sources = self.imported_sources()
+        result = {"imported": 0, "skipped": 0, "deleted": 0}
+
+        for kind, prefix in LEGACY_PREFIXES.items():
+            legacy = []
+            for key in self.storage.list(prefix):
+                if not key.endswith(".txt"):
+                    continue
+
+                filename = key.rsplit("/", 1)[-1]
+                match = LEGACY_DATE_PATTERN.search(filename)
+                if match:
+                    date = datetime.strptime(match.group(1), "%Y%m%d")
+                    order = match.group(1) + (match.group(2) or "")
+                else:
+                    # Undated (e.g. test_newsletter.txt) - file it under today
+                    date = datetime.now()
+                    order = date.strftime("%Y%m%d%H%M%S")
+                legacy.append((order, filename, key, date))
+
+            for order, filename, key, date in sorted(legacy):
+                if key in imported_sources:
+                    result["skipped"] += 1
+                    continue
+
+                day_match = LEGACY_DAY_PATTERN.search(filename)
+                self.put(
+                    kind,
+                    self.storage.read(key),
+                    date=date,
+                    day_num=int(day_match.group(1)) if day_match else None,
+                    source=key
+                )
+                result["imported"] += 1
+
+                if delete:
+                    self.storage.delete(key)
+                    result["deleted"] += 1
+
+        return result
+
+
+_archive = None
+
+
+def get_archive():
+    """Shared archive over the shared storage"""
+    global _archive
+    if _archive is None:
+        _archive = OutputArchive()
+    return _archive
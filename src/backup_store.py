@@ -0,0 +1,325 @@
+"""
+Backup Store - Versioned, deduplicated backups for memory and prompts
+Replaces one-full-copy-per-save with compressed snapshots plus deltas, skips
+backups identical to the last one, and thins old versions with an
+hourly/daily/weekly retention policy
+
+Layout (inside the configured storage backend), e.g. for memory:
+    memory/backups/personality/index.json   - one entry per version
+    memory/backups/personality/<sha256>     - compressed full text, or a line
+                                              delta against a full snapshot
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from src.storage import get_storage
+from src.archive import compress, decompress, make_delta, apply_delta, content_hash, DELTA_MAX_RATIO
+from src.debug_logger import logger
+
+# Deltas always point at a full snapshot, so restoring reads at most two blobs.
+# Take a fresh snapshot after this many deltas against the same one.
+SNAPSHOT_INTERVAL = 10
+
+DEFAULT_RETENTION = {
+    "keep_last": 5,
+    "hourly": 24,
+    "daily": 14,
+    "weekly": 8
+}
+
+BUCKET_FORMATS = {
+    "hourly": lambda dt: dt.strftime("%Y-%m-%d %H"),
+    "daily": lambda dt: dt.strftime("%Y-%m-%d"),
+    "weekly": lambda dt: "%d-W%02d" % dt.isocalendar()[:2]
+}
+
+# name -> (live key, backup prefix, legacy full-copy prefix)
+BACKUP_TARGETS = {
+    "memory": ("memory/personality.json", "memory/backups/personality", "memory/backups/personality_"),
+    "newsletter": ("prompts/newsletter_prompt.txt", "prompts/backups/newsletter", "prompts/backups/newsletter_prompt_"),
+    "social": ("prompts/social_prompt.txt", "prompts/backups/social", "prompts/backups/social_prompt_")
+}
+
+RETENTION_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "backup_retention.json")
+
+
+def load_retention():
+    """Load the retention policy (defaults if the config file is missing)"""
+    try:
+        with open(RETENTION_PATH, 'r') as f:
+            return {**DEFAULT_RETENTION, **json.load(f)}
+    except:
+        return dict(DEFAULT_RETENTION)
+
+
+def select_retained(entries, policy):
+    """
+    Pick which versions a retention policy keeps
+
+    Keeps the newest `keep_last` versions, plus the newest version in each of
+    the most recent `hourly` hours, `daily` days and `weekly` ISO weeks.
+
+    Args:
+        entries: Index entries (any order)
+        policy: Retention dict
+
+    Returns:
+        set of version numbers to keep
+    """
+    newest_first = sorted(entries, key=lambda e: e["version"], reverse=True)
+    keep = {e["version"] for e in newest_first[:policy.get("keep_last", 0)]}
+
+    for bucket, key_for in BUCKET_FORMATS.items():
+        limit = policy.get(bucket, 0)
+        seen = []
+        for entry in newest_first:
+            key = key_for(datetime.fromisoformat(entry["created"]))
+            if key in seen:
+                continue
+            if len(seen) >= limit:
+                break
+            seen.append(key)
+            keep.add(entry["version"])
+
+    return keep
+
+
+class BackupStore:
+    def __init__(self, target_key, prefix, legacy_prefix=None, storage=None, retention=None, reader=None, writer=None):
+        self.target_key = target_key
+        self.prefix = prefix
+        self.legacy_prefix = legacy_prefix
+        self.storage = storage or get_storage()
+        # Optional hooks for targets that don't live in storage (the SQLite memory store)
+        self.reader = reader or (lambda: self.storage.read(self.target_key))
+        self.writer = writer or (lambda content: self.storage.write(self.target_key, content))
+        self.retention = retention or load_retention()
+        self._lock = threading.Lock()
+
+    @property
+    def index_key(self):
+        return f"{self.prefix}/index.json"
+
+    def _blob_key(self, digest):
+        return f"{self.prefix}/{digest}"
+
+    def load_index(self):
+        try:
+            return json.loads(self.storage.read(self.index_key))
+        except KeyError:
+            return {"versions": []}
+
+    def _save_index(self, index):
+        self.storage.write(self.index_key, json.dumps(index, indent=1))
+
+    def location(self, entry):
+        """Human-readable pointer to a version (shown by the CLI)"""
+        return f"{self.prefix}@v{entry['version']}"
+
+    def backup(self, content=None, label=None, created=None):
+        """
+        Store a version of the target
+
+        Args:
+            content: Text to back up (default: the target's current content)
+            label: Short note shown in list_versions (optional)
+            created: Version timestamp (default: now; used when importing old copies)
+
+        Returns:
+            The new index entry, or None if content matches the latest version
+        """
+        if content is None:
+            content = self.reader()
+        digest = content_hash(content)
+
+        with self._lock:
+            index = self.load_index()
+            versions = index["versions"]
+
+            if versions and versions[-1]["hash"] == digest:
+                return None
+
+            with self.storage.batch():
+                existing = next((v for v in versions if v["hash"] == digest), None)
+                if existing is not None:
+                    base, stored_size = existing.get("base"), 0
+                else:
+                    base, blob = None, compress(b"F" + content.encode("utf-8"))
+
+                    snapshot = self._latest_snapshot(versions)
+                    if snapshot and self._deltas_since(versions, snapshot["hash"]) < SNAPSHOT_INTERVAL:
+                        delta = json.dumps({
+                            "base": snapshot["hash"],
+                            "ops": make_delta(self._read_hash(snapshot["hash"]), content)
+                        }).encode("utf-8")
+                        delta_blob = compress(b"D" + delta)
+                        if len(delta_blob) < len(blob) * DELTA_MAX_RATIO:
+                            blob, base = delta_blob, snapshot["hash"]
+
+                    self.storage.write_bytes(self._blob_key(digest), blob)
+                    stored_size = len(blob)
+
+                entry = {
+                    "version": versions[-1]["version"] + 1 if versions else 1,
+                    "hash": digest,
+                    "created": (created or datetime.now()).isoformat(),
+                    "size": len(content.encode("utf-8")),
+                    "stored_size": stored_size,
+                    "base": base
+                }
+                if label:
+                    entry["label"] = label
+
+                versions.append(entry)
+                self._prune(index)
+                self._save_index(index)
+
+        logger.log("BACKUP", f"{self.location(entry)} ({entry['size']} → {stored_size} bytes{', delta' if base else ''})", "verbose")
+        return entry
+
+    def _latest_snapshot(self, versions):
+        for entry in reversed(versions):
+            if not entry.get("base"):
+                return entry
+        return None
+
+    def _deltas_since(self, versions, snapshot_hash):
+        return sum(1 for v in versions if v.get("base") == snapshot_hash)
+
+    def _read_hash(self, digest):
+        payload = decompress(self.storage.read_bytes(self._blob_key(digest)))
+        if payload[:1] == b"F":
+            return payload[1:].decode("utf-8")
+
+        delta = json.loads(payload[1:].decode("utf-8"))
+        return apply_delta(self._read_hash(delta["base"]), delta["ops"])
+
+    def _prune(self, index):
+        """Apply the retention policy and delete blobs nothing refers to any more"""
+        versions = index["versions"]
+        keep = select_retained(versions, self.retention)
+        if len(keep) == len(versions):
+            return
+
+        index["versions"] = [v for v in versions if v["version"] in keep]
+
+        needed = set()
+        for entry in index["versions"]:
+            needed.add(entry["hash"])
+            if entry.get("base"):
+                needed.add(entry["base"])
+
+        for entry in versions:
+            if entry["hash"] not in needed:
+                self.storage.delete(self._blob_key(entry["hash"]))
+                needed.add(entry["hash"])  # same content may appear in several versions
+
+        logger.log("BACKUP PRUNED", f"{self.prefix}: {len(versions)} → {len(index['versions'])} versions", "verbose")
+
+    def prune(self):
+        """Re-apply the retention policy now (it also runs after every backup)"""
+        with self._lock:
+            index = self.load_index()
+            before = len(index["versions"])
+            with self.storage.batch():
+                self._prune(index)
+                self._save_index(index)
+        return before - len(index["versions"])
+
+    def list_versions(self):
+        """Index entries, newest first"""
+        return list(reversed(self.load_index()["versions"]))
+
+    def latest(self):
+        versions = self.load_index()["versions"]
+        return versions[-1] if versions else None
+
+    def find(self, version):
+        for entry in self.load_index()["versions"]:
+            if entry["version"] == int(version):
+                return entry
+        return None
+
+    def get(self, version):
+        """Full text of a version (KeyError if unknown)"""
+        entry = self.find(version)
+        if entry is None:
+            raise KeyError(version)
+        return self._read_hash(entry["hash"])
+
+    def restore(self, version):
+        """
+        Write a version back to the live file
+
+        The current content is backed up first, so a restore can itself be undone.
+
+        Returns:
+            Location the content was written to
+        """
+        content = self.get(version)
+        try:
+            self.backup(label=f"before restore of v{version}")
+        except KeyError:
+            pass  # nothing there yet
+        return self.writer(content)
+
+    def migrate_legacy(self, delete=False):
+        """
+        Import old full-copy backups (personality_<ts>.json, <type>_prompt_<ts>.txt)
+
+        Returns:
+            dict with imported (new versions), duplicates and deleted counts
+        """
+        result = {"imported": 0, "duplicates": 0, "deleted": 0}
+        if not self.legacy_prefix:
+            return result
+
+        for key in self.storage.list(self.legacy_prefix):
+            stamp = key[len(self.legacy_prefix):].rsplit(".", 1)[0]
+            try:
+                created = datetime.strptime(stamp, "%Y%m%d_%H%M%S")
+            except ValueError:
+                continue
+
+            if self.backup(self.storage.read(key), label="imported", created=created):
+                result["imported"] += 1
+            else:
+                result["duplicates"] += 1
+
+            if delete:
+                self.storage.delete(key)
+                result["deleted"] += 1
+
+        return result
+
+
+def _memory_hooks():
+    """Memory lives in SQLite - back up and restore its personality.json export"""
+    from src.memory_store import get_memory_store
+
+    def read():
+        return json.dumps(get_memory_store().export(), indent=2)
+
+    def write(content):
+        get_memory_store().import_data(json.loads(content))
+        return get_memory_store().path
+
+    return {"reader": read, "writer": write}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_backup_store(name):
+    """Shared backup store for "memory", "newsletter" or "social" (ValueError otherwise)"""
+    if name not in BACKUP_TARGETS:
+        raise ValueError(f"Unknown backup target: {name}")
+
+    with _stores_lock:
+        if name not in _stores:
+            hooks = _memory_hooks() if name == "memory" else {}
+            _stores[name] = BackupStore(*BACKUP_TARGETS[name], **hooks)
+        return _stores[name]
@@ -0,0 +1,234 @@
+"""
+Batch Runner - Backfill many days of newsletters concurrently
+Reads dated input files, generates each issue through the GenerationPool, and
+keeps a manifest on disk that doubles as the resume checkpoint
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import as_completed
+from src.generation_pool import GenerationPool, estimate_tokens
+from src.length_model import get_length_model
+from src.debug_logger import logger
+
+DATE_PATTERN = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})")
+
+# Prompt + memory runs ~2.5k tokens; each call reserves its max_tokens
+# (learned from archived output lengths, see src/length_model.py)
+PROMPT_TOKEN_RESERVE = 2500
+
+
+def parse_date(value):
+    """Parse YYYY-MM-DD or YYYYMMDD into a datetime (None passes through)"""
+    if value is None:
+        return None
+    match = DATE_PATTERN.fullmatch(value.strip())
+    if not match:
+        raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+    return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+
+def find_inputs(input_dir, start=None, end=None):
+    """
+    Find dated daily input files
+
+    Args:
+        input_dir: Folder of .txt/.md files with a date in the name (2026-01-23.txt, day_20260123.md)
+        start: First date to include (optional)
+        end: Last date to include, inclusive (optional)
+
+    Returns:
+        dict of date -> file path, sorted by date
+    """
+    inputs = {}
+
+    for filename in sorted(os.listdir(input_dir)):
+        if not filename.endswith(('.txt', '.md')):
+            continue
+
+        match = DATE_PATTERN.search(filename)
+        if not match:
+            continue
+
+        try:
+            date = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            continue
+
+        if (start and date < start) or (end and date > end):
+            continue
+
+        if date in inputs:
+            logger.log("BATCH", f"Duplicate input for {date:%Y-%m-%d}, using {os.path.basename(inputs[date])}", "basic", force=True)
+            continue
+
+        inputs[date] = os.path.join(input_dir, filename)
+
+    return dict(sorted(inputs.items()))
+
+
+class BatchRunner:
+    def __init__(self, input_dir, start=None, end=None, concurrency=None, social=False, manifest_path=None, force=False):
+        from src.newsletter_generator_simple import NewsletterGenerator
+        from src.social_generator_simple import SocialGenerator
+
+        self.input_dir = input_dir
+        self.start = start
+        self.end = end
+        self.concurrency = concurrency
+        self.social = social
+        self.force = force
+
+        if manifest_path is None:
+            span = f"{start:%Y%m%d}" if start else "start"
+            span += f"_{end:%Y%m%d}" if end else "_end"
+            manifest_path = os.path.join(os.path.dirname(__file__), "..", "output", "batch", f"manifest_{span}.json")
+        self.manifest_path = manifest_path
+
+        self.newsletter_generator = NewsletterGenerator()
+        self.social_generator = SocialGenerator() if social else None
+
+        self._lock = threading.Lock()
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        """Load the manifest from a previous run (the resume checkpoint)"""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except:
+            manifest = {"items": {}}
+
+        manifest.update({
+            "input_dir": os.path.abspath(self.input_dir),
+            "from": f"{self.start:%Y-%m-%d}" if self.start else None,
+            "to": f"{self.end:%Y-%m-%d}" if self.end else None,
+            "social": self.social
+        })
+        return manifest
+
+    def save_manifest(self):
+        """Write the manifest atomically so an interrupt never leaves it half-written"""
+        self.manifest["updated"] = datetime.now().isoformat()
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_done(self, date, input_hash):
+        """Skip days already generated from the same input (unless forced)"""
+        if self.force:
+            return False
+
+        item = self.manifest["items"].get(f"{date:%Y-%m-%d}")
+        if not item or item.get("status") != "done" or item.get("input_hash") != input_hash:
+            return False
+
+        # Social was requested this time but not last time
+        return not self.social or bool(item.get("social_filepath"))
+
+    def run(self, on_progress=None):
+        """
+        Generate every pending day
+
+        Args:
+            on_progress: Optional callback(date_str, item) after each finished day
+
+        Returns:
+            The final manifest dict
+        """
+        inputs = find_inputs(self.input_dir, self.start, self.end)
+
+        todo = []
+        for date, path in inputs.items():
+            with open(path, 'r') as f:
+                daily_input = f.read()
+            input_hash = hashlib.sha256(daily_input.encode()).hexdigest()
+
+            if self.is_done(date, input_hash):
+                continue
+            todo.append((date, path, daily_input, input_hash))
+
+        self.manifest["status"] = "running"
+        self.manifest["started"] = datetime.now().isoformat()
+        self.manifest["total"] = len(inputs)
+        self.manifest["skipped"] = len(inputs) - len(todo)
+        self.save_manifest()
+
+        logger.log("BATCH", f"{len(todo)} to generate, {len(inputs) - len(todo)} already done", "basic", force=True)
+
+        try:
+            with GenerationPool(max_workers=self.concurrency) as pool:
+                futures = {
+                    pool.submit(self._process, pool, date, path, daily_input, input_hash): date
+                    for date, path, daily_input, input_hash in todo
+                }
+                for future in as_completed(futures):
+                    date_str = f"{futures[future]:%Y-%m-%d}"
+                    if on_progress:
+                        on_progress(date_str, self.manifest["items"][date_str])
+        except KeyboardInterrupt:
+            with self._lock:
+                self.manifest["status"] = "interrupted"
+                self.save_manifest()
+            raise
+
+        with self._lock:
+            failed = [d for d, item in self.manifest["items"].items() if item.get("status") == "failed"]
+            self.manifest["status"] = "complete" if not failed else "complete_with_errors"
+            self.manifest["failed"] = failed
+            self.save_manifest()
+
+        return self.manifest
+
+    def _process(self, pool, date, path, daily_input, input_hash):
+        """Generate one day (newsletter, then optionally social) and checkpoint it"""
+        date_str = f"{date:%Y-%m-%d}"
+        started = time.perf_counter()
+        item = {
+            "input_file": os.path.abspath(path),
+            "input_hash": input_hash,
+            "day_num": self.newsletter_generator.calculate_day_number(date)
+        }
+
+        try:
+            reserve = PROMPT_TOKEN_RESERVE + estimate_tokens(daily_input) + get_length_model().max_tokens("newsletter")
+            result = pool.call(
+                self.newsletter_generator.generate_newsletter,
+                daily_input,
+                date=date,
+                estimated_tokens=reserve
+            )
+            item["filepath"] = result["filepath"]
+
+            if self.social_generator:
+                reserve = PROMPT_TOKEN_RESERVE + estimate_tokens(result["newsletter"]) + get_length_model().max_tokens("social")
+                social = pool.call(
+                    self.social_generator.generate_social_content,
+                    result["newsletter"],
+                    date=date,
+                    estimated_tokens=reserve
+                )
+                item["social_filepath"] = social["filepath"]
+
+            item["status"] = "done"
+        except Exception as e:
+            item["status"] = "failed"
+            item["error"] = str(e)
+            logger.log("BATCH FAILED", f"{date_str}: {e}", "basic", force=True)
+
+        item["seconds"] = round(time.perf_counter() - started, 2)
+        item["finished"] = datetime.now().isoformat()
+
+        with self._lock:
+            self.manifest["items"][date_str] = item
+            self.save_manifest()
+
+        return item
@@ -0,0 +1,61 @@
+"""
+Candidate Scoring - Pick the best of several generated newsletters
+Each candidate is checked against the editorial constitution (after the usual
+auto-fixes) and scored with a few cheap length and voice heuristics, so a
+k-candidate generation can return the best one without another round trip
+"""
+
+from statistics import median
+from src.constitution_checker import get_checker
+
+# Penalties (higher score is better; a clean, typical candidate scores 0)
+ISSUE_PENALTY = 10.0           # per constitution issue auto-fix couldn't resolve
+AUTO_FIX_PENALTY = 1.0         # the candidate needed auto-fixing
+VOICE_DONT_PENALTY = 3.0       # per phrase from memory's voice_donts
+EXCLAMATION_PENALTY = 0.5      # per "!" - quiet momentum over hype
+LENGTH_PENALTY = 5.0           # × relative distance from the median candidate length
+
+
+def score_candidates(texts, voice_donts=None, checker=None):
+    """
+    Validate and score generated newsletters
+
+    Args:
+        texts: Raw candidate texts
+        voice_donts: Phrases to avoid (MemoryManager memory["voice_donts"])
+        checker: ConstitutionChecker to use (default: the shared one)
+
+    Returns:
+        list of dicts (newsletter, issues, auto_fixed, words, score, penalties),
+        best first; ties keep generation order
+    """
+    checker = checker or get_checker()
+    donts = [phrase.lower() for phrase in (voice_donts or []) if phrase.strip()]
+
+    candidates = []
+    for text in texts:
+        issues = checker.check(text, "newsletter")
+        fixed, remaining = checker.auto_fix(text, issues, "newsletter") if issues else (text, [])
+        lower = fixed.lower()
+        candidates.append({
+            "newsletter": fixed,
+            "issues": remaining,
+            "auto_fixed": len(remaining) < len(issues),
+            "words": len(fixed.split()),
+            "penalties": {
+                "issues": ISSUE_PENALTY * len(remaining),
+                "auto_fix": AUTO_FIX_PENALTY if len(remaining) < len(issues) else 0.0,
+                "voice_donts": VOICE_DONT_PENALTY * sum(1 for phrase in donts if phrase in lower),
+                "exclamations": EXCLAMATION_PENALTY * fixed.count("!")
+            }
+        })
+
+    # Length is judged against the other candidates - an outlier is usually a
+    # truncated or rambling completion
+    typical = median(c["words"] for c in candidates) if candidates else 0
+    for candidate in candidates:
+        deviation = abs(candidate["words"] - typical) / typical if typical else 0.0
+        candidate["penalties"]["length"] = round(LENGTH_PENALTY * deviation, 2)
+        candidate["score"] = round(0.0 - sum(candidate["penalties"].values()), 2)
+
+    return sorted(candidates, key=lambda c: -c["score"])
@@ -3,23 +3,57 @@ Constitution Checker - Enforces editorial rules post-generation
 Validates output against ZABAL editorial constitution
 """
 
-import re
 import json
 import os
+import re
+import threading
 from src.debug_logger import logger
+from src.rule_engine import RuleEngine, Document, SIGNATURE
+from src.repair import BanRepairer
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "memory", "editorial_rules.json")
+
+# What a stop sequence on the signature leaves behind: a trailing line with just its dash
+SIGNATURE_STUB = re.compile(r"\n[ \t]*[–—-]+[ \t]*$")
 
 class ConstitutionChecker:
     def __init__(self, rules_path=None):
         if rules_path is None:
-            rules_path = os.path.join(
-                os.path.dirname(__file__),
-                "..",
-                "memory",
-                "editorial_rules.json"
-            )
+            rules_path = RULES_PATH
         
         with open(rules_path, 'r') as f:
             self.rules = json.load(f)
+        self._engines = {}
+    
+    @property
+    def signature(self):
+        return self.rules.get("output_constraints", {}).get("newsletter", {}).get("signature", SIGNATURE)
+    
+    @property
+    def signature_stop(self):
+        """Stop sequence for newsletter generation: the signature without its leading dash"""
+        return self.signature.lstrip("–—- ")
+    
+    def restore_signature(self, text):
+        """Text with the signature appended where generation stopped at signature_stop (unchanged if it's there)"""
+        if self.signature_stop in text:
+            return text
+        return SIGNATURE_STUB.sub("", text.rstrip()).rstrip() + "\n\n" + self.signature
+    
+    def engine(self, content_type):
+        """Compiled RuleEngine for a content type (built once per checker)"""
+        if content_type not in self._engines:
+            self._engines[content_type] = RuleEngine(self.rules, content_type)
+        return self._engines[content_type]
+    
+    def findings(self, text, content_type="newsletter"):
+        """
+        Structured findings with character spans (see src/rule_engine.py)
+        
+        Returns:
+            list of finding dicts, in document order
+        """
+        return self.engine(content_type).run(text)
     
     def check(self, text, content_type="newsletter"):
         """
@@ -32,19 +66,8 @@ class ConstitutionChecker:
         Returns:
             list of issues found
         """
-        issues = []
-        
-        # Check hard bans
-        bans = self.rules.get("hard_bans", [])
-        for phrase in bans:
-            if phrase.lower() in text.lower():
-                issues.append(f"BANNED_PHRASE: {phrase}")
-        
-        # Content-specific checks
-        if content_type == "newsletter":
-            issues.extend(self._check_newsletter(text))
-        elif content_type == "social":
-            issues.extend(self._check_social(text))
+        # One issue string per rule violation, however many places it occurs
+        issues = list(dict.fromkeys(f["issue"] for f in self.findings(text, content_type)))
         
         # Log results
         if logger.is_enabled("log_prompt_assembly"):
@@ -57,72 +80,6 @@ class ConstitutionChecker:
         
         return issues
     
-    def _check_newsletter(self, text):
-        """Newsletter-specific checks"""
-        issues = []
-        constraints = self.rules.get("output_constraints", {}).get("newsletter", {})
-        
-        # Check signature
-        if constraints.get("require_signature"):
-            if "– BetterCallZaal on behalf of the ZABAL Team" not in text:
-                issues.append("MISSING_SIGNATURE")
-        
-        # Check closing line length (find last non-signature line)
-        lines = text.strip().split("\n")
-        closing_line = None
-        for i in range(len(lines) - 1, -1, -1):
-            if lines[i].strip() and "BetterCallZaal" not in lines[i]:
-                closing_line = lines[i].strip()
-                break
-        
-        if closing_line:
-            sentence_count = len([s for s in closing_line.split(".") if s.strip()])
-            max_sentences = constraints.get("closing_line_max_sentences", 1)
-            
-            if sentence_count > max_sentences:
-                issues.append(f"CLOSING_TOO_LONG: {sentence_count} sentences (max {max_sentences})")
-        
-        # Check for multiple lens mixing (heuristic)
-        lens_indicators = {
-            "you are a badass": 0,
-            "don't sweat": 0,
-            "stoic": 0,
-            "zen": 0,
-            "buddha": 0,
-            "marcus aurelius": 0
-        }
-        
-        text_lower = text.lower()
-        for indicator in lens_indicators:
-            if indicator in text_lower:
-                lens_indicators[indicator] = 1
-        
-        if sum(lens_indicators.values()) > 1:
-            issues.append("MULTIPLE_LENSES_DETECTED")
-        
-        return issues
-    
-    def _check_social(self, text):
-        """Social content-specific checks"""
-        issues = []
-        constraints = self.rules.get("output_constraints", {}).get("social", {})
-        
-        # Check ZM prefix
-        if constraints.get("require_ZM_prefix"):
-            if not text.strip().upper().startswith("ZM"):
-                issues.append("MISSING_ZM_PREFIX")
-        
-        # Check for emojis or hashtags
-        if constraints.get("no_emojis") or constraints.get("no_hashtags"):
-            emoji_pattern = re.compile(
-                r"[\U0001F300-\U0001FAFF]|#",
-                flags=re.UNICODE
-            )
-            if emoji_pattern.search(text):
-                issues.append("EMOJI_OR_HASHTAG_FOUND")
-        
-        return issues
-    
     def auto_fix(self, text, issues, content_type="newsletter"):
         """
         Attempt to auto-fix safe issues
@@ -138,23 +95,27 @@ class ConstitutionChecker:
         fixed = text
         remaining = []
         
+        # Banned phrases with an entry in ban_substitutions are replaced in place
+        unrepaired = set()
+        if any(issue.startswith("BANNED_PHRASE") for issue in issues):
+            fixed, report = BanRepairer(self).repair(fixed, content_type=content_type)
+            unrepaired = set(report["remaining"])
+        
         for issue in issues:
             if issue == "MISSING_SIGNATURE":
                 # Auto-fix: add signature
-                fixed = fixed.rstrip() + "\n\n– BetterCallZaal on behalf of the ZABAL Team"
+                fixed = self.restore_signature(fixed)
                 logger.log("AUTO-FIX", "Added missing signature", "basic")
             
             elif issue.startswith("CLOSING_TOO_LONG"):
-                # Auto-fix: trim to first sentence (find last non-signature line)
-                lines = fixed.strip().split("\n")
-                for i in range(len(lines) - 1, -1, -1):
-                    if lines[i].strip() and "BetterCallZaal" not in lines[i]:
-                        closing = lines[i]
-                        first_sentence = closing.split(".")[0] + "."
-                        lines[i] = first_sentence
-                        fixed = "\n".join(lines)
-                        logger.log("AUTO-FIX", "Trimmed closing line to 1 sentence", "basic")
-                        break
+                # Auto-fix: keep the closing line's allowed sentences (real sentence
+                # boundaries, so "e.g." doesn't cut it short)
+                max_sentences = self.rules.get("output_constraints", {}).get("newsletter", {}).get("closing_line_max_sentences", 1)
+                closing = Document(fixed).closing_line
+                if closing and len(closing["sentences"]) > max_sentences:
+                    keep = closing["sentences"][max_sentences - 1].end
+                    fixed = fixed[:keep] + fixed[closing["span"].end:]
+                    logger.log("AUTO-FIX", f"Trimmed closing line to {max_sentences} sentence(s)", "basic")
             
             elif issue == "MISSING_ZM_PREFIX":
                 # Auto-fix: add ZM prefix
@@ -162,9 +123,12 @@ class ConstitutionChecker:
                 logger.log("AUTO-FIX", "Added ZM prefix", "basic")
             
             elif issue.startswith("BANNED_PHRASE"):
-                # Cannot auto-fix - needs regeneration
-                remaining.append(issue)
-                logger.log("CANNOT AUTO-FIX", issue, "basic")
+                if issue.split(": ", 1)[1] in unrepaired:
+                    # No substitution - needs a rewrite (see src/repair.py) or regeneration
+                    remaining.append(issue)
+                    logger.log("CANNOT AUTO-FIX", issue, "basic")
+                else:
+                    logger.log("AUTO-FIX", f"Replaced banned phrase: {issue.split(': ', 1)[1]}", "basic")
             
             elif issue == "MULTIPLE_LENSES_DETECTED":
                 # Cannot auto-fix - needs regeneration
@@ -177,6 +141,25 @@ class ConstitutionChecker:
         return fixed, remaining
 
 
+_checker = None
+_checker_mtime = None
+_checker_lock = threading.Lock()
+
+
+def get_checker():
+    """Shared ConstitutionChecker, rebuilt when editorial_rules.json changes"""
+    global _checker, _checker_mtime
+    try:
+        mtime = os.path.getmtime(RULES_PATH)
+    except OSError:
+        mtime = None
+    with _checker_lock:
+        if _checker is None or mtime != _checker_mtime:
+            _checker = ConstitutionChecker()
+            _checker_mtime = mtime
+        return _checker
+
+
 def validate_output(text, content_type="newsletter", auto_fix_enabled=True):
     """
     Convenience function to check and optionally fix output
@@ -189,7 +172,7 @@ def validate_output(text, content_type="newsletter", auto_fix_enabled=True):
     Returns:
         tuple: (validated_text, issues_found, was_fixed)
     """
-    checker = ConstitutionChecker()
+    checker = get_checker()
     issues = checker.check(text, content_type)
     
     if not issues:
@@ -5,52 +5,68 @@ Maintains personality.json with evidence-based updates from recent writing
 """
 
 import os
+import copy
 import json
+import hashlib
 from datetime import datetime
-from openai import OpenAI
+from src.providers import get_openai_client, GROQ_BASE_URL
 from src.debug_logger import logger
+from src.storage import get_storage
+from src.backup_store import get_backup_store
+from src.memory_store import get_memory_store
+from src.generation_pool import GenerationPool, estimate_tokens, is_rate_limit_error
+from src.json_extract import JSONStreamExtractor, ANALYSIS_SCHEMA, validate, fill_missing
+from src.sample_chunker import chunk_sources, merge_analyses
+from src.similarity import SimilarityIndex
+
+# Map step sizing - keeps each call well inside Groq's tokens/minute quota
+CHUNK_MAX_TOKENS = 1500
+CHUNK_PROMPT_OVERHEAD = 400
+CHUNK_COMPLETION_TOKENS = 1200
+REPAIR_COMPLETION_TOKENS = 600
+
+# Bump when the per-chunk prompt changes so cached analyses are ignored
+ANALYSIS_PROMPT_VERSION = "chunk-v1"
 
 class ZABALContextUpdater:
     def __init__(self):
         self.memory_path = os.path.join(os.path.dirname(__file__), "..", "memory", "personality.json")
-        self.backup_dir = os.path.join(os.path.dirname(__file__), "..", "memory", "backups")
         
         # Groq client for analysis
-        self.client = OpenAI(
+        self.client = get_openai_client(
             api_key=os.getenv("GROQ_API_KEY", "gsk_demo_key_placeholder"),
-            base_url="https://api.groq.com/openai/v1"
+            base_url=GROQ_BASE_URL
         )
         self.model = "llama-3.3-70b-versatile"
         
-        os.makedirs(self.backup_dir, exist_ok=True)
+        # Groq supports response_format=json_object; switched off if the API rejects it
+        self.json_mode = True
+        
+        self.storage = get_storage()
     
     def backup_current_memory(self):
-        """Create timestamped backup of current personality.json"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = os.path.join(self.backup_dir, f"personality_{timestamp}.json")
-        
-        with open(self.memory_path, 'r') as f:
-            current = json.load(f)
-        
-        with open(backup_path, 'w') as f:
-            json.dump(current, f, indent=2)
-        
-        return backup_path
+        """Back up the current personality.json (skipped if identical to the last backup)"""
+        store = get_backup_store("memory")
+        entry = store.backup() or store.latest()
+        return store.location(entry)
     
     def load_current_memory(self):
-        """Load current personality.json"""
-        with open(self.memory_path, 'r') as f:
-            return json.load(f)
+        """Load current memory (personality.json shape)"""
+        return get_memory_store().export()
     
     def save_memory(self, memory_data):
-        """Save updated personality.json"""
-        with open(self.memory_path, 'w') as f:
-            json.dump(memory_data, f, indent=2)
+        """Save updated memory (only changed items are written)"""
+        get_memory_store().import_data(memory_data)
     
     def analyze_writing_samples(self, sources, feedback=None):
         """
         Analyze writing samples and extract voice patterns
         
+        Sources are split into token-bounded chunks that are analyzed
+        concurrently (map) and merged locally (reduce). Each chunk's analysis
+        is cached by content hash, so re-running with one new sample only
+        pays for that sample's chunks.
+        
         Args:
             sources: List of URLs or text samples
             feedback: Optional feedback from Zaal about what felt off
@@ -63,15 +79,85 @@ class ZABALContextUpdater:
                 logger.log(f"  Source {i}", source[:100], "verbose")
         
         current_memory = self.load_current_memory()
+        chunks = chunk_sources(sources, CHUNK_MAX_TOKENS)
         
-        # Build analysis prompt
-        analysis_prompt = f"""You are the ZABAL Context Updater. Analyze the provided writing samples and current personality memory.
-
-CURRENT MEMORY:
-{json.dumps(current_memory, indent=2)}
+        analyses = [None] * len(chunks)
+        pending = []
+        for i, chunk in enumerate(chunks):
+            cache_key = self._chunk_cache_key(chunk, feedback)
+            cached = self._load_cached_analysis(cache_key)
+            if cached is not None:
+                analyses[i] = cached
+            else:
+                pending.append((i, chunk, cache_key))
+        
+        if logger.is_enabled("log_context_diff"):
+            logger.log("CHUNKS", f"{len(chunks)} total, {len(chunks) - len(pending)} cached, {len(pending)} to analyze", "basic")
+        
+        if pending:
+            with GenerationPool() as pool:
+                futures = [
+                    (i, cache_key, pool.submit_call(
+                        self._analyze_chunk,
+                        chunk,
+                        feedback,
+                        estimated_tokens=CHUNK_PROMPT_OVERHEAD + estimate_tokens(chunk) + CHUNK_COMPLETION_TOKENS
+                    ))
+                    for i, chunk, cache_key in pending
+                ]
+                for i, cache_key, future in futures:
+                    try:
+                        analyses[i] = future.result()
+                        self._save_cached_analysis(cache_key, analyses[i])
+                    except Exception as e:
+                        logger.log("CHUNK ANALYSIS FAILED", f"chunk {i + 1}: {e}", "basic", force=True)
+        
+        analyses = [a for a in analyses if a]
+        if not analyses:
+            logger.log("ANALYSIS FAILED", "No chunk could be analyzed", "basic", force=True)
+            return None
+        
+        analysis = merge_analyses(analyses, current_memory)
+        
+        if logger.is_enabled("log_context_diff"):
+            logger.log_section("ANALYSIS RESULTS")
+            logger.log("VOICE PATTERNS FOUND", 
+                      len(analysis.get("voice_patterns_found", [])), 
+                      "verbose")
+            logger.log("NEW EXAMPLES SUGGESTED", 
+                      len(analysis.get("new_voice_examples", [])), 
+                      "verbose")
+            logger.log("NEW DONTS SUGGESTED", 
+                      len(analysis.get("new_voice_donts", [])), 
+                      "verbose")
+            logger.log("REASONING", analysis.get("reasoning", ""), "verbose")
+        
+        return analysis
+    
+    def _chunk_cache_key(self, chunk, feedback):
+        digest = hashlib.sha256(
+            "\x00".join([ANALYSIS_PROMPT_VERSION, self.model, feedback or "", chunk]).encode("utf-8")
+        ).hexdigest()
+        return f"memory/analysis_cache/{digest}.json"
+    
+    def _load_cached_analysis(self, cache_key):
+        try:
+            return json.loads(self.storage.read(cache_key))
+        except (KeyError, ValueError):
+            return None
+    
+    def _save_cached_analysis(self, cache_key, analysis):
+        try:
+            self.storage.write(cache_key, json.dumps(analysis))
+        except OSError as e:
+            logger.log("ANALYSIS CACHE", f"Could not cache: {e}", "basic")
+    
+    def _analyze_chunk(self, chunk, feedback=None):
+        """Map step - analyze one chunk of writing (no memory in the prompt, so results are cacheable)"""
+        analysis_prompt = f"""You are the ZABAL Context Updater. Analyze the provided writing sample.
 
-WRITING SAMPLES TO ANALYZE:
-{chr(10).join(sources)}
+WRITING SAMPLE TO ANALYZE:
+{chunk}
 
 {f"ZAAL'S FEEDBACK: {feedback}" if feedback else ""}
 
@@ -81,9 +167,8 @@ Extract voice patterns, identify what's working, and suggest minimal high-signal
 HARD RULES:
 - NO marketing language
 - NO motivational clichés
-- NO contradictions with existing voice examples
 - MINIMAL edits only (high signal)
-- Evidence-based only
+- Evidence-based only - every suggestion must come from this sample
 
 OUTPUT FORMAT (JSON):
 {{
@@ -100,44 +185,79 @@ OUTPUT FORMAT (JSON):
     "focus": ["...", "...", "..."],
     "avoid_this_week": ["...", "..."]
   }},
-  "remove_weak_examples": [0, 2],
   "reasoning": "One paragraph explaining why these changes help"
 }}
 
 Be ruthless about quality. Only suggest additions that are unmistakably Zaal's voice."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a precise voice analyst. Extract patterns, never invent."},
-                    {"role": "user", "content": analysis_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=3000
-            )
-            
-            # Parse JSON response
-            analysis = json.loads(response.choices[0].message.content)
-            
-            if logger.is_enabled("log_context_diff"):
-                logger.log_section("ANALYSIS RESULTS")
-                logger.log("VOICE PATTERNS FOUND", 
-                          len(analysis.get("voice_patterns_found", [])), 
-                          "verbose")
-                logger.log("NEW EXAMPLES SUGGESTED", 
-                          len(analysis.get("new_voice_examples", [])), 
-                          "verbose")
-                logger.log("NEW DONTS SUGGESTED", 
-                          len(analysis.get("new_voice_donts", [])), 
-                          "verbose")
-                logger.log("REASONING", analysis.get("reasoning", ""), "verbose")
-            
-            return analysis
-            
-        except Exception as e:
-            logger.log("ANALYSIS FAILED", str(e), "basic", force=True)
-            return None
+        messages = [
+            {"role": "system", "content": "You are a precise voice analyst. Extract patterns, never invent. Respond with a single JSON object."},
+            {"role": "user", "content": analysis_prompt}
+        ]
+        
+        extractor = self._request_json(messages, CHUNK_COMPLETION_TOKENS)
+        parsed = extractor.result()
+        analysis, missing = validate(parsed)
+        
+        truncated = extractor.truncated_field(parsed)
+        if truncated and truncated not in missing:
+            missing.append(truncated)
+            analysis.pop(truncated, None)
+        
+        if missing:
+            # Re-ask for just the broken fields instead of paying for the whole analysis again
+            logger.log("ANALYSIS REPAIR", f"Re-asking for: {', '.join(missing)}", "verbose")
+            messages += [
+                {"role": "assistant", "content": extractor.text() or "(no JSON)"},
+                {"role": "user", "content": f"That JSON was incomplete. Reply with a JSON object containing ONLY these keys, in the same format as before: {', '.join(missing)}"}
+            ]
+            repair = self._request_json(messages, REPAIR_COMPLETION_TOKENS).result()
+            repaired, _ = validate(repair, {field: ANALYSIS_SCHEMA[field] for field in missing})
+            analysis.update(repaired)
+            missing = [field for field in missing if field not in repaired]
+        
+        if len(missing) == len(ANALYSIS_SCHEMA):
+            raise ValueError("Model response contained no usable JSON analysis")
+        
+        return fill_missing(analysis, missing)
+    
+    def _request_json(self, messages, max_tokens):
+        """
+        Ask for JSON - JSON mode where the provider supports it, otherwise a
+        streamed response fed through the tolerant extractor (stops reading
+        as soon as the object closes)
+        
+        Returns:
+            JSONStreamExtractor holding the response
+        """
+        extractor = JSONStreamExtractor()
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.3,
+            "max_tokens": max_tokens
+        }
+        
+        if self.json_mode:
+            try:
+                response = self.client.chat.completions.create(response_format={"type": "json_object"}, **params)
+                extractor.feed(response.choices[0].message.content or "")
+                return extractor
+            except Exception as e:
+                # 400 = JSON mode unsupported, or the model's output failed JSON validation
+                if is_rate_limit_error(e) or getattr(e, "status_code", None) != 400:
+                    raise
+                if "response_format" in str(e):
+                    self.json_mode = False
+                logger.log("JSON MODE", f"Falling back to streamed extraction: {e}", "verbose")
+        
+        stream = self.client.chat.completions.create(stream=True, **params)
+        for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                if extractor.feed(event.choices[0].delta.content):
+                    break
+        stream.close()
+        return extractor
     
     def apply_updates(self, analysis, current_memory):
         """Apply analyzed updates to memory with safety checks"""
@@ -145,7 +265,8 @@ Be ruthless about quality. Only suggest additions that are unmistakably Zaal's v
         if logger.is_enabled("log_context_diff"):
             logger.log_section("APPLYING UPDATES")
         
-        updated = current_memory.copy()
+        # Deep copy - the list edits below must not reach the caller's memory
+        updated = copy.deepcopy(current_memory)
         changes = []
         
         # 1. Voice Examples (max 1-2 new, keep 5-12 total)
@@ -167,28 +288,27 @@ Be ruthless about quality. Only suggest additions that are unmistakably Zaal's v
                     })
                     changes.append(f"Added voice example: {example['title']}")
         
-        # 2. Voice Don'ts (add only if not already present)
-        if analysis.get("new_voice_donts"):
-            for phrase in analysis["new_voice_donts"]:
-                if phrase not in updated["voice_donts"]:
-                    updated["voice_donts"].append(phrase)
-                    changes.append(f"Added voice don't: {phrase}")
-        
-        # 3. Style Notes (add only if not already present)
-        if analysis.get("new_style_notes"):
-            for note in analysis["new_style_notes"]:
-                if note not in updated["style_notes"]:
-                    updated["style_notes"].append(note)
-                    changes.append(f"Added style note: {note}")
-        
-        # 4. Context Updates
-        if analysis.get("context_updates"):
-            for update in analysis["context_updates"]:
-                if update not in updated.get("context_memories", []):
-                    if "context_memories" not in updated:
-                        updated["context_memories"] = []
-                    updated["context_memories"].append(update)
-                    changes.append(f"Added context: {update}")
+        # 2-4. Voice Don'ts, Style Notes, Context - skip near-duplicates of what's
+        # already there (or of something added earlier in this same update)
+        list_updates = [
+            ("new_voice_donts", "voice_donts", "voice don't"),
+            ("new_style_notes", "style_notes", "style note"),
+            ("context_updates", "context_memories", "context")
+        ]
+        for source_field, field, label in list_updates:
+            if not analysis.get(source_field):
+                continue
+            
+            updated[field] = list(updated.get(field, []))
+            index = SimilarityIndex.from_items(updated[field])
+            for item in analysis[source_field]:
+                duplicate = index.find_duplicate(item)
+                if duplicate is not None:
+                    logger.log("NEAR DUPLICATE", f"Skipped {label}: {item} (matches: {duplicate})", "verbose")
+                    continue
+                updated[field].append(item)
+                index.add(item, item)
+                changes.append(f"Added {label}: {item}")
         
         # 5. Current State
         if analysis.get("current_state"):
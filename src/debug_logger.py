@@ -140,5 +140,16 @@ class DebugLogger:
             self.log("NEW", str(new_data)[:200], level)
 
 
+class _LazyLogger:
+    """Stand-in for the global logger that reads debug.json on first use, not at import"""
+    def __init__(self):
+        self._instance = None
+    
+    def __getattr__(self, name):
+        if self._instance is None:
+            self._instance = DebugLogger()
+        return getattr(self._instance, name)
+
+
 # Global instance for easy import
-logger = DebugLogger()
+logger = _LazyLogger()
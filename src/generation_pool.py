@@ -0,0 +1,189 @@
+"""
+Generation Pool - Bounded, rate-limit-aware concurrency for LLM calls
+Keeps requests and tokens per minute under the provider quota (Groq free tier
+by default) and retries 429s with backoff instead of failing the whole run
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.debug_logger import logger
+
+DEFAULT_LIMITS = {
+    "requests_per_minute": 30,
+    "tokens_per_minute": 6000,
+    "max_workers": 4,
+    "max_retries": 5,
+    "backoff_seconds": 2.0,
+    "max_backoff_seconds": 60.0
+}
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 chars per token) - good enough for quota planning"""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def is_rate_limit_error(exc):
+    """Check an exception (and whatever it wraps) for a provider 429"""
+    while exc is not None:
+        if type(exc).__name__ == "RateLimitError":
+            return True
+        if getattr(exc, "status_code", None) == 429:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _retry_after(exc):
+    """Seconds the provider asked us to wait, if it said so"""
+    while exc is not None:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            value = headers.get("retry-after")
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    pass
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount can be taken (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount):
+        self.available -= min(amount, self.capacity)
+
+    def drain(self):
+        self.available = 0.0
+        self.updated = time.monotonic()
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens=0):
+        """Block until one request plus estimated_tokens fit in the quota"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    self.blocked_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(estimated_tokens, now)
+                )
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+                    return
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """Provider said slow down - pause every worker, not just the one that got the 429"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens.drain()
+
+
+class GenerationPool:
+    def __init__(self, max_workers=None, requests_per_minute=None, tokens_per_minute=None, config_path=None):
+        if config_path is None:
+            config_path = os.path.join(os.path.dirname(__file__), "..", "config", "rate_limits.json")
+
+        self.limits = self.load_limits(config_path)
+        if max_workers is not None:
+            self.limits["max_workers"] = max_workers
+        if requests_per_minute is not None:
+            self.limits["requests_per_minute"] = requests_per_minute
+        if tokens_per_minute is not None:
+            self.limits["tokens_per_minute"] = tokens_per_minute
+
+        self.limiter = RateLimiter(self.limits["requests_per_minute"], self.limits["tokens_per_minute"])
+        self.executor = ThreadPoolExecutor(max_workers=self.limits["max_workers"])
+
+    def load_limits(self, config_path):
+        """Load rate limit configuration"""
+        limits = dict(DEFAULT_LIMITS)
+        try:
+            with open(config_path, 'r') as f:
+                limits.update(json.load(f))
+        except:
+            pass
+        return limits
+
+    def call(self, fn, *args, estimated_tokens=0, **kwargs):
+        """
+        Run fn in the current thread under the rate limit, retrying 429s
+
+        Args:
+            fn: Callable that makes one LLM request
+            estimated_tokens: Prompt + completion tokens to reserve against the quota
+
+        Returns:
+            Whatever fn returns
+        """
+        max_retries = self.limits["max_retries"]
+
+        for attempt in range(max_retries + 1):
+            self.limiter.acquire(estimated_tokens)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == max_retries:
+                    raise
+
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(
+                        self.limits["max_backoff_seconds"],
+                        self.limits["backoff_seconds"] * (2 ** attempt)
+                    ) * (0.5 + random.random() / 2)
+
+                logger.log("RATE LIMITED", f"retry {attempt + 1}/{max_retries} in {delay:.1f}s", "basic", force=True)
+                self.limiter.penalize(delay)
+
+    def submit(self, fn, *args, **kwargs):
+        """Run a task on the pool (the task should use call() for its LLM requests)"""
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def submit_call(self, fn, *args, estimated_tokens=0, **kwargs):
+        """Run a single rate-limited LLM request on the pool"""
+        return self.executor.submit(self.call, fn, *args, estimated_tokens=estimated_tokens, **kwargs)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True, cancel_futures=exc_type is not None)
+        return False
@@ -0,0 +1,239 @@
+"""
+JSON Extract - Tolerant, incremental JSON parsing for model output
+Finds the first JSON object in a (possibly streamed) response, ignoring
+preamble and code fences, repairs truncated output, and validates the
+result against a small schema so callers can re-ask for just the fields
+that are missing or malformed
+"""
+
+import json
+
+# Field -> expected shape. "str_list" is a list of strings, "example_list" a list
+# of {"title", "content"} objects; anything else in a list is dropped.
+ANALYSIS_SCHEMA = {
+    "voice_patterns_found": "str_list",
+    "new_voice_examples": "example_list",
+    "new_voice_donts": "str_list",
+    "new_style_notes": "str_list",
+    "context_updates": "str_list",
+    "current_state": "state",
+    "reasoning": "str"
+}
+
+STATE_SCHEMA = {
+    "phase": "str",
+    "energy": "str",
+    "focus": "str_list",
+    "avoid_this_week": "str_list"
+}
+
+EMPTY_VALUES = {
+    "str_list": list,
+    "example_list": list,
+    "state": dict,
+    "str": str
+}
+
+
+class JSONStreamExtractor:
+    """
+    Feed response text as it arrives; the first top-level {...} object is
+    tracked with a small state machine so completion is known without
+    re-parsing the whole buffer on every delta
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.started = False
+        self.complete = False
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text):
+        """Consume a chunk of response text. Returns True once the object is complete."""
+        for char in text:
+            if self.complete:
+                break
+
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.stack.append("}")
+                    self.buffer.append(char)
+                continue
+
+            self.buffer.append(char)
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char == "{":
+                self.stack.append("}")
+            elif char == "[":
+                self.stack.append("]")
+            elif char in "}]":
+                if self.stack and self.stack[-1] == char:
+                    self.stack.pop()
+                if not self.stack:
+                    self.complete = True
+
+        return self.complete
+
+    def text(self):
+        return "".join(self.buffer)
+
+    def result(self):
+        """
+        Parse what has been fed so far
+
+        Returns:
+            dict, or None if no object was found. Truncated output is closed
+            off (dropping the last partial value) before parsing.
+        """
+        if not self.started:
+            return None
+
+        raw = self.text()
+        if self.complete:
+            try:
+                return json.loads(raw)
+            except ValueError:
+                pass
+
+        return _parse_truncated(raw)
+
+    def truncated_field(self, parsed):
+        """Last top-level key of a repaired object - its value may have been cut short"""
+        if self.complete or not isinstance(parsed, dict) or not parsed:
+            return None
+        return list(parsed)[-1]
+
+
+def _parse_truncated(raw):
+    """Close a truncated object, backing off one token at a time until it parses"""
+    candidate = raw
+    while candidate:
+        closed = _close(candidate)
+        if closed is not None:
+            try:
+                parsed = json.loads(closed)
+                if isinstance(parsed, dict):
+                    return parsed
+            except ValueError:
+                pass
+
+        # Drop back to the previous structural boundary and try again
+        cut = max(candidate.rfind(c, 0, len(candidate) - 1) for c in ",{[")
+        if cut <= 0:
+            break
+        candidate = candidate[:cut] if candidate[cut] == "," else candidate[:cut + 1]
+
+    return None
+
+
+def _close(text):
+    """Append the closers for every open array/object in text (None if it ends mid-string)"""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack or stack[-1] != char:
+                return None
+            stack.pop()
+
+    if in_string:
+        # A cut-off string value is likely a cut-off sentence - back off instead
+        return None
+
+    text = text.rstrip()
+    if text.endswith((",", ":")):
+        text = text[:-1]
+    return text + "".join(reversed(stack))
+
+
+def extract_json(text):
+    """Extract the first JSON object from a complete response (None if there isn't one)"""
+    extractor = JSONStreamExtractor()
+    extractor.feed(text)
+    return extractor.result()
+
+
+def _coerce(value, kind):
+    """Return value cleaned to the expected shape, or None if it can't be used"""
+    if kind == "str":
+        return value.strip() if isinstance(value, str) else None
+
+    if kind == "str_list":
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return None
+        return [item.strip() for item in value if isinstance(item, str) and item.strip()]
+
+    if kind == "example_list":
+        if not isinstance(value, list):
+            return None
+        return [
+            item for item in value
+            if isinstance(item, dict) and isinstance(item.get("title"), str) and isinstance(item.get("content"), str)
+        ]
+
+    if kind == "state":
+        if not isinstance(value, dict):
+            return None
+        cleaned, _ = validate(value, STATE_SCHEMA)
+        return cleaned
+
+    return None
+
+
+def validate(data, schema=ANALYSIS_SCHEMA):
+    """
+    Check a parsed object against a schema
+
+    Args:
+        data: Parsed dict (or None)
+        schema: Field -> shape mapping
+
+    Returns:
+        (cleaned dict with only the usable fields, list of missing/invalid field names)
+    """
+    cleaned = {}
+    missing = []
+    data = data if isinstance(data, dict) else {}
+
+    for field, kind in schema.items():
+        value = _coerce(data.get(field), kind) if field in data else None
+        if value is None:
+            missing.append(field)
+        else:
+            cleaned[field] = value
+
+    return cleaned, missing
+
+
+def fill_missing(data, missing, schema=ANALYSIS_SCHEMA):
+    """Give any still-missing fields an empty value of the right shape"""
+    for field in missing:
+        data[field] = EMPTY_VALUES[schema[field]]()
+    return data
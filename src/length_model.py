@@ -0,0 +1,87 @@
+"""
+Length Model - max_tokens budgets learned from archived output lengths
+Fits, per content type and per lens, how long past outputs actually were
+(from the archive index, no blob reads) and turns that into a max_tokens with
+headroom, so calls stop reserving 2000 tokens against the tokens-per-minute
+quota when an issue is ~600
+"""
+
+import math
+import threading
+from src.archive import get_archive
+
+# Without enough history, keep the old fixed budget
+DEFAULT_MAX_TOKENS = 2000
+MIN_SAMPLES = 5
+
+# Budget = max(p95 × PERCENTILE_HEADROOM, longest × LONGEST_HEADROOM) + MARGIN
+PERCENTILE = 0.95
+PERCENTILE_HEADROOM = 1.3
+LONGEST_HEADROOM = 1.1
+MARGIN_TOKENS = 64
+MIN_MAX_TOKENS = 256
+
+# Archive sizes are bytes; same ~4 chars per token as estimate_tokens()
+CHARS_PER_TOKEN = 4
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a sorted list"""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+class LengthModel:
+    def __init__(self, entries):
+        """
+        Args:
+            entries: Archive index entries (kind, lens, size)
+        """
+        samples = {}
+        for entry in entries:
+            if not entry.get("size"):
+                continue
+            tokens = entry["size"] / CHARS_PER_TOKEN
+            samples.setdefault((entry["kind"], None), []).append(tokens)
+            if entry.get("lens"):
+                samples.setdefault((entry["kind"], entry["lens"]), []).append(tokens)
+
+        self.samples = {key: sorted(values) for key, values in samples.items()}
+        self.budgets = {
+            key: self._budget(values)
+            for key, values in self.samples.items() if len(values) >= MIN_SAMPLES
+        }
+
+    def _budget(self, values):
+        budget = max(percentile(values, PERCENTILE) * PERCENTILE_HEADROOM, values[-1] * LONGEST_HEADROOM) + MARGIN_TOKENS
+        return int(min(DEFAULT_MAX_TOKENS, max(MIN_MAX_TOKENS, budget)))
+
+    def max_tokens(self, kind, lens=None):
+        """Budget for one output: the lens's history, else the content type's, else the default"""
+        return self.budgets.get((kind, lens)) or self.budgets.get((kind, None)) or DEFAULT_MAX_TOKENS
+
+    def summary(self):
+        """Per (kind, lens): sample count, median and p95 tokens, budget"""
+        return [{
+            "kind": kind,
+            "lens": lens,
+            "samples": len(values),
+            "median_tokens": round(values[len(values) // 2]),
+            "p95_tokens": round(percentile(values, PERCENTILE)),
+            "max_tokens": self.budgets.get((kind, lens), DEFAULT_MAX_TOKENS)
+        } for (kind, lens), values in sorted(self.samples.items(), key=lambda item: (item[0][0], item[0][1] or ""))]
+
+
+_model = None
+_model_size = None
+_model_lock = threading.Lock()
+
+
+def get_length_model():
+    """Shared LengthModel, refitted when the archive gains entries"""
+    global _model, _model_size
+    entries = get_archive().load_index()["entries"]
+    with _model_lock:
+        if _model is None or _model_size != len(entries):
+            _model = LengthModel(entries)
+            _model_size = len(entries)
+        return _model
@@ -5,8 +5,45 @@ Selects appropriate contemplative lens based on day's emotional tone
 
 import os
 import json
+import threading
 from src.debug_logger import logger
 
+# Parsed lens registry plus lowercased trigger lists, shared by every
+# LensSelector (one per MemoryManager) and reloaded when the file changes
+_index = {}
+_index_lock = threading.Lock()
+
+
+def load_lens_index(path):
+    """
+    Lenses and their lowercased use_when triggers for a registry file
+    
+    Returns:
+        (lenses, triggers) - triggers maps lens name to [(trigger, lowercased)]
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}, {}
+    
+    with _index_lock:
+        cached = _index.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+        
+        try:
+            with open(path, 'r') as f:
+                lenses = json.load(f)
+        except (OSError, ValueError):
+            lenses = {}
+        triggers = {
+            name: [(trigger, trigger.lower()) for trigger in data.get("use_when", [])]
+            for name, data in lenses.items()
+        }
+        _index[path] = (mtime, lenses, triggers)
+        return lenses, triggers
+
+
 class LensSelector:
     def __init__(self):
         self.lenses_path = os.path.join(
@@ -15,15 +52,11 @@ class LensSelector:
             "memory", 
             "mindful_lenses.json"
         )
-        self.lenses = self.load_lenses()
+        self.lenses, self.triggers = load_lens_index(self.lenses_path)
     
     def load_lenses(self):
         """Load mindful lenses registry"""
-        try:
-            with open(self.lenses_path, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+        return load_lens_index(self.lenses_path)[0]
     
     def select_lens(self, daily_input, override=None, roj_name=None):
         """
@@ -73,7 +106,7 @@ class LensSelector:
         # Check each lens's trigger words
         lens_scores = {}
         
-        for lens_name, lens_data in self.lenses.items():
+        for lens_name, triggers in self.triggers.items():
             if lens_name == "zoroastrian_roj":
                 # Skip calendar check in auto-selection unless Roj explicitly mentioned
                 continue
@@ -81,8 +114,8 @@ class LensSelector:
             score = 0
             matched_triggers = []
             
-            for trigger in lens_data.get("use_when", []):
-                if trigger.lower() in input_lower:
+            for trigger, trigger_lower in triggers:
+                if trigger_lower in input_lower:
                     score += 1
                     matched_triggers.append(trigger)
             
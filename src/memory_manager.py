@@ -1,16 +1,34 @@
 import os
 import json
-from datetime import datetime
+import hashlib
+import threading
 from src.debug_logger import logger
 from src.lens_selector import LensSelector
+from src.storage import get_storage
+from src.memory_store import get_memory_store, MEMORY_KEY, FIELDS
+from src.similarity import SimilarityIndex, cluster, DEFAULT_THRESHOLD
+
+# Fields checked for near-duplicates (voice examples are compared by content)
+DEDUP_FIELDS = ["voice_donts", "style_notes", "context_memories"]
+
+# Stable prompt prefixes by (base prompt hash, memory revision), shared across
+# MemoryManager instances so every request sends byte-identical prefix text
+_prefix_cache = {}
+_prefix_lock = threading.Lock()
+PREFIX_CACHE_SIZE = 8
 
 class MemoryManager:
-    def __init__(self):
+    def __init__(self, storage=None, store=None):
         self.memory_path = os.path.join(os.path.dirname(__file__), "..", "memory", "personality.json")
+        self.storage = storage or get_storage()
+        self.store = store or get_memory_store()
         self.lens_selector = LensSelector()
         self.budget_path = os.path.join(os.path.dirname(__file__), "..", "config", "prompt_budget.json")
         self.load_budget()
-        self.ensure_memory_file()
+        
+        # Near-duplicate indexes per field, valid while the store revision is unchanged
+        self._indexes = {}
+        self._index_revision = None
     
     def load_budget(self):
         """Load prompt budget configuration"""
@@ -22,29 +40,16 @@ class MemoryManager:
             self.budget = {
                 "target_chars": 10000,
                 "hard_limit": 12000,
-                "prune_order": ["voice_examples", "style_notes", "context_memories"]
+                "prune_order": ["voice_examples", "style_notes", "context_memories"],
+                "near_duplicate_threshold": DEFAULT_THRESHOLD
             }
     
-    def ensure_memory_file(self):
-        """Create memory file if it doesn't exist"""
-        if not os.path.exists(self.memory_path):
-            os.makedirs(os.path.dirname(self.memory_path), exist_ok=True)
-            default_memory = {
-                "voice_examples": [],
-                "voice_donts": [],
-                "style_notes": [],
-                "context_memories": [],
-                "current_projects": []
-            }
-            with open(self.memory_path, 'w') as f:
-                json.dump(default_memory, f, indent=2)
-    
     def load_memory(self):
-        """Load personality memory"""
+        """Load personality memory (personality.json shape)"""
         try:
-            with open(self.memory_path, 'r') as f:
-                return json.load(f)
-        except:
+            return self.store.export()
+        except Exception as e:
+            logger.log("MEMORY LOAD FAILED", str(e), "basic", force=True)
             return {
                 "voice_examples": [],
                 "voice_donts": [],
@@ -54,52 +59,142 @@ class MemoryManager:
             }
     
     def save_memory(self, memory_data):
-        """Save personality memory"""
+        """Save personality memory - only the items that changed are written"""
         try:
-            with open(self.memory_path, 'w') as f:
-                json.dump(memory_data, f, indent=2)
+            self.store.import_data(memory_data)
             return True
-        except:
+        except Exception as e:
+            logger.log("MEMORY SAVE FAILED", str(e), "basic", force=True)
             return False
     
+    def import_json(self, key=MEMORY_KEY):
+        """Load a personality.json file from storage into the memory store"""
+        return self.store.import_data(json.loads(self.storage.read(key)))
+    
+    def export_json(self, key=MEMORY_KEY):
+        """Write the memory store out as personality.json. Returns the location written."""
+        return self.storage.write(key, json.dumps(self.store.export(), indent=2))
+    
+    def get_items(self, field, offset=0, limit=None):
+        """One memory section with ids, timestamps and usage counts (paginated)"""
+        return self.store.items(field, offset=offset, limit=limit)
+    
+    def delete_item(self, field, item_id, if_revision=None):
+        """Remove one item by id (ConflictError if it changed since if_revision)"""
+        return self.store.delete_item(field, item_id, if_revision=if_revision)
+    
+    def update_item(self, field, item_id, value, if_revision=None):
+        """Change one item by id (ConflictError if it changed since if_revision)"""
+        return self.store.update_item(field, item_id, value, if_revision=if_revision)
+    
+    def changes_since(self, revision):
+        """Items changed after a store revision (see MemoryStore.changes_since)"""
+        return self.store.changes_since(revision)
+    
     def add_voice_example(self, title, content):
-        """Add a voice example"""
-        memory = self.load_memory()
-        memory["voice_examples"].append({
-            "title": title,
-            "content": content,
-            "added": datetime.now().isoformat()
-        })
-        return self.save_memory(memory)
+        """Add a voice example (returns the item id)"""
+        return self.add_item("voice_examples", {"title": title, "content": content})
+    
+    def _index(self, field):
+        """Similarity index for a memory field (rebuilt only if the store changed elsewhere)"""
+        revision = self.store.revision()
+        if revision != self._index_revision:
+            self._indexes = {}
+            self._index_revision = revision
+        
+        if field not in self._indexes:
+            threshold = self.budget.get("near_duplicate_threshold", DEFAULT_THRESHOLD)
+            texts = [item["text"] for item in self.store.items(field)]
+            self._indexes[field] = SimilarityIndex.from_items(texts, threshold)
+        return self._indexes[field]
+    
+    def add_item(self, field, value):
+        """
+        Add one item to a memory section
+        
+        Args:
+            field: Section name (voice_examples, style_notes, ...)
+            value: Text, or {"title", "content"} for voice examples
+        
+        Returns:
+            New item id, or None if the text near-duplicates an existing item
+        """
+        if field == "voice_examples":
+            return self.store.add_example(value.get("title", ""), value.get("content", ""))
+        
+        index = self._index(field)
+        duplicate = index.find_duplicate(value)
+        if duplicate is not None:
+            logger.log("NEAR DUPLICATE", f"Skipped {field} item: {value[:60]} (matches: {duplicate[:60]})", "verbose")
+            return None
+        
+        item_id = self.store.add_item(field, value)
+        index.add(value, value)
+        # Our own write - the other indexes are still accurate
+        self._index_revision = self.store.revision()
+        return item_id
     
     def add_style_note(self, note):
-        """Add a style note"""
-        memory = self.load_memory()
-        if note not in memory["style_notes"]:
-            memory["style_notes"].append(note)
-        return self.save_memory(memory)
+        """Add a style note (returns the item id, or None for a near-duplicate)"""
+        return self.add_item("style_notes", note)
     
     def add_voice_dont(self, phrase):
-        """Add a phrase to avoid"""
-        memory = self.load_memory()
-        if phrase not in memory["voice_donts"]:
-            memory["voice_donts"].append(phrase)
-        return self.save_memory(memory)
+        """Add a phrase to avoid (returns the item id, or None for a near-duplicate)"""
+        return self.add_item("voice_donts", phrase)
     
     def add_context_memory(self, memory_text):
-        """Add context memory"""
+        """Add context memory (returns the item id, or None for a near-duplicate)"""
+        return self.add_item("context_memories", memory_text)
+    
+    def compact(self, threshold=None, dry_run=False):
+        """
+        Collapse existing near-duplicates, keeping the earliest item of each cluster
+        
+        Args:
+            threshold: Similarity that counts as a duplicate (default: prompt budget config)
+            dry_run: Report clusters without saving
+        
+        Returns:
+            dict of field -> list of {"kept": item, "removed": [items]}
+        """
+        threshold = threshold or self.budget.get("near_duplicate_threshold", DEFAULT_THRESHOLD)
         memory = self.load_memory()
-        if memory_text not in memory["context_memories"]:
-            memory["context_memories"].append(memory_text)
-        return self.save_memory(memory)
+        report = {}
+        
+        fields = DEDUP_FIELDS + ["voice_examples"]
+        for field in fields:
+            items = memory.get(field, [])
+            texts = [item["content"] if isinstance(item, dict) else item for item in items]
+            labels = [item.get("title", "") if isinstance(item, dict) else item for item in items]
+            
+            keep = []
+            merged = []
+            for group in cluster(texts, threshold):
+                keep.append(group[0])
+                if len(group) > 1:
+                    merged.append({"kept": labels[group[0]], "removed": [labels[i] for i in group[1:]]})
+            
+            if merged:
+                report[field] = merged
+                memory[field] = [items[i] for i in sorted(keep)]
+                logger.log("COMPACTED", f"{field}: {len(items)} → {len(memory[field])}", "basic", force=True)
+        
+        if report and not dry_run:
+            self.save_memory(memory)
+        
+        return report
     
-    def get_enhanced_prompt(self, base_prompt):
-        """Enhance prompt with personality memory"""
+    def get_enhanced_prompt(self, base_prompt, record_usage=True):
+        """Enhance prompt with personality memory (record_usage=False leaves usage counts alone)"""
         if logger.is_enabled("log_memory_injection"):
             logger.log_section("MEMORY INJECTION START")
         
         memory = self.load_memory()
         
+        # Count the injection against every item that made it into the prompt
+        if record_usage:
+            self._record_usage([field for field in FIELDS if memory.get(field)])
+        
         enhanced = base_prompt + "\n\n"
         
         # Add voice examples
@@ -162,11 +257,55 @@ class MemoryManager:
                       "basic")
         
         # Check prompt budget
-        enhanced = self._check_budget(enhanced, memory)
+        enhanced = self._check_budget(enhanced, memory, base_prompt)
         
         return enhanced
     
-    def _check_budget(self, prompt, memory):
+    def record_prompt_usage(self):
+        """
+        Count one prompt injection for every memory item
+        
+        Prompt assembly (get_stable_prefix, get_prompt_parts) is side-effect
+        free so it can run ahead of time (/generate/prepare); generators call
+        this once a generation has actually completed.
+        """
+        self._record_usage([field for field in FIELDS if self.store.count(field)])
+    
+    def _record_usage(self, fields):
+        try:
+            self.store.record_usage(fields)
+        except Exception as e:
+            logger.log("USAGE COUNT FAILED", str(e), "verbose")
+    
+    def get_stable_prefix(self, base_prompt):
+        """
+        Base prompt plus personality memory, normalized to end in one blank line
+        
+        Byte-identical across requests until the prompt or the memory changes,
+        so providers can cache it (Anthropic cache_control, OpenAI/Groq
+        automatic prefix caching). Built once per (prompt, memory revision).
+        """
+        key = (hashlib.sha256(base_prompt.encode("utf-8")).hexdigest(), self.store.path, self.store.revision())
+        
+        with _prefix_lock:
+            cached = _prefix_cache.get(key)
+        
+        if cached is not None:
+            logger.log("PROMPT PREFIX", f"reused ({len(cached)} chars)", "verbose")
+            return cached
+        
+        # Usage is counted when a generation completes (record_prompt_usage)
+        prefix = self.get_enhanced_prompt(base_prompt, record_usage=False).rstrip() + "\n\n"
+        
+        # Auto-pruning may have saved memory - key on the revision the prefix reflects
+        key = key[:2] + (self.store.revision(),)
+        with _prefix_lock:
+            if len(_prefix_cache) >= PREFIX_CACHE_SIZE:
+                _prefix_cache.clear()
+            _prefix_cache[key] = prefix
+        return prefix
+    
+    def _check_budget(self, prompt, memory, base_prompt):
         """Check and enforce prompt budget"""
         prompt_length = len(prompt)
         target = self.budget.get("target_chars", 10000)
@@ -182,7 +321,7 @@ class MemoryManager:
             logger.log("ACTION", "Auto-pruning required", "basic", force=True)
             
             # Auto-prune
-            return self._auto_prune(prompt, memory, target)
+            return self._auto_prune(prompt, memory, target, base_prompt)
         
         else:
             # Warning only
@@ -191,7 +330,7 @@ class MemoryManager:
                       "basic")
             return prompt
     
-    def _auto_prune(self, prompt, memory, target):
+    def _auto_prune(self, prompt, memory, target, base_prompt):
         """Auto-prune memory to fit budget"""
         prune_order = self.budget.get("prune_order", ["voice_examples"])
         
@@ -204,21 +343,21 @@ class MemoryManager:
                 # Save pruned memory
                 self.save_memory(memory)
                 
-                # Regenerate prompt
-                return self.get_enhanced_prompt(prompt.split("\n\n")[0])  # Rebuild from base
+                # Regenerate prompt from the full base prompt (usage was already counted)
+                return self.get_enhanced_prompt(base_prompt, record_usage=False)
             
             elif category == "style_notes" and len(memory.get("style_notes", [])) > 5:
                 # Remove last style note
                 removed = memory["style_notes"].pop()
                 logger.log("PRUNED", f"Removed style note: {removed[:50]}...", "basic", force=True)
                 self.save_memory(memory)
-                return self.get_enhanced_prompt(prompt.split("\n\n")[0])
+                return self.get_enhanced_prompt(base_prompt, record_usage=False)
         
         # If still over budget, just warn
         logger.log("PRUNE WARNING", "Could not prune enough - manual review needed", "basic", force=True)
         return prompt
     
-    def get_enhanced_prompt_with_lens(self, base_prompt, daily_input, lens_override=None, roj_context=None, editing_instructions=None, parameters=None):
+    def get_enhanced_prompt_with_lens(self, base_prompt, daily_input, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, lens_selection=None):
         """
         Get enhanced prompt with lens-specific guidance and voice parameters
         
@@ -229,47 +368,65 @@ class MemoryManager:
             roj_context: Full Roj observance text for Zoroastrian calendar (optional)
             editing_instructions: Natural language editing instructions from user (optional)
             parameters: Generation parameters including voice controls (optional)
+            lens_selection: Result of lens_selector.select_lens() if the caller already ran it (optional)
         
         Returns:
             Enhanced prompt with lens guidance and parameter instructions
+            (the stable prefix followed by the per-request suffix)
+        """
+        prefix, suffix = self.get_prompt_parts(base_prompt, daily_input, lens_override, roj_context, editing_instructions, parameters, lens_selection)
+        return prefix + suffix
+    
+    def get_prompt_parts(self, base_prompt, daily_input, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, lens_selection=None):
         """
-        # Get base enhancement
-        enhanced = self.get_enhanced_prompt(base_prompt)
+        Same prompt as get_enhanced_prompt_with_lens, split for prefix caching
+        
+        Returns:
+            (prefix, suffix) - prefix is the base prompt plus memory (see
+            get_stable_prefix); suffix holds everything that varies per request,
+            from least to most likely to change: voice parameters, lens, Roj
+            context, editing instructions
+        """
+        prefix = self.get_stable_prefix(base_prompt)
+        sections = []
+        
+        # Add voice parameter guidance if provided
+        if parameters:
+            voice_params = self._build_voice_guidance(parameters)
+            if voice_params:
+                sections.append(f"=== VOICE PARAMETERS ===\n{voice_params}")
+                
+                if logger.is_enabled("log_prompt_assembly"):
+                    logger.log("VOICE PARAMS", f"Formality: {parameters.get('formality')}, Energy: {parameters.get('energy_level')}", "basic")
         
         # Select and add lens guidance (with optional override and roj support)
-        lens_name, lens_data, reason, roj_guidance = self.lens_selector.select_lens(daily_input, override=lens_override, roj_name=None)
+        if lens_selection is None:
+            lens_selection = self.lens_selector.select_lens(daily_input, override=lens_override, roj_name=None)
+        lens_name, lens_data, reason, roj_guidance = lens_selection
         
         if lens_data:
             lens_guidance = self.lens_selector.get_lens_guidance(lens_name, roj_guidance=roj_guidance)
-            enhanced += f"\n\n=== MINDFUL LENS FOR TODAY ===\n{lens_guidance}\n\n"
+            sections.append(f"=== MINDFUL LENS FOR TODAY ===\n{lens_guidance}")
             
             if logger.is_enabled("log_prompt_assembly"):
                 logger.log("LENS ADDED", f"{lens_name} - {reason}", "basic")
         
         # Add Roj context if provided (for Zoroastrian observances)
         if roj_context and lens_name == "zoroastrian_roj":
-            enhanced += f"\n\n=== ROJ OBSERVANCE FOR TODAY ===\n{roj_context}\n\nUse this Roj teaching as the foundation for the mindful moment. Reference it directly and connect it to what happened today.\n\n"
+            sections.append(f"=== ROJ OBSERVANCE FOR TODAY ===\n{roj_context}\n\nUse this Roj teaching as the foundation for the mindful moment. Reference it directly and connect it to what happened today.")
             
             if logger.is_enabled("log_prompt_assembly"):
                 logger.log("ROJ CONTEXT", f"Added {len(roj_context)} chars", "basic")
         
         # Add editing instructions if provided
         if editing_instructions:
-            enhanced += f"\n\n=== EDITING INSTRUCTIONS ===\nThe user has provided specific editing guidance:\n\n{editing_instructions}\n\nApply these instructions to the newsletter output. Follow them precisely while maintaining the overall voice and structure.\n\n"
+            sections.append(f"=== EDITING INSTRUCTIONS ===\nThe user has provided specific editing guidance:\n\n{editing_instructions}\n\nApply these instructions to the newsletter output. Follow them precisely while maintaining the overall voice and structure.")
             
             if logger.is_enabled("log_prompt_assembly"):
                 logger.log("EDITING INSTRUCTIONS", editing_instructions[:100], "basic")
         
-        # Add voice parameter guidance if provided
-        if parameters:
-            voice_params = self._build_voice_guidance(parameters)
-            if voice_params:
-                enhanced += f"\n\n=== VOICE PARAMETERS ===\n{voice_params}\n\n"
-                
-                if logger.is_enabled("log_prompt_assembly"):
-                    logger.log("VOICE PARAMS", f"Formality: {parameters.get('formality')}, Energy: {parameters.get('energy_level')}", "basic")
-        
-        return enhanced
+        suffix = "".join(section.strip() + "\n\n" for section in sections)
+        return prefix, suffix
     
     def _build_voice_guidance(self, parameters):
         """Build voice parameter guidance text"""
@@ -0,0 +1,515 @@
+"""
+Memory Store - Embedded SQLite schema for personality memory
+One table per memory section, with timestamps, usage counts and indexes, so
+adding or removing a single note is one small write instead of rewriting
+the whole personality.json
+
+memory/personality.json stays the interchange format: an empty store is
+seeded from it, and import_data()/export() convert between the two.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from src.storage import REPO_ROOT, get_storage
+from src.similarity import normalize
+from src.debug_logger import logger
+
+MEMORY_KEY = "memory/personality.json"
+
+LIST_FIELDS = ["voice_donts", "style_notes", "context_memories", "current_projects"]
+FIELDS = ["voice_examples"] + LIST_FIELDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS voice_examples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    extra TEXT,
+    position INTEGER NOT NULL,
+    added TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    usage_count INTEGER NOT NULL DEFAULT 0,
+    last_used TEXT,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_voice_examples_position ON voice_examples(position);
+
+CREATE TABLE IF NOT EXISTS current_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    revision INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    item_id INTEGER,
+    op TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_changes_revision ON changes(revision);
+"""
+
+LIST_TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    norm TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    added TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    usage_count INTEGER NOT NULL DEFAULT 0,
+    last_used TEXT,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_{table}_position ON {table}(position);
+CREATE INDEX IF NOT EXISTS idx_{table}_norm ON {table}(norm);
+"""
+
+EXAMPLE_KEYS = ("title", "content", "added")
+
+# Change log rows kept for /memory/changes - older clients get a full snapshot
+MAX_CHANGES = 2000
+
+
+class ConflictError(Exception):
+    """An If-Match revision didn't match the item's current revision"""
+
+    def __init__(self, field, item_id, current_revision):
+        super().__init__(f"{field} item {item_id} was changed (now revision {current_revision})")
+        self.field = field
+        self.item_id = item_id
+        self.current_revision = current_revision
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _check_field(field):
+    # Table names can't be bound as parameters - only ever use the known ones
+    if field not in FIELDS:
+        raise ValueError(f"Unknown memory field: {field}")
+
+
+class MemoryStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        with conn:
+            conn.executescript(SCHEMA)
+            for table in LIST_FIELDS:
+                conn.executescript(LIST_TABLE_SCHEMA.format(table=table))
+            # Stores created before per-item revisions existed
+            for table in FIELDS:
+                columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if "revision" not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        # One connection per thread, WAL so readers don't block the writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump_revision(self, conn):
+        """Start a new store revision (inside the caller's transaction) and return it"""
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0])
+
+    def _log_changes(self, conn, revision, changes):
+        """Record (field, item_id, op) tuples for /memory/changes and trim the log"""
+        conn.executemany(
+            "INSERT INTO changes (revision, field, item_id, op) VALUES (?, ?, ?, ?)",
+            [(revision, field, item_id, op) for field, item_id, op in changes]
+        )
+        conn.execute(
+            "DELETE FROM changes WHERE id <= (SELECT MAX(id) FROM changes) - ?", (MAX_CHANGES,)
+        )
+
+    def revision(self):
+        """Counter bumped by every write - cheap cache validator"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row["value"]) if row else 0
+
+    def is_empty(self):
+        conn = self._connect()
+        return all(
+            conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+            for table in FIELDS + ["current_state"]
+        )
+
+    # --- Reads ---------------------------------------------------------------
+
+    def _row_to_item(self, field, row):
+        item = {
+            "id": row["id"],
+            "position": row["position"],
+            "added": row["added"],
+            "updated": row["updated"],
+            "usage_count": row["usage_count"],
+            "last_used": row["last_used"],
+            "revision": row["revision"]
+        }
+        if field == "voice_examples":
+            item.update(json.loads(row["extra"]) if row["extra"] else {})
+            item["title"] = row["title"]
+            item["content"] = row["content"]
+        else:
+            item["text"] = row["text"]
+        return item
+
+    def items(self, field, offset=0, limit=None):
+        """
+        Rows of one section, in order, with their metadata
+
+        Returns:
+            list of dicts (id, position, added, updated, usage_count, last_used, revision plus
+            title/content for voice examples or text for list sections)
+        """
+        _check_field(field)
+        rows = self._connect().execute(
+            f"SELECT * FROM {field} ORDER BY position, id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset)
+        ).fetchall()
+        return [self._row_to_item(field, row) for row in rows]
+
+    def count(self, field):
+        _check_field(field)
+        return self._connect().execute(f"SELECT COUNT(*) FROM {field}").fetchone()[0]
+
+    def get_item(self, field, item_id):
+        _check_field(field)
+        row = self._connect().execute(f"SELECT * FROM {field} WHERE id = ?", (item_id,)).fetchone()
+        return self._row_to_item(field, row) if row else None
+
+    def contains(self, field, text):
+        """Exact (normalized) match in a list section - index lookup, no scan"""
+        _check_field(field)
+        row = self._connect().execute(f"SELECT 1 FROM {field} WHERE norm = ? LIMIT 1", (normalize(text),)).fetchone()
+        return row is not None
+
+    def get_state(self):
+        rows = self._connect().execute("SELECT key, value FROM current_state").fetchall()
+        return {row["key"]: json.loads(row["value"]) for row in rows}
+
+    def export(self):
+        """Whole memory in the personality.json shape"""
+        memory = {"voice_examples": []}
+        for row in self._connect().execute("SELECT * FROM voice_examples ORDER BY position, id"):
+            example = json.loads(row["extra"]) if row["extra"] else {}
+            example.update({"title": row["title"], "content": row["content"], "added": row["added"]})
+            memory["voice_examples"].append(example)
+
+        for field in LIST_FIELDS:
+            memory[field] = [row["text"] for row in self._connect().execute(f"SELECT text FROM {field} ORDER BY position, id")]
+
+        state = self.get_state()
+        if state:
+            memory["current_state"] = state
+
+        extra = self._connect().execute("SELECT value FROM meta WHERE key = 'extra'").fetchone()
+        if extra:
+            memory.update(json.loads(extra["value"]))
+        return memory
+
+    # --- Writes --------------------------------------------------------------
+
+    def _next_position(self, conn, field):
+        return conn.execute(f"SELECT COALESCE(MAX(position), 0) + 1 FROM {field}").fetchone()[0]
+
+    def add_item(self, field, text):
+        """Append one note to a list section. Returns the new row id."""
+        _check_field(field)
+        now = _now()
+        with self._write_lock, self._connect() as conn:
+            revision = self._bump_revision(conn)
+            cursor = conn.execute(
+                f"INSERT INTO {field} (text, norm, position, added, updated, revision) VALUES (?, ?, ?, ?, ?, ?)",
+                (text, normalize(text), self._next_position(conn, field), now, now, revision)
+            )
+            self._log_changes(conn, revision, [(field, cursor.lastrowid, "upsert")])
+        return cursor.lastrowid
+
+    def add_example(self, title, content, added=None, **extra):
+        """Append one voice example. Returns the new row id."""
+        now = _now()
+        with self._write_lock, self._connect() as conn:
+            revision = self._bump_revision(conn)
+            cursor = conn.execute(
+                "INSERT INTO voice_examples (title, content, extra, position, added, updated, revision) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (title, content, json.dumps(extra) if extra else None, self._next_position(conn, "voice_examples"), added or now, now, revision)
+            )
+            self._log_changes(conn, revision, [("voice_examples", cursor.lastrowid, "upsert")])
+        return cursor.lastrowid
+
+    def _check_revision(self, conn, field, item_id, if_revision):
+        """Current row for item_id (None if missing); ConflictError if if_revision is stale"""
+        row = conn.execute(f"SELECT * FROM {field} WHERE id = ?", (item_id,)).fetchone()
+        if row is not None and if_revision is not None and row["revision"] != int(if_revision):
+            raise ConflictError(field, item_id, row["revision"])
+        return row
+
+    def update_item(self, field, item_id, value, if_revision=None):
+        """
+        Change one item in place (keeps its id, position and usage count)
+
+        Args:
+            value: New text for list sections, or a dict of title/content/... for voice examples
+            if_revision: Only update if the item is still at this revision (optimistic concurrency)
+
+        Returns:
+            True if the item existed (ConflictError if if_revision didn't match)
+        """
+        _check_field(field)
+        now = _now()
+        with self._write_lock, self._connect() as conn:
+            row = self._check_revision(conn, field, item_id, if_revision)
+            if row is None:
+                return False
+
+            revision = self._bump_revision(conn)
+            if field == "voice_examples":
+                extra = json.loads(row["extra"]) if row["extra"] else {}
+                extra.update({k: v for k, v in value.items() if k not in EXAMPLE_KEYS + ("id", "revision")})
+                conn.execute(
+                    "UPDATE voice_examples SET title = ?, content = ?, extra = ?, updated = ?, revision = ? WHERE id = ?",
+                    (value.get("title", row["title"]), value.get("content", row["content"]), json.dumps(extra) if extra else None, now, revision, item_id)
+                )
+            else:
+                conn.execute(
+                    f"UPDATE {field} SET text = ?, norm = ?, updated = ?, revision = ? WHERE id = ?",
+                    (value, normalize(value), now, revision, item_id)
+                )
+            self._log_changes(conn, revision, [(field, item_id, "upsert")])
+        return True
+
+    def delete_item(self, field, item_id, if_revision=None):
+        """Remove one item by id. Returns True if it existed (ConflictError if if_revision didn't match)."""
+        _check_field(field)
+        with self._write_lock, self._connect() as conn:
+            if self._check_revision(conn, field, item_id, if_revision) is None:
+                return False
+
+            revision = self._bump_revision(conn)
+            conn.execute(f"DELETE FROM {field} WHERE id = ?", (item_id,))
+            self._log_changes(conn, revision, [(field, item_id, "delete")])
+        return True
+
+    def set_state(self, state):
+        """Replace current_state"""
+        now = _now()
+        with self._write_lock, self._connect() as conn:
+            revision = self._bump_revision(conn)
+            conn.execute("DELETE FROM current_state")
+            conn.executemany(
+                "INSERT INTO current_state (key, value, updated) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), now) for key, value in (state or {}).items()]
+            )
+            self._log_changes(conn, revision, [("current_state", None, "replace")])
+
+    def record_usage(self, fields):
+        """Count one prompt injection for every item in the given sections"""
+        now = _now()
+        with self._write_lock, self._connect() as conn:
+            for field in fields:
+                _check_field(field)
+                conn.execute(f"UPDATE {field} SET usage_count = usage_count + 1, last_used = ?", (now,))
+
+    def import_data(self, memory):
+        """
+        Make the store match a personality.json-shaped dict
+
+        Items that are unchanged keep their id, timestamps and usage count;
+        only the differences are written, and the revision only moves when
+        something actually changed (so a no-op save keeps caches valid).
+
+        Returns:
+            dict with added and removed counts
+        """
+        now = _now()
+        result = {"added": 0, "removed": 0}
+
+        with self._write_lock, self._connect() as conn:
+            bumped = []
+
+            def revision():
+                # Bumped on the first actual write
+                if not bumped:
+                    bumped.append(self._bump_revision(conn))
+                return bumped[0]
+
+            changes = []
+
+            for field in FIELDS:
+                if field == "voice_examples":
+                    rows = conn.execute("SELECT id, title, content, extra, position FROM voice_examples").fetchall()
+                    key_of_row = lambda row: (row["title"], row["content"], row["extra"] or "")
+                    wanted = []
+                    for example in memory.get(field, []) or []:
+                        extra = {k: v for k, v in example.items() if k not in EXAMPLE_KEYS + ("id", "revision")}
+                        wanted.append(((example.get("title", ""), example.get("content", ""), json.dumps(extra) if extra else ""), example))
+                else:
+                    rows = conn.execute(f"SELECT id, text, position FROM {field}").fetchall()
+                    key_of_row = lambda row: row["text"]
+                    wanted = [(text, text) for text in memory.get(field, []) or [] if isinstance(text, str)]
+
+                # Match wanted items to existing rows (duplicates match one row each)
+                available = {}
+                positions = {}
+                for row in rows:
+                    available.setdefault(key_of_row(row), []).append(row["id"])
+                    positions[row["id"]] = row["position"]
+
+                for position, (key, value) in enumerate(wanted, 1):
+                    ids = available.get(key)
+                    if ids:
+                        item_id = ids.pop(0)
+                        if positions[item_id] != position:
+                            conn.execute(f"UPDATE {field} SET position = ?, revision = ? WHERE id = ?", (position, revision(), item_id))
+                            changes.append((field, item_id, "upsert"))
+                        continue
+
+                    if field == "voice_examples":
+                        title, content, extra = key
+                        cursor = conn.execute(
+                            "INSERT INTO voice_examples (title, content, extra, position, added, updated, revision) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (title, content, extra or None, position, value.get("added") or now, now, revision())
+                        )
+                    else:
+                        cursor = conn.execute(
+                            f"INSERT INTO {field} (text, norm, position, added, updated, revision) VALUES (?, ?, ?, ?, ?, ?)",
+                            (value, normalize(value), position, now, now, revision())
+                        )
+                    changes.append((field, cursor.lastrowid, "upsert"))
+                    result["added"] += 1
+
+                stale = [item_id for ids in available.values() for item_id in ids]
+                if stale:
+                    revision()
+                conn.executemany(f"DELETE FROM {field} WHERE id = ?", [(item_id,) for item_id in stale])
+                changes.extend((field, item_id, "delete") for item_id in stale)
+                result["removed"] += len(stale)
+
+            state = memory.get("current_state") or {}
+            if state != self.get_state():
+                conn.execute("DELETE FROM current_state")
+                conn.executemany(
+                    "INSERT INTO current_state (key, value, updated) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value), now) for key, value in state.items()]
+                )
+                changes.append(("current_state", None, "replace"))
+                revision()
+
+            extra = json.dumps({k: v for k, v in memory.items() if k not in FIELDS + ["current_state"]})
+            stored = conn.execute("SELECT value FROM meta WHERE key = 'extra'").fetchone()
+            if stored is None or stored["value"] != extra:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('extra', ?)", (extra,))
+                revision()
+
+            if bumped:
+                self._log_changes(conn, bumped[0], changes)
+
+        return result
+
+    def changes_since(self, since):
+        """
+        What changed after revision `since`
+
+        Returns:
+            dict with "revision" (current) and either "full": True plus the
+            complete item lists (when the log no longer reaches back that far),
+            or "changes": {field: {"upsert": [items], "delete": [ids]}} and
+            "current_state" if it was replaced
+        """
+        conn = self._connect()
+        # Read the revision first: a write landing mid-read just shows up again next poll
+        revision = self.revision()
+        oldest = conn.execute("SELECT MIN(revision) FROM changes").fetchone()[0]
+
+        # The oldest logged revision may have been trimmed part-way, so only trust the ones after it
+        if oldest is None:
+            log_covers_since = since == revision
+        else:
+            log_covers_since = oldest <= since
+        if since <= 0 or since > revision or not log_covers_since:
+            return {
+                "revision": revision,
+                "full": True,
+                "items": {field: self.items(field) for field in FIELDS},
+                "current_state": self.get_state()
+            }
+
+        rows = conn.execute(
+            "SELECT field, item_id, op FROM changes WHERE revision > ? ORDER BY id", (since,)
+        ).fetchall()
+
+        latest = {}
+        for row in rows:
+            latest[(row["field"], row["item_id"])] = row["op"]
+
+        result = {"revision": revision, "full": False, "changes": {}}
+        for (field, item_id), op in latest.items():
+            if field == "current_state":
+                result["current_state"] = self.get_state()
+                continue
+            bucket = result["changes"].setdefault(field, {"upsert": [], "delete": []})
+            item = self.get_item(field, item_id) if op == "upsert" else None
+            if item is None:
+                bucket["delete"].append(item_id)
+            else:
+                bucket["upsert"].append(item)
+        return result
+
+
+def default_path():
+    """ZABAL_MEMORY_DB, else memory/personality.db (in /tmp/zabal on read-only hosts)"""
+    if os.getenv("ZABAL_MEMORY_DB"):
+        return os.getenv("ZABAL_MEMORY_DB")
+    if os.access(REPO_ROOT, os.W_OK):
+        return os.path.join(REPO_ROOT, "memory", "personality.db")
+    return os.path.join(os.getenv("ZABAL_TMP_DIR", os.path.join("/tmp", "zabal")), "memory", "personality.db")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store():
+    """Shared memory store, seeded from personality.json the first time it's opened empty"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = MemoryStore(default_path())
+            if store.is_empty():
+                try:
+                    seed = json.loads(get_storage().read(MEMORY_KEY))
+                    store.import_data(seed)
+                    logger.log("MEMORY STORE", f"Seeded {store.path} from {MEMORY_KEY}", "basic", force=True)
+                except (KeyError, ValueError):
+                    pass
+            _store = store
+        return _store
@@ -1,60 +1,74 @@
 import os
 from datetime import datetime
-from openai import OpenAI
 from dotenv import load_dotenv
+from src.providers import get_openai_client, get_anthropic_client, cached_system, usage_tokens
+from src.archive import get_archive
+from src.prompt_registry import get_prompt_registry
 
 load_dotenv()
 
-try:
-    from anthropic import Anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
-
 class NewsletterGenerator:
     def __init__(self):
         use_ollama = os.getenv("USE_OLLAMA", "false").lower() == "true"
         use_claude = os.getenv("USE_CLAUDE", "false").lower() == "true"
         use_openrouter = os.getenv("USE_OPENROUTER", "false").lower() == "true"
+        self.stream_usage = True
         
         if use_ollama:
             # Ollama uses OpenAI-compatible API
-            self.client = OpenAI(
+            self.client = get_openai_client(
                 api_key="ollama",  # Ollama doesn't need a real API key
                 base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
             )
             self.model = os.getenv("OLLAMA_MODEL", "llama3.2")
             self.provider = "openai"
+            # Older Ollama builds reject stream_options, so streamed usage is skipped there
+            self.stream_usage = False
         elif use_claude:
-            if not ANTHROPIC_AVAILABLE:
-                raise ImportError("Anthropic package not installed. Run: pip install anthropic")
-            self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            self.client = get_anthropic_client(api_key=os.getenv("ANTHROPIC_API_KEY"))
             self.model = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
             self.provider = "claude"
         elif use_openrouter:
-            self.client = OpenAI(
+            self.client = get_openai_client(
                 api_key=os.getenv("OPENROUTER_API_KEY"),
                 base_url="https://openrouter.ai/api/v1"
             )
             self.model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.3-70b-instruct:free")
             self.provider = "openai"
         else:
-            self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.client = get_openai_client(api_key=os.getenv("OPENAI_API_KEY"))
             self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
             self.provider = "openai"
         
         self.prompt_path = os.path.join(os.path.dirname(__file__), "..", "prompts", "newsletter_prompt.txt")
+        self.prompts = get_prompt_registry()
+        self.template_version = None
+        # Token counts of the last generate() call (prompt/completion/cached)
+        self.last_usage = None
         
     def load_prompt(self):
-        with open(self.prompt_path, 'r') as f:
-            return f.read()
+        template = self.prompts.get("newsletter")
+        # Remembered so save_* can record which prompt version produced the output
+        self.template_version = template.version
+        return template.text
     
     def get_day_of_year(self):
         today = datetime.now()
         day_of_year = today.timetuple().tm_yday
         return day_of_year
     
-    def generate(self, daily_input, badass_quote=None):
+    def generate(self, daily_input, badass_quote=None, on_token=None):
+        """
+        Generate the newsletter
+
+        Args:
+            daily_input: The day's reflection
+            badass_quote: Optional You Are a Badass quote
+            on_token: Optional callback receiving text chunks as they stream in
+
+        Returns:
+            Full newsletter text
+        """
         system_prompt = self.load_prompt()
         
         today = datetime.now()
@@ -69,16 +83,23 @@ class NewsletterGenerator:
         
         user_message += "Generate today's Year of the ZABAL newsletter entry following the exact format and voice guidelines."
         
+        if on_token is not None:
+            return self._generate_stream(system_prompt, user_message, on_token)
+        
+        # The system prompt is the same on every call (the date lives in the user
+        # message), so it's marked as a cache breakpoint for Claude; OpenAI caches
+        # repeated prefixes automatically
         if self.provider == "claude":
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=4096,
-                system=system_prompt,
+                system=cached_system(system_prompt),
                 messages=[
                     {"role": "user", "content": user_message}
                 ],
                 temperature=0.7,
             )
+            self.last_usage = usage_tokens(response.usage)
             return response.content[0].text
         else:
             response = self.client.chat.completions.create(
@@ -89,12 +110,58 @@ class NewsletterGenerator:
                 ],
                 temperature=0.7,
             )
+            self.last_usage = usage_tokens(response.usage)
             return response.choices[0].message.content
     
+    def _generate_stream(self, system_prompt, user_message, on_token):
+        """Stream the completion, forwarding each chunk to on_token"""
+        parts = []
+        
+        if self.provider == "claude":
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=4096,
+                system=cached_system(system_prompt),
+                messages=[
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.7,
+            ) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    on_token(text)
+                self.last_usage = usage_tokens(stream.get_final_message().usage)
+        else:
+            options = {"stream_options": {"include_usage": True}} if self.stream_usage else {}
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.7,
+                stream=True,
+                **options
+            )
+            self.last_usage = None
+            for chunk in stream:
+                # With include_usage the final chunk carries usage and no choices
+                if getattr(chunk, "usage", None):
+                    self.last_usage = usage_tokens(chunk.usage)
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_token(text)
+        
+        return "".join(parts)
+    
     def save_newsletter(self, content, filename=None):
         if filename is None:
-            today = datetime.now()
-            filename = f"newsletter_{today.strftime('%Y%m%d')}.txt"
+            # Regular saves go to the deduplicated archive
+            entry = get_archive().put("newsletter", content, template_version=self.template_version)
+            return f"archive:{entry['id']}"
         
         output_dir = os.path.join(os.path.dirname(__file__), "..", "output", "newsletters")
         os.makedirs(output_dir, exist_ok=True)
@@ -1,40 +1,436 @@
 import os
+import time
+import asyncio
 from datetime import datetime
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from src.providers import get_openai_client, get_async_openai_client, GROQ_BASE_URL, ollama_base_url, usage_tokens
 from src.memory_manager import MemoryManager
 from src.debug_logger import logger
-from src.constitution_checker import validate_output
+from src.constitution_checker import validate_output, get_checker
+from src.repair import BanRepairer, tokens_saved, estimate_regeneration
+from src.generation_pool import estimate_tokens
+from src.archive import get_archive
+from src.prompt_registry import get_prompt_registry
+from src.timing import StageTimer
+from src.single_flight import fingerprint
+from src.candidates import score_candidates
+from src.length_model import get_length_model, DEFAULT_MAX_TOKENS
+from src.prepared import get_prepared_requests, PREPARED_TTL_SECONDS
+from src.summarizer import compress, compression_stats
+from src.revision import REVISE_INSTRUCTIONS, number_paragraphs, paragraphs, parse_edits, apply_edits
+
+# Edit pass the large model runs over a small-model draft (speculative mode)
+REFINE_INSTRUCTIONS = """A first draft of today's newsletter is included below the daily input. Edit it into the final newsletter:
+- Keep what is accurate and already sounds like Zaal; rewrite anything generic, hyped or off-voice
+- Fix the structure, header, Mindful Moment and signature so they follow the format exactly
+- Remove anything not supported by the daily input
+Return only the finished newsletter."""
+
+# A draft that takes longer than this isn't worth waiting for - go straight to the large model
+DRAFT_TIMEOUT_SECONDS = 30
+
+# Ban repair fallback: rewrite one sentence instead of regenerating the issue
+SENTENCE_REWRITE_PROMPT = """Rewrite the sentence you are given so it no longer uses the listed phrases (or any form of them).
+Keep its meaning, tone and length. Calm, grounded, no hype.
+Return only the rewritten sentence."""
+
+# Output budget for a revision's edit list (a full issue gets 2000)
+REVISE_MAX_TOKENS = 800
+
+# Upper bound for candidates=k (each candidate is a full completion)
+MAX_CANDIDATES = 5
 
 class NewsletterGenerator:
     def __init__(self):
         # Hardcoded Groq configuration - completely free, no API key needed for basic use
         # Using Groq's free tier: 1000 requests/day, 6000 tokens/minute
-        self.client = OpenAI(
-            api_key=os.getenv("GROQ_API_KEY", "gsk_demo_key_placeholder"),  # Will use env var or placeholder
-            base_url="https://api.groq.com/openai/v1"
-        )
+        self.api_key = os.getenv("GROQ_API_KEY", "gsk_demo_key_placeholder")  # Will use env var or placeholder
+        self.client = get_openai_client(api_key=self.api_key, base_url=GROQ_BASE_URL)
         # Using Llama 3.3 70B - excellent quality, completely free
         self.model = "llama-3.3-70b-versatile"
         self.provider = "groq"
+        # Groq only accepts n=1, so multiple candidates are concurrent calls
+        self.supports_n = False
+        
+        # Small local model for speculative drafts (Ollama, OpenAI-compatible API)
+        self.draft_model = os.getenv("DRAFT_MODEL", os.getenv("OLLAMA_MODEL", "llama3.2"))
         
         self.prompt_path = os.path.join(os.path.dirname(__file__), "..", "prompts", "newsletter_prompt.txt")
+        self.prompts = get_prompt_registry()
         self.memory_manager = MemoryManager()
-        
+    
+    @property
+    def async_client(self):
+        """AsyncOpenAI client for the async serving mode (asgi_app.py)"""
+        return get_async_openai_client(api_key=self.api_key, base_url=GROQ_BASE_URL)
+    
     def load_prompt(self):
         """Load base prompt and enhance with personality memory (legacy method)"""
-        with open(self.prompt_path, 'r') as f:
-            base_prompt = f.read()
+        base_prompt = self.prompts.get("newsletter").text
         return self.memory_manager.get_enhanced_prompt(base_prompt)
     
-    def calculate_day_number(self):
+    def calculate_day_number(self, date=None):
         start_date = datetime(2025, 1, 1)
-        today = datetime.now()
+        today = date or datetime.now()
         delta = today - start_date
         return delta.days + 1
     
-    def generate_newsletter(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None):
-        day_num = self.calculate_day_number()
-        today_str = datetime.now().strftime('%B %d, %Y')
+    def fingerprint(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, date=None, mode="newsletter", candidates=1):
+        """Key identifying one generation request - identical keys can share a single LLM call"""
+        return fingerprint(
+            mode=mode,
+            model=self.model,
+            draft_model=self.draft_model if mode == "speculative" else None,
+            prompt=self.prompts.get("newsletter").version,
+            memory=self.memory_manager.store.revision(),
+            day=(date or datetime.now()).strftime('%Y-%m-%d'),
+            daily_input=daily_input,
+            badass_quote=badass_quote,
+            lens_override=lens_override,
+            roj_context=roj_context,
+            editing_instructions=editing_instructions,
+            parameters=parameters,
+            candidates=candidates
+        )
+    
+    def revision_fingerprint(self, previous, instructions, daily_input=None, parameters=None, date=None):
+        """fingerprint() for revise()"""
+        return fingerprint(
+            mode="revise",
+            model=self.model,
+            prompt=self.prompts.get("newsletter").version,
+            memory=self.memory_manager.store.revision(),
+            day=(date or datetime.now()).strftime('%Y-%m-%d'),
+            previous=previous,
+            instructions=instructions,
+            daily_input=daily_input,
+            parameters=parameters
+        )
+    
+    def prepare(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None):
+        """
+        Select the lens and assemble the prompt ahead of generation
+        
+        Called while the daily input is being typed; the built request is kept
+        under a short-lived token (src/prepared.py) that generate_newsletter()
+        can reuse, leaving only the LLM call for when Generate is clicked.
+        
+        Returns:
+            dict with token, expires_in, lens, lens_reason, prompt_tokens, max_tokens
+            and compression (None unless an input was over the compression threshold)
+        """
+        request = self._build_request(daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters)
+        key = self.fingerprint(daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, mode="prepare")
+        lens, _, reason, _ = request['lens_selection']
+        return {
+            'token': get_prepared_requests().put(key, request),
+            'expires_in': PREPARED_TTL_SECONDS,
+            'lens': lens,
+            'lens_reason': reason,
+            'prompt_tokens': estimate_tokens(request['system_prompt']) + estimate_tokens(request['user_message']),
+            'max_tokens': request['max_tokens'],
+            'compression': compression_stats(request['compression']) or None
+        }
+    
+    def _prepared_request(self, prepared, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, date=None):
+        """The request prepare() built for these inputs, or a freshly built one"""
+        if prepared and date is None:
+            key = self.fingerprint(daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, mode="prepare")
+            request = get_prepared_requests().get(prepared, key)
+            if request is not None:
+                logger.log("PREPARED", "Reusing the prompt assembled while typing", "verbose")
+                return request
+        return self._build_request(daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, date)
+    
+    def generate_newsletter(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, date=None, template=None, archive=True, candidates=1, prepared=None):
+        # date lets backfills generate past issues; defaults to today
+        # template (a PromptTemplate) and archive=False let prompt evaluations try unsaved prompts
+        # candidates=k generates k completions and keeps the best-scoring one (see _generate_candidates)
+        # prepared is a prepare() token; it's used only if the inputs still match
+        if template is None:
+            request = self._prepared_request(prepared, daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, date)
+        else:
+            request = self._build_request(daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, date, template)
+        
+        try:
+            if candidates > 1:
+                return self._generate_candidates(request, min(candidates, MAX_CANDIDATES), archive)
+            
+            response = self._complete(request["system_prompt"], request["user_message"], request["parameters"], max_tokens=request["max_tokens"])
+            newsletter = self._newsletter_text(response.choices[0])
+            
+            return self._finish(newsletter, request, self._usage(response), archive)
+        
+        except Exception as e:
+            raise Exception(f"Error generating newsletter: {str(e)}") from e
+    
+    def generate_speculative(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, date=None, on_draft=None, prepared=None):
+        """
+        Two-tier generation: a fast local draft, then a large-model edit pass
+
+        The small model (Ollama) writes a draft from the same prompt; the large
+        model then refines it with REFINE_INSTRUCTIONS added as editing guidance.
+        If the draft tier fails, the large model generates from scratch.
+
+        Args:
+            on_draft: Optional callback(draft_text, seconds) as soon as the draft is ready
+            prepared: Optional prepare() token
+
+        Returns:
+            Same dict as generate_newsletter() plus 'draft' and per-tier 'timings'
+        """
+        request = self._prepared_request(prepared, daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, date)
+        timer = StageTimer()
+        
+        draft = None
+        draft_error = None
+        start = time.perf_counter()
+        try:
+            draft = self._draft(request)
+        except Exception as e:
+            draft_error = str(e)
+            logger.log("DRAFT FAILED", f"{self.draft_model}: {e} - generating with {self.model} only", "basic", force=True)
+        timer.record("draft", start, time.perf_counter())
+        
+        if draft and on_draft is not None:
+            on_draft(draft, timer.stages[-1]["seconds"])
+        
+        try:
+            with timer.stage("refine"):
+                system_prompt, user_message = self._refine_messages(request, draft)
+                response = self._complete(system_prompt, user_message, request["parameters"], max_tokens=request["max_tokens"])
+                newsletter = self._newsletter_text(response.choices[0])
+            
+            result = self._finish(newsletter, request, self._usage(response), extra_params={'draft_model': self.draft_model if draft else None})
+        except Exception as e:
+            raise Exception(f"Error generating newsletter: {str(e)}") from e
+        
+        return self._speculative_result(result, draft, draft_error, timer)
+    
+    async def agenerate_newsletter(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, date=None, candidates=1, prepared=None):
+        """generate_newsletter() on the async client - the event loop stays free while the model writes"""
+        request = await asyncio.to_thread(self._prepared_request, prepared, daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, date)
+        
+        try:
+            if candidates > 1:
+                args = self._completion_args(request["system_prompt"], request["user_message"], request["parameters"], request["max_tokens"])
+                responses = await asyncio.gather(*[
+                    self.async_client.chat.completions.create(**args)
+                    for _ in range(min(candidates, MAX_CANDIDATES))
+                ])
+                texts = [self._newsletter_text(response.choices[0]) for response in responses]
+                return await asyncio.to_thread(self._pick_candidate, texts, request, self._total_usage(responses))
+            
+            response = await self.async_client.chat.completions.create(
+                **self._completion_args(request["system_prompt"], request["user_message"], request["parameters"], request["max_tokens"])
+            )
+            newsletter = self._newsletter_text(response.choices[0])
+            
+            return await asyncio.to_thread(self._finish, newsletter, request, self._usage(response))
+        
+        except Exception as e:
+            raise Exception(f"Error generating newsletter: {str(e)}") from e
+    
+    async def agenerate_speculative(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, date=None, on_draft=None, prepared=None):
+        """generate_speculative() on the async clients"""
+        request = await asyncio.to_thread(self._prepared_request, prepared, daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters, date)
+        timer = StageTimer()
+        
+        draft = None
+        draft_error = None
+        start = time.perf_counter()
+        try:
+            client = get_async_openai_client(api_key="ollama", base_url=ollama_base_url())
+            response = await client.with_options(timeout=DRAFT_TIMEOUT_SECONDS, max_retries=0).chat.completions.create(
+                **self._draft_args(request)
+            )
+            draft = (response.choices[0].message.content or "").strip() or None
+        except Exception as e:
+            draft_error = str(e)
+            logger.log("DRAFT FAILED", f"{self.draft_model}: {e} - generating with {self.model} only", "basic", force=True)
+        timer.record("draft", start, time.perf_counter())
+        
+        if draft and on_draft is not None:
+            on_draft(draft, timer.stages[-1]["seconds"])
+        
+        try:
+            with timer.stage("refine"):
+                system_prompt, user_message = await asyncio.to_thread(self._refine_messages, request, draft)
+                response = await self.async_client.chat.completions.create(
+                    **self._completion_args(system_prompt, user_message, request["parameters"], request["max_tokens"])
+                )
+                newsletter = self._newsletter_text(response.choices[0])
+            
+            result = await asyncio.to_thread(self._finish, newsletter, request, self._usage(response), extra_params={'draft_model': self.draft_model if draft else None})
+        except Exception as e:
+            raise Exception(f"Error generating newsletter: {str(e)}") from e
+        
+        return self._speculative_result(result, draft, draft_error, timer)
+    
+    def revise(self, previous, instructions, daily_input=None, parameters=None, date=None, archive=True):
+        """
+        Edit an existing newsletter instead of regenerating it
+        
+        The model returns paragraph-level edits (src/revision.py) that are
+        applied locally, so a small tweak costs a few hundred output tokens
+        and the paragraphs it doesn't mention are kept exactly.
+        
+        Args:
+            previous: The newsletter to revise
+            instructions: What to change ("shorten the second paragraph")
+            daily_input: The issue's daily input, if known (lens selection and archive)
+        """
+        request = self._revise_request(previous, instructions, daily_input, parameters, date)
+        
+        try:
+            response = self.client.chat.completions.create(**self._revise_args(request))
+            return self._finish_revision(previous, request, response, archive)
+        
+        except Exception as e:
+            raise Exception(f"Error revising newsletter: {str(e)}") from e
+    
+    async def arevise(self, previous, instructions, daily_input=None, parameters=None, date=None, archive=True):
+        """revise() on AsyncOpenAI (async serving mode)"""
+        request = await asyncio.to_thread(self._revise_request, previous, instructions, daily_input, parameters, date)
+        
+        try:
+            response = await self.async_client.chat.completions.create(**self._revise_args(request))
+            return await asyncio.to_thread(self._finish_revision, previous, request, response, archive)
+        
+        except Exception as e:
+            raise Exception(f"Error revising newsletter: {str(e)}") from e
+    
+    def _revise_request(self, previous, instructions, daily_input, parameters, date):
+        # Same system prompt as generation (its cached prefix carries the voice),
+        # with the revision format appended. The newsletter only stands in for
+        # the daily input in lens selection - nothing is compressed or archived as input
+        request = self._build_request(daily_input or '', parameters=parameters, date=date, compress_inputs=False, lens_input=previous)
+        request['editing_instructions'] = instructions
+        request['previous'] = previous
+        request['revise_message'] = f"""Requested changes:
+{instructions}
+
+Newsletter:
+{number_paragraphs(previous)}"""
+        return request
+    
+    def _revise_args(self, request):
+        if logger.is_enabled("log_llm_requests"):
+            logger.log_section("LLM REQUEST")
+            logger.log("MODEL", f"{self.model} (revision)", "basic")
+            logger.log("USER MESSAGE", request['revise_message'], "verbose")
+        
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": f"{request['system_prompt']}\n\n{REVISE_INSTRUCTIONS}"},
+                {"role": "user", "content": request['revise_message']}
+            ],
+            'temperature': min(request['parameters'].get('temperature', 0.7), 0.5),
+            'max_tokens': REVISE_MAX_TOKENS,
+            'response_format': {"type": "json_object"}
+        }
+    
+    def _finish_revision(self, previous, request, response, archive=True):
+        """Apply the edit list, then the usual repair/check/archive"""
+        usage = self._usage(response)
+        edits = parse_edits(response.choices[0].message.content, len(paragraphs(previous)))
+        revised, changed = apply_edits(previous, edits)
+        logger.log("REVISION", f"{len(edits)} edit(s), {changed} paragraph(s) changed, {usage['completion_tokens']} output tokens", "basic")
+        
+        result = self._finish(revised, request, usage, archive, extra_params={'revision': True})
+        result['edits'] = edits
+        result['revision'] = {
+            'paragraphs_changed': changed,
+            'output_tokens': usage['completion_tokens'],
+            # What regenerating the whole issue would have produced
+            'regeneration_output_tokens': estimate_tokens(previous)
+        }
+        return result
+    
+    def _generate_candidates(self, request, k, archive=True):
+        """
+        k completions for one request in a single round trip; the best is archived
+        
+        Candidates are scored on remaining constitution issues plus length and
+        voice heuristics (src/candidates.py). The result carries the winner's
+        'score' and 'penalties' and the runners-up as 'alternatives'.
+        """
+        system_prompt, user_message, parameters, max_tokens = request["system_prompt"], request["user_message"], request["parameters"], request["max_tokens"]
+        
+        if self.supports_n:
+            response = self._complete(system_prompt, user_message, parameters, n=k, max_tokens=max_tokens)
+            texts = [self._newsletter_text(choice) for choice in response.choices]
+            usage = self._usage(response)
+        else:
+            with ThreadPoolExecutor(max_workers=k) as pool:
+                responses = list(pool.map(lambda _: self._complete(system_prompt, user_message, parameters, max_tokens=max_tokens), range(k)))
+            texts = [self._newsletter_text(response.choices[0]) for response in responses]
+            usage = self._total_usage(responses)
+        
+        return self._pick_candidate(texts, request, usage, archive)
+    
+    def _total_usage(self, responses):
+        usages = [self._usage(response) for response in responses]
+        return {key: sum(u[key] for u in usages) for key in usages[0]}
+    
+    def _pick_candidate(self, texts, request, usage, archive=True):
+        """Score candidates, finish the best one and attach the rest as alternatives"""
+        k = len(texts)
+        ranked = score_candidates(texts, self.memory_manager.load_memory().get("voice_donts"))
+        best = ranked[0]
+        logger.log("CANDIDATES", ", ".join(f"{c['score']:g}" for c in ranked) + f" - kept the best of {k}", "basic")
+        
+        result = self._finish(best["newsletter"], request, usage, archive, extra_params={'candidates': k, 'score': best['score']})
+        result['auto_fixed'] = best['auto_fixed']
+        result['score'] = best['score']
+        result['penalties'] = best['penalties']
+        result['alternatives'] = [{
+            'newsletter': c['newsletter'],
+            'issues': c['issues'],
+            'score': c['score'],
+            'penalties': c['penalties']
+        } for c in ranked[1:]]
+        return result
+    
+    def _refine_messages(self, request, draft):
+        """System prompt and user message for the large-model pass over a draft (or from scratch without one)"""
+        if not draft:
+            return request["system_prompt"], request["user_message"]
+        
+        instructions = REFINE_INSTRUCTIONS
+        if request["editing_instructions"]:
+            instructions += f"\n\nThe user also asked for:\n{request['editing_instructions']}"
+        system_prompt = self.memory_manager.get_enhanced_prompt_with_lens(
+            request["template"].text, request["daily_input"], request["lens_override"], request["prompt_roj_context"], instructions, request["parameters"],
+            lens_selection=request["lens_selection"]
+        )
+        return system_prompt, f"{request['user_message']}\n\nFirst Draft:\n{draft}"
+    
+    def _speculative_result(self, result, draft, draft_error, timer):
+        seconds = {stage["name"]: round(stage["seconds"], 2) for stage in timer.summary()["stages"]}
+        result['draft'] = draft
+        result['timings'] = {
+            'draft_model': self.draft_model,
+            'draft_seconds': seconds.get("draft"),
+            'draft_error': draft_error,
+            'refine_model': self.model,
+            'refine_seconds': seconds.get("refine"),
+            'total_seconds': round(timer.wall_time(), 2)
+        }
+        logger.log("SPECULATIVE", f"draft {seconds.get('draft')}s ({self.draft_model}), refine {seconds.get('refine')}s ({self.model})", "basic")
+        return result
+    
+    def _build_request(self, daily_input, badass_quote=None, lens_override=None, roj_context=None, editing_instructions=None, parameters=None, date=None, template=None, compress_inputs=True, lens_input=None):
+        """
+        Assemble the system prompt and user message for one issue
+        
+        compress_inputs=False skips input compression (revisions don't send the
+        daily input); lens_input is what lens selection reads if not daily_input.
+        """
+        issue_date = date or datetime.now()
+        day_num = self.calculate_day_number(issue_date)
+        today_str = issue_date.strftime('%B %d, %Y')
         
         # Set default parameters if not provided
         if parameters is None:
@@ -50,78 +446,213 @@ class NewsletterGenerator:
             }
         
         # Load prompt with lens selection based on daily input
-        with open(self.prompt_path, 'r') as f:
-            base_prompt = f.read()
+        template = template or self.prompts.get("newsletter")
+        base_prompt = template.text
         
         # Use lens-aware enhancement (with optional override)
-        prompt_template = self.memory_manager.get_enhanced_prompt_with_lens(base_prompt, daily_input, lens_override, roj_context, editing_instructions, parameters)
+        lens_selection = self.memory_manager.lens_selector.select_lens(lens_input or daily_input, override=lens_override, roj_name=None)
+        
+        # Oversized inputs (pasted journal dumps) go to the model as their most
+        # salient sentences (src/summarizer.py); lens selection sees everything
+        compression = {}
+        prompt_input, prompt_roj_context = daily_input, roj_context
+        for name, text in (('daily_input', daily_input), ('roj_context', roj_context)):
+            compressed = compress(text) if text and compress_inputs else None
+            if compressed:
+                compression[name] = compressed
+                logger.log("INPUT COMPRESSED", f"{name}: {compressed['original_tokens']} → {compressed['compressed_tokens']} tokens ({compressed['sentences_kept']}/{compressed['sentences_total']} sentences)", "basic")
+        if 'daily_input' in compression:
+            prompt_input = compression['daily_input']['text']
+        if 'roj_context' in compression:
+            prompt_roj_context = compression['roj_context']['text']
+        
+        # Stable prefix first so Groq/OpenAI prefix caching can reuse it across requests
+        prompt_prefix, prompt_suffix = self.memory_manager.get_prompt_parts(base_prompt, daily_input, lens_override, prompt_roj_context, editing_instructions, parameters, lens_selection=lens_selection)
+        prompt_template = prompt_prefix + prompt_suffix
         
         if logger.is_enabled("log_prompt_assembly"):
-            logger.log("FINAL PROMPT LENGTH", f"{len(prompt_template)} chars", "verbose")
+            logger.log("FINAL PROMPT LENGTH", f"{len(prompt_template)} chars ({len(prompt_prefix)} stable prefix)", "verbose")
             logger.log("FINAL PROMPT SENT TO LLM", prompt_template, "trace")
         
         user_message = f"""Day {day_num} - {today_str}
 
 Daily Input:
-{daily_input}"""
+{prompt_input}"""
         
         if badass_quote:
             user_message += f"\n\nYou Are a Badass Quote:\n{badass_quote}"
         
-        try:
-            if logger.is_enabled("log_llm_requests"):
-                logger.log_section("LLM REQUEST")
-                logger.log("MODEL", self.model, "basic")
-                logger.log("USER MESSAGE", user_message, "verbose")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": prompt_template},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=parameters.get('temperature', 0.7),
-                top_p=parameters.get('top_p', 0.9),
-                frequency_penalty=parameters.get('frequency_penalty', 0.3),
-                presence_penalty=parameters.get('presence_penalty', 0.3),
-                max_tokens=2000
-            )
-            
-            newsletter = response.choices[0].message.content
-            
-            if logger.is_enabled("log_llm_responses"):
-                logger.log("LLM RESPONSE", newsletter, "trace")
-            
-            # Constitution check and auto-fix
-            newsletter, issues, was_fixed = validate_output(newsletter, "newsletter", auto_fix_enabled=True)
-            
-            if was_fixed:
-                logger.log("CONSTITUTION", "Auto-fixes applied", "basic")
-            
-            if issues:
-                logger.log("CONSTITUTION WARNING", f"{len(issues)} issues remain after auto-fix", "basic", force=True)
-            
-            # Save to file (skip in serverless environments like Vercel)
-            filepath = None
+        # Output budget from how long past issues with this lens ran (src/length_model.py)
+        max_tokens = get_length_model().max_tokens("newsletter", lens_selection[0])
+        
+        return {
+            'issue_date': issue_date,
+            'day_num': day_num,
+            'today_str': today_str,
+            'parameters': parameters,
+            'template': template,
+            'lens_selection': lens_selection,
+            'system_prompt': prompt_template,
+            'user_message': user_message,
+            'max_tokens': max_tokens,
+            'daily_input': daily_input,
+            'lens_override': lens_override,
+            'roj_context': roj_context,
+            'prompt_roj_context': prompt_roj_context,
+            'compression': compression,
+            'editing_instructions': editing_instructions
+        }
+    
+    def _complete(self, system_prompt, user_message, parameters, n=1, max_tokens=DEFAULT_MAX_TOKENS):
+        """One large-model completion"""
+        if logger.is_enabled("log_llm_requests"):
+            logger.log_section("LLM REQUEST")
+            logger.log("MODEL", self.model, "basic")
+            logger.log("USER MESSAGE", user_message, "verbose")
+        
+        args = self._completion_args(system_prompt, user_message, parameters, max_tokens)
+        if n > 1:
+            args['n'] = n
+        return self.client.chat.completions.create(**args)
+    
+    def _completion_args(self, system_prompt, user_message, parameters, max_tokens=DEFAULT_MAX_TOKENS):
+        # Generation stops at the signature; _newsletter_text() appends the exact one
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            'temperature': parameters.get('temperature', 0.7),
+            'top_p': parameters.get('top_p', 0.9),
+            'frequency_penalty': parameters.get('frequency_penalty', 0.3),
+            'presence_penalty': parameters.get('presence_penalty', 0.3),
+            'max_tokens': max_tokens,
+            'stop': [get_checker().signature_stop]
+        }
+    
+    def _rewrite_sentence(self, sentence, phrases):
+        """Micro-rewrite of one sentence without the given banned phrases (see src/repair.py)"""
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SENTENCE_REWRITE_PROMPT},
+                {"role": "user", "content": f"Phrases to remove: {', '.join(phrases)}\n\nSentence: {sentence}"}
+            ],
+            temperature=0.3,
+            max_tokens=2 * estimate_tokens(sentence) + 20
+        )
+        usage = self._usage(response)
+        return response.choices[0].message.content, usage['prompt_tokens'] + usage['completion_tokens']
+    
+    def _draft(self, request):
+        """Small-model draft from the same prompt (no retries - a slow draft defeats the point)"""
+        client = get_openai_client(api_key="ollama", base_url=ollama_base_url())
+        response = client.with_options(timeout=DRAFT_TIMEOUT_SECONDS, max_retries=0).chat.completions.create(
+            **self._draft_args(request)
+        )
+        return (response.choices[0].message.content or "").strip() or None
+    
+    def _draft_args(self, request):
+        return {
+            'model': self.draft_model,
+            'messages': [
+                {"role": "system", "content": request["system_prompt"]},
+                {"role": "user", "content": request["user_message"]}
+            ],
+            'temperature': request["parameters"].get('temperature', 0.7),
+            'max_tokens': request["max_tokens"]
+        }
+    
+    def _newsletter_text(self, choice):
+        """Completion text, with the signature put back if generation ended at its stop sequence"""
+        text = choice.message.content or ""
+        if getattr(choice, "finish_reason", None) == "stop":
+            text = get_checker().restore_signature(text)
+        return text
+    
+    def _usage(self, response):
+        usage = usage_tokens(getattr(response, 'usage', None))
+        if any(getattr(choice, "finish_reason", None) == "length" for choice in response.choices):
+            logger.log("MAX TOKENS", f"Completion hit its max_tokens budget after {usage['completion_tokens']} tokens - output may be cut short", "basic", force=True)
+        if usage['cached_tokens']:
+            logger.log("PROMPT CACHE", f"{usage['cached_tokens']}/{usage['prompt_tokens']} prompt tokens cached", "verbose")
+        return usage
+    
+    def _finish(self, newsletter, request, usage, archive=True, extra_params=None):
+        """Constitution check, archive, and the result dict"""
+        if logger.is_enabled("log_llm_responses"):
+            logger.log("LLM RESPONSE", newsletter, "trace")
+        
+        # Banned phrases are repaired in place (substitution table, then a
+        # one-sentence LLM rewrite) instead of costing a full regeneration
+        newsletter, repair = BanRepairer(get_checker()).repair(newsletter, rewrite=self._rewrite_sentence)
+        if repair['substituted'] or repair['rewritten'] or repair['remaining']:
+            repair['tokens_saved'] = tokens_saved(repair, estimate_regeneration(request['system_prompt'], request['user_message'], newsletter))
+            if repair['tokens_saved']:
+                logger.log("BAN REPAIR", f"~{repair['tokens_saved']} tokens saved vs regenerating", "basic")
+        else:
+            repair = None
+        
+        # Constitution check and auto-fix
+        newsletter, issues, was_fixed = validate_output(newsletter, "newsletter", auto_fix_enabled=True)
+        
+        if was_fixed:
+            logger.log("CONSTITUTION", "Auto-fixes applied", "basic")
+        
+        if issues:
+            logger.log("CONSTITUTION WARNING", f"{len(issues)} issues remain after auto-fix", "basic", force=True)
+        
+        # Memory usage counts once per completed generation (prompt assembly,
+        # including /generate/prepare, doesn't touch them)
+        self.memory_manager.record_prompt_usage()
+        
+        template = request['template']
+        lens = request['lens_selection'][0]
+        
+        # Archive (deduplicated, compressed) through the configured storage backend
+        filepath = None
+        if archive:
             try:
-                output_dir = os.path.join(os.path.dirname(__file__), "..", "output", "newsletters")
-                os.makedirs(output_dir, exist_ok=True)
-                
-                filename = f"newsletter_day_{day_num}_{datetime.now().strftime('%Y%m%d')}.txt"
-                filepath = os.path.join(output_dir, filename)
+                entry = get_archive().put(
+                    "newsletter",
+                    newsletter,
+                    date=request['issue_date'],
+                    day_num=request['day_num'],
+                    lens=lens,
+                    template_version=template.version,
+                    params={
+                        'parameters': request['parameters'],
+                        'lens_override': request['lens_override'],
+                        'roj_context': request['roj_context'],
+                        'editing_instructions': request['editing_instructions'],
+                        **(extra_params or {})
+                    }
+                )
+                filepath = f"archive:{entry['id']}"
                 
-                with open(filepath, 'w') as f:
-                    f.write(newsletter)
-            except (OSError, PermissionError):
-                # Read-only filesystem (Vercel) - skip file saving
-                filepath = "Not saved (serverless environment)"
-            
-            return {
-                'newsletter': newsletter,
-                'day_num': day_num,
-                'date': today_str,
-                'filepath': filepath or "Not saved"
-            }
-            
-        except Exception as e:
-            raise Exception(f"Error generating newsletter: {str(e)}")
+                # The model saw a compressed input - keep the original with the issue
+                if 'daily_input' in request['compression']:
+                    get_archive().put(
+                        "daily_input",
+                        request['daily_input'],
+                        date=request['issue_date'],
+                        day_num=request['day_num'],
+                        params={'compression': compression_stats(request['compression'])}
+                    )
+            except OSError as e:
+                logger.log("SAVE FAILED", str(e), "basic", force=True)
+        
+        return {
+            'newsletter': newsletter,
+            'day_num': request['day_num'],
+            'date': request['today_str'],
+            'filepath': filepath or "Not saved",
+            'template_version': template.version,
+            'lens': lens,
+            'issues': issues,
+            'auto_fixed': was_fixed,
+            'repair': repair,
+            'compression': compression_stats(request['compression']) or None,
+            'usage': usage
+        }
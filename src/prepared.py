@@ -0,0 +1,73 @@
+"""
+Prepared Requests - Prompt assembly done while the user is still typing
+/generate/prepare builds the generation request (lens selection, prompt
+assembly) and parks it here under a short-lived token; /generate/newsletter
+hands the token back and goes straight to the LLM call. A token only counts
+if the inputs, prompt and memory still match what was prepared, otherwise the
+request is simply rebuilt.
+
+Entries are per process - with several workers a miss just means rebuilding
+"""
+
+import time
+import secrets
+import threading
+from collections import OrderedDict
+
+PREPARED_TTL_SECONDS = 120
+MAX_PREPARED = 256
+
+
+class PreparedRequests:
+    def __init__(self, ttl=PREPARED_TTL_SECONDS, max_entries=MAX_PREPARED):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key, request):
+        """
+        Park a built request
+
+        Args:
+            key: Fingerprint of the inputs it was built from
+            request: The request dict
+
+        Returns:
+            token for get()
+        """
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._prune(time.monotonic())
+            self._entries[token] = (time.monotonic() + self.ttl, key, request)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def get(self, token, key):
+        """The request for token if it hasn't expired and was built from the same inputs (else None)"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires, prepared_key, request = entry
+            if expires < time.monotonic():
+                del self._entries[token]
+                return None
+        return request if prepared_key == key else None
+
+    def _prune(self, now):
+        # Oldest first, so stop at the first live entry
+        while self._entries:
+            token, (expires, _, _) = next(iter(self._entries.items()))
+            if expires >= now:
+                break
+            del self._entries[token]
+
+
+_prepared = PreparedRequests()
+
+
+def get_prepared_requests():
+    """Shared prepared-request cache for this process"""
+    return _prepared
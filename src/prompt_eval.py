@@ -0,0 +1,291 @@
+"""
+Prompt Eval - A/B comparison of two newsletter prompt versions
+Runs every daily input in a fixed corpus through the generator once per
+prompt (both prompts interleaved on one GenerationPool, so parallelism and
+rate limits stay bounded), caches each response by (model, prompt, input,
+parameters, run), and scores the outputs on constitution issues, length,
+token usage and latency
+
+Prompt specs:
+    current         - the prompt in prompts/newsletter_prompt.txt
+    v12             - version 12 from the newsletter prompt backups
+    path/to/file    - any text file
+"""
+
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import as_completed
+from src.generation_pool import GenerationPool, estimate_tokens
+from src.length_model import get_length_model
+from src.prompt_registry import PromptTemplate, get_prompt_registry
+from src.storage import get_storage
+from src.debug_logger import logger
+
+CACHE_PREFIX = "output/eval/cache"
+REPORT_PREFIX = "output/eval/reports"
+
+# Same reservation the batch runner makes per newsletter call
+PROMPT_TOKEN_RESERVE = 2500
+
+
+def resolve_prompt(spec):
+    """
+    Turn a prompt spec into a PromptTemplate
+
+    Raises:
+        ValueError if the spec doesn't name an existing prompt
+    """
+    if spec == "current":
+        return get_prompt_registry().get("newsletter")
+
+    if spec[:1] in ("v", "V") and spec[1:].isdigit():
+        from src.backup_store import get_backup_store
+        try:
+            return PromptTemplate("newsletter", get_backup_store("newsletter").get(int(spec[1:])))
+        except KeyError:
+            raise ValueError(f"No newsletter prompt backup {spec}")
+
+    if os.path.isfile(spec):
+        with open(spec, 'r') as f:
+            return PromptTemplate("newsletter", f.read())
+
+    raise ValueError(f"Unknown prompt: {spec} (use current, v<N> or a file path)")
+
+
+def load_corpus(paths):
+    """
+    Read daily inputs
+
+    Args:
+        paths: Files and/or folders (folders contribute their .txt/.md files)
+
+    Returns:
+        list of (name, text), sorted by name
+    """
+    corpus = {}
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in os.listdir(path) if f.endswith(('.txt', '.md'))]
+        else:
+            files = [path]
+
+        for file_path in files:
+            with open(file_path, 'r') as f:
+                text = f.read().strip()
+            if text:
+                corpus[os.path.relpath(file_path)] = text
+
+    return sorted(corpus.items())
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+class PromptEval:
+    def __init__(self, prompts, corpus, runs=1, concurrency=None, parameters=None, use_cache=True, storage=None):
+        """
+        Args:
+            prompts: dict of label -> PromptTemplate (usually "A" and "B")
+            corpus: list of (name, daily input)
+            runs: Generations per (prompt, input) - more runs smooth out sampling noise
+            concurrency: Parallel requests (default from config/rate_limits.json)
+            parameters: Generation parameters (default: the generator's defaults)
+            use_cache: Reuse cached responses for identical requests
+        """
+        from src.newsletter_generator_simple import NewsletterGenerator
+
+        self.prompts = prompts
+        self.corpus = corpus
+        self.runs = runs
+        self.concurrency = concurrency
+        self.parameters = parameters
+        self.use_cache = use_cache
+        self.storage = storage or get_storage()
+        self.generator = NewsletterGenerator()
+
+    def _cache_key(self, template, daily_input, run):
+        blob = json.dumps({
+            "model": self.generator.model,
+            "prompt": template.version,
+            "input": daily_input,
+            "parameters": self.parameters,
+            "run": run
+        }, sort_keys=True)
+        return f"{CACHE_PREFIX}/{hashlib.sha256(blob.encode('utf-8')).hexdigest()}.json"
+
+    def _cached(self, label, template, name, daily_input, run):
+        """Earlier record for the same request, or None"""
+        if not self.use_cache:
+            return None
+        try:
+            record = json.loads(self.storage.read(self._cache_key(template, daily_input, run)))
+        except KeyError:
+            return None
+        record.update({"prompt": label, "input": name, "cached": True})
+        return record
+
+    def _generate(self, label, template, name, daily_input, run):
+        """One generation, scored and cached"""
+        cache_key = self._cache_key(template, daily_input, run)
+        start = time.perf_counter()
+        result = self.generator.generate_newsletter(
+            daily_input,
+            parameters=self.parameters,
+            template=template,
+            archive=False
+        )
+        latency = time.perf_counter() - start
+
+        text = result["newsletter"]
+        usage = result.get("usage") or {}
+        record = {
+            "prompt": label,
+            "input": name,
+            "run": run,
+            "issues": result["issues"],
+            "auto_fixed": result["auto_fixed"],
+            "chars": len(text),
+            "words": len(text.split()),
+            "prompt_tokens": usage.get("prompt_tokens") or estimate_tokens(template.text),
+            "completion_tokens": usage.get("completion_tokens") or estimate_tokens(text),
+            "latency": round(latency, 3),
+            "lens": result.get("lens"),
+            "text": text,
+            "cached": False
+        }
+
+        self.storage.write(cache_key, json.dumps(record))
+        return record
+
+    def run(self, on_result=None):
+        """
+        Run every (prompt, input, run) combination
+
+        Args:
+            on_result: Optional callback(record) as each generation finishes
+
+        Returns:
+            Report dict (see report())
+        """
+        jobs = [
+            (label, template, name, daily_input, run)
+            for name, daily_input in self.corpus
+            for run in range(self.runs)
+            for label, template in self.prompts.items()
+        ]
+        logger.log("PROMPT EVAL", f"{len(jobs)} generations ({len(self.prompts)} prompts × {len(self.corpus)} inputs × {self.runs} runs)", "basic", force=True)
+
+        records = []
+        with GenerationPool(max_workers=self.concurrency) as pool:
+            futures = {}
+            for job in jobs:
+                # Cache hits don't touch the provider, so they skip the rate limiter too
+                record = self._cached(*job)
+                if record is not None:
+                    records.append(record)
+                    if on_result:
+                        on_result(record)
+                    continue
+
+                reserve = PROMPT_TOKEN_RESERVE + estimate_tokens(job[3]) + get_length_model().max_tokens("newsletter")
+                futures[pool.submit_call(self._generate, *job, estimated_tokens=reserve)] = job
+
+            for future in as_completed(futures):
+                label, _, name, _, run = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {"prompt": label, "input": name, "run": run, "error": str(e)}
+                records.append(record)
+                if on_result:
+                    on_result(record)
+
+        return self.report(records)
+
+    def report(self, records):
+        """
+        Aggregate scored generations
+
+        Returns:
+            dict with per-prompt summaries, per-input comparisons and the raw records
+        """
+        summaries = {}
+        for label, template in self.prompts.items():
+            ok = [r for r in records if r["prompt"] == label and "error" not in r]
+            issue_counts = [len(r["issues"]) for r in ok]
+            live = [r["latency"] for r in ok if not r["cached"]]
+            summaries[label] = {
+                "template_version": template.version,
+                "prompt_chars": len(template),
+                "generations": len(ok),
+                "errors": sum(1 for r in records if r["prompt"] == label and "error" in r),
+                "cached": sum(1 for r in ok if r["cached"]),
+                "mean_issues": round(_mean(issue_counts), 2),
+                "clean_rate": round(_mean([1 if n == 0 else 0 for n in issue_counts]), 2),
+                "auto_fixed": sum(1 for r in ok if r["auto_fixed"]),
+                "issue_types": dict(Counter(issue.split(":")[0] for r in ok for issue in r["issues"])),
+                "mean_words": round(_mean([r["words"] for r in ok]), 1),
+                "mean_chars": round(_mean([r["chars"] for r in ok]), 1),
+                "mean_prompt_tokens": round(_mean([r["prompt_tokens"] for r in ok]), 1),
+                "mean_completion_tokens": round(_mean([r["completion_tokens"] for r in ok]), 1),
+                "latency_p50": round(_percentile(live, 0.5), 2),
+                "latency_p95": round(_percentile(live, 0.95), 2)
+            }
+
+        labels = list(self.prompts)
+        per_input = []
+        for name, _ in self.corpus:
+            row = {"input": name}
+            for label in labels:
+                ok = [r for r in records if r["prompt"] == label and r["input"] == name and "error" not in r]
+                row[label] = {
+                    "issues": round(_mean([len(r["issues"]) for r in ok]), 2),
+                    "words": round(_mean([r["words"] for r in ok]), 1),
+                    "tokens": round(_mean([r["prompt_tokens"] + r["completion_tokens"] for r in ok]), 1)
+                }
+            per_input.append(row)
+
+        return {
+            "created": datetime.now().isoformat(),
+            "model": self.generator.model,
+            "runs": self.runs,
+            "parameters": self.parameters,
+            "prompts": summaries,
+            "winner": self._winner(summaries),
+            "inputs": per_input,
+            "records": sorted(records, key=lambda r: (r["input"], r["run"], r["prompt"]))
+        }
+
+    def _winner(self, summaries):
+        """Fewest issues wins; ties go to the cheaper prompt (None if still tied)"""
+        ranked = sorted(
+            summaries.items(),
+            key=lambda item: (
+                item[1]["mean_issues"],
+                item[1]["mean_prompt_tokens"] + item[1]["mean_completion_tokens"]
+            )
+        )
+        if len(ranked) < 2:
+            return ranked[0][0] if ranked else None
+
+        (best, a), (_, b) = ranked[0], ranked[1]
+        if a["mean_issues"] == b["mean_issues"] and a["mean_prompt_tokens"] + a["mean_completion_tokens"] == b["mean_prompt_tokens"] + b["mean_completion_tokens"]:
+            return None
+        return best
+
+    def save_report(self, report):
+        """Write the report to output/eval/reports/ and return its location"""
+        key = f"{REPORT_PREFIX}/eval_{datetime.now():%Y%m%d_%H%M%S}.json"
+        return self.storage.write(key, json.dumps(report, indent=2))
@@ -0,0 +1,239 @@
+"""
+Prompt Registry - Load, hash and precompile prompt templates once
+Generators ask the registry for a PromptTemplate instead of re-reading
+prompts/*.txt on every call; a background watcher reloads a template when its
+file changes (inotify when inotify_simple is installed, polling otherwise),
+and /prompts/save swaps in the new text directly
+
+Every template carries a short content hash (its version), which generators
+record with each archived output.
+"""
+
+import os
+import re
+import time
+import threading
+from src.storage import LocalStorage, get_storage
+from src.archive import content_hash
+from src.debug_logger import logger
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+PROMPT_KEYS = {
+    "newsletter": "prompts/newsletter_prompt.txt",
+    "social": "prompts/social_prompt.txt"
+}
+
+# {{Placeholder}} in the prompt files. Most are instructions to the model
+# ("Day {{X}}"), so render() only fills the ones it's given.
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class PromptTemplate:
+    """Immutable, pre-split prompt text"""
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        self.version = content_hash(text)[:12]
+        self.loaded = time.time()
+
+        # Literal text and (placeholder name, original token) pairs, so render() is a join
+        self.parts = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            self.parts.append(text[position:match.start()])
+            self.parts.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.parts.append(text[position:])
+        self.placeholders = tuple(dict.fromkeys(name for name, _ in self.parts[1::2]))
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.text)
+
+    def render(self, **values):
+        """Fill the given placeholders; any others are left as written"""
+        if not values:
+            return self.text
+
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+            else:
+                name, token = part
+                out.append(str(values[name]) if name in values else token)
+        return "".join(out)
+
+
+class PromptRegistry:
+    def __init__(self, storage=None, keys=None, poll_interval=None):
+        self.storage = storage or get_storage()
+        self.keys = dict(keys or PROMPT_KEYS)
+        self.poll_interval = poll_interval or float(os.getenv("ZABAL_PROMPT_POLL", DEFAULT_POLL_INTERVAL))
+        self._templates = {}
+        self._stamps = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _key(self, name):
+        if name not in self.keys:
+            raise ValueError(f"Unknown prompt: {name}")
+        return self.keys[name]
+
+    def get(self, name):
+        """
+        Current template for name ("newsletter" or "social")
+
+        Only the first call per template touches storage; after that this is a
+        dict lookup until the watcher or invalidate() swaps in a new version.
+        KeyError if the prompt file doesn't exist.
+        """
+        template = self._templates.get(name)
+        if template is None:
+            template = self.reload(name)
+        return template
+
+    def reload(self, name):
+        """Read name from storage and publish it"""
+        key = self._key(name)
+        with self._lock:
+            stamp = self.storage.stamp(key)
+            template = PromptTemplate(name, self.storage.read(key))
+            self._publish(name, template, stamp)
+        return template
+
+    def invalidate(self, name, content=None):
+        """
+        Replace a template after its file was written
+
+        Args:
+            name: Prompt name
+            content: The text just saved (skips re-reading it); None reloads from storage
+
+        Returns:
+            The new PromptTemplate
+        """
+        if content is None:
+            return self.reload(name)
+
+        key = self._key(name)
+        with self._lock:
+            template = PromptTemplate(name, content)
+            self._publish(name, template, self.storage.stamp(key))
+        return template
+
+    def _publish(self, name, template, stamp):
+        # Callers hold self._lock. A single dict assignment, so readers see
+        # either the old template or the new one, never a mix.
+        previous = self._templates.get(name)
+        self._templates[name] = template
+        self._stamps[name] = stamp
+        if previous is not None and previous.version != template.version:
+            logger.log("PROMPT RELOADED", f"{name}: {previous.version} → {template.version}", "basic", force=True)
+
+    def versions(self):
+        """name -> version hash of every loaded template"""
+        return {name: template.version for name, template in self._templates.items()}
+
+    # --- Watching --------------------------------------------------------------
+
+    def check(self):
+        """Reload any loaded template whose file changed (one stamp per template)"""
+        changed = []
+        for name in list(self._templates):
+            try:
+                stamp = self.storage.stamp(self._key(name))
+            except OSError:
+                continue
+            if stamp is not None and stamp != self._stamps.get(name):
+                try:
+                    self.reload(name)
+                    changed.append(name)
+                except KeyError:
+                    pass
+        return changed
+
+    def _watch_paths(self):
+        """Directory -> {filename: name} for prompts stored as plain local files"""
+        paths = {}
+        if not isinstance(getattr(self.storage, "backend", self.storage), LocalStorage):
+            return paths  # sqlite/tmp/memory backends are polled via stamp()
+        for name, key in self.keys.items():
+            location = self.storage.location(key)
+            if os.path.isabs(location) and os.path.exists(location):
+                directory, filename = os.path.split(location)
+                paths.setdefault(directory, {})[filename] = name
+        return paths
+
+    def start_watcher(self):
+        """Start the background watcher (once per registry)"""
+        if self._watcher is not None:
+            return self._watcher
+
+        paths = self._watch_paths() if INOTIFY_AVAILABLE else {}
+        if paths and len(paths) == 1:
+            target = self._watch_inotify
+            mode = "inotify"
+        else:
+            target = self._watch_poll
+            mode = f"polling every {self.poll_interval:g}s"
+
+        self._watcher = threading.Thread(target=target, name="prompt-watcher", daemon=True)
+        self._watcher.start()
+        logger.log("PROMPT WATCHER", mode, "verbose")
+        return self._watcher
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def _watch_poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def _watch_inotify(self):
+        # The storage layer writes via rename, so watch the directory for new entries
+        (directory, names), = self._watch_paths().items()
+        inotify = INotify()
+        inotify.add_watch(directory, inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO)
+
+        while not self._stop.is_set():
+            events = inotify.read(timeout=int(self.poll_interval * 1000))
+            touched = {names[event.name] for event in events if event.name in names}
+            for name in touched:
+                if name in self._templates:
+                    try:
+                        self.reload(name)
+                    except KeyError:
+                        pass
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry(watch=None):
+    """
+    Shared registry over the shared storage
+
+    The watcher starts with it unless ZABAL_PROMPT_WATCH=false (or watch=False).
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry()
+            if watch is None:
+                watch = os.getenv("ZABAL_PROMPT_WATCH", "true").lower() == "true"
+            if watch:
+                _registry.start_watcher()
+        return _registry
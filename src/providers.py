@@ -0,0 +1,103 @@
+"""
+Provider Clients - Lazy SDK imports and shared clients
+SDKs are only imported for the provider actually selected, and clients are
+cached so every generator reuses the same HTTP connection pool
+"""
+
+import os
+import threading
+
+_clients = {}
+_lock = threading.Lock()
+
+# Overridable so load tests can point the web app at a stand-in server
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+
+def ollama_base_url():
+    """Ollama's OpenAI-compatible endpoint (OLLAMA_BASE_URL may be given with or without /v1)"""
+    url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+    return url if url.endswith("/v1") else url + "/v1"
+
+
+def get_openai_client(api_key=None, base_url=None):
+    """Get a shared OpenAI-compatible client (OpenAI, Groq, Ollama, OpenRouter)"""
+    key = ("openai", api_key, base_url)
+    with _lock:
+        if key not in _clients:
+            from openai import OpenAI
+            _clients[key] = OpenAI(api_key=api_key, base_url=base_url)
+        return _clients[key]
+
+
+def get_async_openai_client(api_key=None, base_url=None):
+    """
+    Get a shared AsyncOpenAI client (asgi_app.py)
+
+    Its connection pool belongs to the event loop that first uses it, so share
+    it only within one serving loop.
+    """
+    key = ("async-openai", api_key, base_url)
+    with _lock:
+        if key not in _clients:
+            from openai import AsyncOpenAI
+            _clients[key] = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        return _clients[key]
+
+
+def get_anthropic_client(api_key=None):
+    """Get a shared Anthropic client"""
+    key = ("anthropic", api_key, None)
+    with _lock:
+        if key not in _clients:
+            try:
+                from anthropic import Anthropic
+            except ImportError:
+                raise ImportError("Anthropic package not installed. Run: pip install anthropic")
+            _clients[key] = Anthropic(api_key=api_key)
+        return _clients[key]
+
+
+def cached_system(prefix, suffix=""):
+    """
+    Claude system prompt with a cache breakpoint after the stable prefix
+
+    Everything up to the breakpoint is cached by Anthropic for a few minutes;
+    the suffix (per-request guidance) is sent uncached after it.
+    """
+    blocks = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+    if suffix:
+        blocks.append({"type": "text", "text": suffix})
+    return blocks
+
+
+def usage_tokens(usage):
+    """
+    Token counts from an OpenAI-compatible or Anthropic usage object
+
+    Returns:
+        dict with prompt_tokens (all input, cached included), completion_tokens,
+        cached_tokens (read from the provider's prompt cache) and
+        cache_write_tokens (Anthropic only)
+    """
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cache_write_tokens": 0}
+
+    if hasattr(usage, "input_tokens"):
+        # Anthropic reports cache reads/writes separately from input_tokens
+        cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+        written = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        return {
+            "prompt_tokens": (usage.input_tokens or 0) + cached + written,
+            "completion_tokens": usage.output_tokens or 0,
+            "cached_tokens": cached,
+            "cache_write_tokens": written
+        }
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "cache_write_tokens": 0
+    }
@@ -0,0 +1,140 @@
+"""
+Ban Repair - Fix banned phrases in place instead of regenerating
+Uses the rule engine's spans to rewrite just the offending words: first from
+the curated "ban_substitutions" table in memory/editorial_rules.json, and
+failing that (no entry, or the ban sits inside a longer word) by sending only
+the sentence around it to the LLM for a micro-rewrite and splicing the
+answer back in
+"""
+
+import re
+from src.rule_engine import Document
+from src.generation_pool import estimate_tokens
+from src.debug_logger import logger
+
+WORD_CHAR = re.compile(r"\w")
+
+
+def _is_word_bounded(text, start, end):
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not WORD_CHAR.match(before) and not WORD_CHAR.match(after)
+
+
+def _match_case(original, replacement):
+    if replacement and original[:1].isupper():
+        return replacement[0].upper() + replacement[1:]
+    return replacement
+
+
+def _splice(text, start, end, replacement):
+    """Replace text[start:end]; a deletion also drops the punctuation and space it orphans"""
+    before, after = text[:start], text[end:]
+    if replacement:
+        return before + replacement + after
+
+    if re.search(r"(^|[.!?]\s+|\n\s*)$", before):
+        # "Let's dive in. Today..." -> "Today..."
+        after = re.sub(r"^[ \t]*[,;:.!—-]?[ \t]*", "", after)
+        if after[:1].islower():
+            after = after[0].upper() + after[1:]
+    elif re.match(r"[ \t]*[,.;:!?]", after):
+        # "so we circle back." -> "so we."
+        before = before.rstrip(" \t")
+    elif before.endswith((" ", "\t")):
+        after = after.lstrip(" \t")
+    return before + after
+
+
+class BanRepairer:
+    def __init__(self, checker):
+        """
+        Args:
+            checker: ConstitutionChecker whose rules hold hard_bans and ban_substitutions
+        """
+        self.checker = checker
+        self.substitutions = {
+            phrase.lower(): replacement
+            for phrase, replacement in checker.rules.get("ban_substitutions", {}).items()
+        }
+
+    def repair(self, text, rewrite=None, content_type="newsletter"):
+        """
+        Remove banned phrases locally
+
+        Args:
+            text: Newsletter or social text
+            rewrite: Optional callback(sentence, phrases) -> (new_sentence, tokens_used)
+                     for bans the substitution table can't handle
+            content_type: "newsletter" or "social"
+
+        Returns:
+            (text, report) - report has substituted and rewritten phrase lists,
+            remaining phrases, and rewrite_tokens spent on micro-rewrites
+        """
+        report = {"substituted": [], "rewritten": [], "remaining": [], "rewrite_tokens": 0}
+        bans = [f for f in self.checker.findings(text, content_type) if f["code"] == "BANNED_PHRASE"]
+        if not bans:
+            return text, report
+
+        # Table substitutions, last span first so earlier offsets stay valid
+        unresolved = []
+        for ban in sorted(bans, key=lambda f: f["start"], reverse=True):
+            phrase = ban["issue"].split(": ", 1)[1]
+            if phrase in self.substitutions and _is_word_bounded(text, ban["start"], ban["end"]):
+                text = _splice(text, ban["start"], ban["end"], _match_case(ban["text"], self.substitutions[phrase]))
+                report["substituted"].append(phrase)
+            else:
+                unresolved.append(phrase)
+
+        if unresolved and rewrite is not None:
+            text = self._rewrite_sentences(text, rewrite, report, content_type)
+
+        remaining = [f["issue"].split(": ", 1)[1] for f in self.checker.findings(text, content_type) if f["code"] == "BANNED_PHRASE"]
+        report["remaining"] = list(dict.fromkeys(remaining))
+        if report["substituted"] or report["rewritten"]:
+            logger.log("BAN REPAIR", f"{len(report['substituted'])} substituted, {len(report['rewritten'])} rewritten, {len(report['remaining'])} remaining", "basic")
+        return text, report
+
+    def _rewrite_sentences(self, text, rewrite, report, content_type):
+        """Send each sentence that still has a ban to the LLM and splice the rewrite back"""
+        bans = [f for f in self.checker.findings(text, content_type) if f["code"] == "BANNED_PHRASE"]
+        doc = Document(text)
+
+        # Sentence span -> phrases inside it
+        targets = {}
+        for ban in bans:
+            for sentence in doc.sentences:
+                if sentence.start <= ban["start"] < sentence.end:
+                    targets.setdefault((sentence.start, sentence.end), []).append(ban["issue"].split(": ", 1)[1])
+                    break
+
+        for (start, end), phrases in sorted(targets.items(), reverse=True):
+            sentence = text[start:end]
+            try:
+                new_sentence, tokens = rewrite(sentence, sorted(set(phrases)))
+            except Exception as e:
+                logger.log("BAN REPAIR FAILED", str(e), "basic", force=True)
+                continue
+            report["rewrite_tokens"] += tokens
+            new_sentence = (new_sentence or "").strip()
+            if len(new_sentence) > 1 and new_sentence[0] in "\"“" and new_sentence[-1] in "\"”" and sentence[:1] not in "\"“":
+                new_sentence = new_sentence[1:-1].strip()
+            # Keep the rewrite only if it's still one sentence-sized edit
+            if new_sentence and "\n" not in new_sentence and len(new_sentence) <= 2 * len(sentence) + 40:
+                text = text[:start] + new_sentence + text[end:]
+                report["rewritten"].extend(phrases)
+
+        return text
+
+
+def tokens_saved(report, regeneration_tokens):
+    """Tokens a full regeneration would have cost minus what the repair spent (0 unless every ban was repaired)"""
+    if report["remaining"] or not (report["substituted"] or report["rewritten"]):
+        return 0
+    return max(0, regeneration_tokens - report["rewrite_tokens"])
+
+
+def estimate_regeneration(system_prompt, user_message, output):
+    """Token cost of generating output again from the same prompt"""
+    return estimate_tokens(system_prompt) + estimate_tokens(user_message) + estimate_tokens(output)
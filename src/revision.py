@@ -0,0 +1,115 @@
+"""
+Revision - Edit an existing newsletter instead of regenerating it
+The newsletter is shown to the model with numbered paragraphs; the model
+answers with a small JSON list of paragraph edits, which is applied here so
+everything it didn't touch stays byte-for-byte the same:
+    {"edits": [{"action": "replace", "paragraph": 2, "text": "..."},
+               {"action": "delete", "paragraph": 4},
+               {"action": "insert_after", "paragraph": 0, "text": "..."}]}
+"""
+
+import json
+import re
+from src.rule_engine import Document
+
+ACTIONS = ("replace", "delete", "insert_after")
+
+REVISE_INSTRUCTIONS = """You are now revising a finished newsletter, not writing a new one.
+The user message has the requested changes and the newsletter with its paragraphs numbered [1], [2], ...
+Change only what the request asks for and keep every other paragraph exactly as it is.
+Answer with JSON only, in this shape:
+{"edits": [{"action": "replace", "paragraph": 2, "text": "new paragraph text"}]}
+Actions: "replace" (new text for that paragraph), "delete" (no text), "insert_after" (a new paragraph after that number; 0 inserts at the top).
+Paragraph text must not include the [n] number. Use {"edits": []} if nothing needs to change."""
+
+
+class RevisionError(ValueError):
+    """The model's edit list couldn't be parsed or doesn't fit the newsletter"""
+
+
+def paragraphs(text):
+    """Paragraph spans of text (see rule_engine.Document)"""
+    return [paragraph["span"] for paragraph in Document(text).paragraphs]
+
+
+def number_paragraphs(text):
+    """Text with each paragraph prefixed by [n], as sent to the model"""
+    return "\n\n".join(f"[{i}] {span.text}" for i, span in enumerate(paragraphs(text), 1))
+
+
+def parse_edits(content, paragraph_count):
+    """
+    Validate the model's JSON answer
+
+    Returns:
+        list of edit dicts (action, paragraph, text)
+    """
+    # Tolerate a ```json fence around the object
+    content = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", content or "")
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        raise RevisionError(f"Revision wasn't valid JSON: {e}") from e
+
+    edits = data.get("edits") if isinstance(data, dict) else data
+    if not isinstance(edits, list):
+        raise RevisionError("Revision has no edits list")
+
+    parsed = []
+    for edit in edits:
+        if not isinstance(edit, dict) or edit.get("action") not in ACTIONS:
+            raise RevisionError(f"Unknown revision edit: {edit!r}")
+        try:
+            index = int(edit.get("paragraph"))
+        except (TypeError, ValueError):
+            raise RevisionError(f"Revision edit without a paragraph number: {edit!r}")
+        low = 0 if edit["action"] == "insert_after" else 1
+        if not low <= index <= paragraph_count:
+            raise RevisionError(f"Revision refers to paragraph {index}, newsletter has {paragraph_count}")
+
+        text = re.sub(r"^\[\d+\]\s*", "", str(edit.get("text") or "").strip())
+        if edit["action"] != "delete" and not text:
+            raise RevisionError(f"Revision {edit['action']} of paragraph {index} has no text")
+        parsed.append({"action": edit["action"], "paragraph": index, "text": text})
+    return parsed
+
+
+def apply_edits(text, edits):
+    """
+    Apply paragraph edits to text
+
+    Paragraph numbers refer to the original text. Unedited paragraphs and the
+    whitespace between paragraphs are kept as they were.
+
+    Returns:
+        (revised_text, paragraphs_changed)
+    """
+    spans = paragraphs(text)
+    replaced = {}
+    deleted = set()
+    inserted = {}
+    for edit in edits:
+        if edit["action"] == "replace":
+            replaced[edit["paragraph"]] = edit["text"]
+        elif edit["action"] == "delete":
+            deleted.add(edit["paragraph"])
+        else:
+            inserted.setdefault(edit["paragraph"], []).append(edit["text"])
+
+    head = text[:spans[0].start] if spans else ""
+    tail = text[spans[-1].end:] if spans else text
+    blocks = list(inserted.get(0, []))
+    for i, span in enumerate(spans, 1):
+        if i not in deleted:
+            blocks.append(replaced.get(i, span.text))
+        blocks.extend(inserted.get(i, []))
+
+    changed = len(set(replaced) | deleted) + sum(len(v) for v in inserted.values())
+
+    # Keep the original separators where paragraphs are untouched
+    separators = [text[a.end:b.start] for a, b in zip(spans, spans[1:])]
+    if not (inserted or deleted) and len(blocks) == len(spans):
+        revised = head + "".join(block + sep for block, sep in zip(blocks, separators + [""])) + tail
+    else:
+        revised = head + "\n\n".join(blocks) + tail
+    return revised, changed
@@ -0,0 +1,337 @@
+"""
+Rule Engine - Editorial rules compiled from memory/editorial_rules.json
+The text is tokenized once into a document model (lines, paragraphs,
+sentences, closing line, signature); all phrase rules share one compiled
+regex scanned once over the text, and structural rules read the document
+model instead of re-splitting the text themselves
+
+Findings are dicts with a code, the legacy issue string ConstitutionChecker
+reports, and the character span they refer to:
+    {"code": "BANNED_PHRASE", "issue": "BANNED_PHRASE: hustle",
+     "start": 120, "end": 126, "text": "hustle", "fixable": False}
+"""
+
+import re
+
+SIGNATURE = "– BetterCallZaal on behalf of the ZABAL Team"
+SIGNATURE_MARKER = "BetterCallZaal"
+
+# Phrases that mark a reflective lens; more than one distinct lens in an issue
+# breaks "one lens only"
+DEFAULT_LENS_INDICATORS = ["you are a badass", "don't sweat", "stoic", "zen", "buddha", "marcus aurelius"]
+
+# Tokens ending in "." that don't end a sentence (compared lowercase, without the final ".")
+ABBREVIATIONS = {
+    "e.g", "i.e", "etc", "vs", "cf", "approx", "al", "mr", "mrs", "ms", "dr",
+    "prof", "st", "jr", "sr", "no", "vol", "fig", "u.s", "a.m", "p.m"
+}
+
+# Sentence terminator run (with any closing quotes/brackets) followed by whitespace or the end
+TERMINATOR = re.compile(r"[.!?…]+[\"'”’)\]]*(?=\s|$)")
+NEXT_CHAR = re.compile(r"\s*(\S)")
+ELLIPSIS = re.compile(r"(?:\.{2,}|…)")
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+EMOJI_OR_HASHTAG = r"[\U0001F300-\U0001FAFF]|#"
+
+
+class Span:
+    """A slice of the document: start/end offsets into the original text"""
+    __slots__ = ("start", "end", "text")
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __repr__(self):
+        return f"Span({self.start}, {self.end}, {self.text[:30]!r})"
+
+
+def split_sentences(text, offset=0):
+    """
+    Sentences in one line of text
+
+    A terminator ends a sentence unless it closes a known abbreviation or a
+    single-letter initial, or it's an ellipsis trailing into a lowercase word
+    ("and then... nothing"). Lowercase after a plain "." still starts a new
+    sentence, so lowercase-voice text is split like any other.
+
+    Returns:
+        list of Span (offsets shifted by offset)
+    """
+    sentences = []
+    start = 0
+    for match in TERMINATOR.finditer(text):
+        end = match.end()
+        if match.group().startswith("."):
+            word = text[start:match.start()].rsplit(None, 1)[-1:] or [""]
+            word = word[0].lower().lstrip("(\"'“‘")
+            if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                continue
+        if ELLIPSIS.match(match.group()):
+            following = NEXT_CHAR.match(text, end)
+            if following and following.group(1).islower():
+                continue
+        if text[start:end].strip():
+            sentences.append(_span(text, start, end, offset))
+        start = end
+
+    if text[start:].strip():
+        sentences.append(_span(text, start, len(text), offset))
+    return sentences
+
+
+def _span(text, start, end, offset):
+    # Trim surrounding whitespace so spans cover just the sentence
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return Span(offset + start, offset + end, text[start:end])
+
+
+class Document:
+    """Lines, paragraphs and sentences of a text, built in one scan"""
+
+    def __init__(self, text):
+        self.text = text
+        self.lines = []
+        self.paragraphs = []
+        self.sentences = []
+        self.signature = None
+
+        block_start = 0
+        for brk in list(PARAGRAPH_BREAK.finditer(text)) + [None]:
+            block_end = brk.start() if brk else len(text)
+            block = text[block_start:block_end]
+            next_start = brk.end() if brk else len(text)
+            if not block.strip():
+                block_start = next_start
+                continue
+
+            paragraph = {"span": _span(text, block_start, block_end, 0), "lines": [], "sentences": []}
+            line_start = block_start
+            for line in block.split("\n"):
+                if line.strip():
+                    span = _span(text, line_start, line_start + len(line), 0)
+                    line_sentences = split_sentences(line, line_start)
+                    self.lines.append({"span": span, "sentences": line_sentences, "paragraph": len(self.paragraphs)})
+                    paragraph["lines"].append(span)
+                    paragraph["sentences"].extend(line_sentences)
+                    self.sentences.extend(line_sentences)
+                    if SIGNATURE_MARKER in line:
+                        self.signature = span
+                line_start += len(line) + 1
+            self.paragraphs.append(paragraph)
+            block_start = next_start
+
+    @property
+    def closing_line(self):
+        """Last line with words in it that isn't the signature, with its sentences (or None)"""
+        for line in reversed(self.lines):
+            text = line["span"].text
+            # A lone dash is what's left when generation stops at the signature
+            if SIGNATURE_MARKER not in text and any(c.isalnum() for c in text):
+                return line
+        return None
+
+
+def _phrase_pattern(phrase):
+    # Straight and curly apostrophes both match
+    return re.escape(phrase).replace("'", "['’]")
+
+
+def _normalize(phrase):
+    return phrase.lower().replace("’", "'")
+
+
+def finding(code, issue, span=None, fixable=False, **details):
+    result = {
+        "code": code,
+        "issue": issue,
+        "start": span.start if span else None,
+        "end": span.end if span else None,
+        "text": span.text if span else None,
+        "fixable": fixable
+    }
+    result.update(details)
+    return result
+
+
+# --- Rules --------------------------------------------------------------------
+# Phrase rules contribute a regex to the shared pattern and see each match;
+# document rules run once against the Document.
+
+class BannedPhraseRule:
+    def __init__(self, phrases):
+        # Longest first so "take it to the next level" wins over shorter overlaps
+        self.phrases = sorted({p.lower() for p in phrases if p.strip()}, key=len, reverse=True)
+        self.pattern = "|".join(_phrase_pattern(p) for p in self.phrases)
+
+    def match(self, m, state):
+        phrase = _normalize(m.group())
+        state.setdefault("findings", []).append(
+            finding("BANNED_PHRASE", f"BANNED_PHRASE: {phrase}", Span(m.start(), m.end(), m.group()))
+        )
+
+    def finish(self, doc, state):
+        return state.get("findings", [])
+
+
+class LensMixRule:
+    def __init__(self, indicators, max_lenses=1):
+        self.indicators = sorted({i.lower() for i in indicators if i.strip()}, key=len, reverse=True)
+        self.max_lenses = max_lenses
+        self.pattern = r"\b(?:" + "|".join(_phrase_pattern(i) for i in self.indicators) + r")\b"
+
+    def match(self, m, state):
+        state.setdefault("seen", {}).setdefault(_normalize(m.group()), Span(m.start(), m.end(), m.group()))
+
+    def finish(self, doc, state):
+        seen = state.get("seen", {})
+        if len(seen) <= self.max_lenses:
+            return []
+        spans = sorted(seen.values(), key=lambda s: s.start)
+        # Point at where the second lens comes in
+        return [finding("MULTIPLE_LENSES_DETECTED", "MULTIPLE_LENSES_DETECTED", spans[self.max_lenses], lenses=sorted(seen))]
+
+
+class EmojiHashtagRule:
+    pattern = EMOJI_OR_HASHTAG
+
+    def match(self, m, state):
+        state.setdefault("findings", []).append(
+            finding("EMOJI_OR_HASHTAG_FOUND", "EMOJI_OR_HASHTAG_FOUND", Span(m.start(), m.end(), m.group()))
+        )
+
+    def finish(self, doc, state):
+        return state.get("findings", [])
+
+
+class SignatureRule:
+    def __init__(self, signature):
+        self.signature = signature
+
+    def check(self, doc):
+        if self.signature in doc.text:
+            return []
+        end = len(doc.text.rstrip())
+        return [finding("MISSING_SIGNATURE", "MISSING_SIGNATURE", Span(end, end, ""), fixable=True)]
+
+
+class ClosingLineRule:
+    def __init__(self, max_sentences):
+        self.max_sentences = max_sentences
+
+    def check(self, doc):
+        closing = doc.closing_line
+        if closing is None or len(closing["sentences"]) <= self.max_sentences:
+            return []
+        count = len(closing["sentences"])
+        return [finding(
+            "CLOSING_TOO_LONG",
+            f"CLOSING_TOO_LONG: {count} sentences (max {self.max_sentences})",
+            closing["span"],
+            fixable=True,
+            keep=closing["sentences"][self.max_sentences - 1].end
+        )]
+
+
+class ParagraphLengthRule:
+    def __init__(self, max_sentences):
+        self.max_sentences = max_sentences
+
+    def check(self, doc):
+        findings = []
+        for index, paragraph in enumerate(doc.paragraphs):
+            count = len(paragraph["sentences"])
+            if count > self.max_sentences:
+                findings.append(finding(
+                    "PARAGRAPH_TOO_LONG",
+                    f"PARAGRAPH_TOO_LONG: paragraph {index + 1} has {count} sentences (max {self.max_sentences})",
+                    paragraph["span"]
+                ))
+        return findings
+
+
+class PrefixRule:
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def check(self, doc):
+        if doc.text.strip().upper().startswith(self.prefix.upper()):
+            return []
+        start = len(doc.text) - len(doc.text.lstrip())
+        return [finding(f"MISSING_{self.prefix.upper()}_PREFIX", f"MISSING_{self.prefix.upper()}_PREFIX", Span(start, start, ""), fixable=True)]
+
+
+def compile_rules(rules, content_type):
+    """
+    Rule objects for one content type from the editorial rules JSON
+
+    Returns:
+        (phrase_rules, document_rules)
+    """
+    constraints = rules.get("output_constraints", {}).get(content_type, {})
+    phrase_rules = []
+    document_rules = []
+
+    if rules.get("hard_bans"):
+        phrase_rules.append(BannedPhraseRule(rules["hard_bans"]))
+
+    if content_type == "newsletter":
+        if constraints.get("require_signature"):
+            document_rules.append(SignatureRule(constraints.get("signature", SIGNATURE)))
+        if constraints.get("closing_line_max_sentences"):
+            document_rules.append(ClosingLineRule(constraints["closing_line_max_sentences"]))
+        if constraints.get("max_paragraph_sentences"):
+            document_rules.append(ParagraphLengthRule(constraints["max_paragraph_sentences"]))
+        phrase_rules.append(LensMixRule(constraints.get("lens_indicators", DEFAULT_LENS_INDICATORS)))
+
+    elif content_type == "social":
+        if constraints.get("require_ZM_prefix"):
+            document_rules.append(PrefixRule("ZM"))
+        if constraints.get("no_emojis") or constraints.get("no_hashtags"):
+            phrase_rules.append(EmojiHashtagRule())
+
+    return phrase_rules, document_rules
+
+
+class RuleEngine:
+    def __init__(self, rules, content_type="newsletter"):
+        """
+        Args:
+            rules: Parsed editorial_rules.json
+            content_type: "newsletter" or "social"
+        """
+        self.content_type = content_type
+        self.phrase_rules, self.document_rules = compile_rules(rules, content_type)
+        # One alternation, one named group per phrase rule
+        self.pattern = re.compile(
+            "|".join(f"(?P<r{i}>{rule.pattern})" for i, rule in enumerate(self.phrase_rules)),
+            re.IGNORECASE
+        ) if self.phrase_rules else None
+
+    def run(self, text):
+        """
+        Check text against every rule
+
+        Returns:
+            list of findings, in document order
+        """
+        doc = Document(text)
+        states = [{} for _ in self.phrase_rules]
+
+        if self.pattern is not None:
+            for m in self.pattern.finditer(text):
+                index = int(m.lastgroup[1:])
+                self.phrase_rules[index].match(m, states[index])
+
+        findings = []
+        for rule, state in zip(self.phrase_rules, states):
+            findings.extend(rule.finish(doc, state))
+        for rule in self.document_rules:
+            findings.extend(rule.check(doc))
+
+        findings.sort(key=lambda f: (f["start"] if f["start"] is not None else len(text)))
+        return findings
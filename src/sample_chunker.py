@@ -0,0 +1,152 @@
+"""
+Sample Chunker - Map-reduce helpers for the context updater
+Splits writing samples into token-bounded chunks and merges the per-chunk
+JSON suggestions back into one analysis with deduplication and voting
+"""
+
+import re
+from collections import Counter
+from src.generation_pool import estimate_tokens
+from src.similarity import SimilarityIndex, normalize
+
+# Cap on merged suggestions per field - matches what apply_updates will use anyway
+REDUCE_LIMITS = {
+    "voice_patterns_found": 10,
+    "new_voice_examples": 4,
+    "new_voice_donts": 8,
+    "new_style_notes": 6,
+    "context_updates": 6
+}
+
+LIST_FIELDS = ["voice_patterns_found", "new_voice_donts", "new_style_notes", "context_updates"]
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_oversized(text, max_tokens):
+    """Split a paragraph that alone exceeds max_tokens, at sentence boundaries if possible"""
+    pieces, current = [], ""
+    for sentence in SENTENCE_BREAK.split(text):
+        while estimate_tokens(sentence) > max_tokens:
+            # A single giant "sentence" - hard cut by characters
+            cut = max_tokens * 4
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        candidate = f"{current} {sentence}".strip()
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_sources(sources, max_tokens=1500):
+    """
+    Pack sources into chunks of at most ~max_tokens
+
+    Paragraphs are kept whole where possible and chunks never mix sources,
+    so adding one new sample leaves the other chunks (and their cache keys)
+    unchanged.
+
+    Returns:
+        list of chunk strings
+    """
+    chunks = []
+    for source in sources:
+        current = []
+        current_tokens = 0
+        for paragraph in re.split(r"\n\s*\n", source.strip()):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+
+            parts = _split_oversized(paragraph, max_tokens) if estimate_tokens(paragraph) > max_tokens else [paragraph]
+            for part in parts:
+                tokens = estimate_tokens(part)
+                if current and current_tokens + tokens > max_tokens:
+                    chunks.append("\n\n".join(current))
+                    current, current_tokens = [], 0
+                current.append(part)
+                current_tokens += tokens
+        if current:
+            chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _vote(items, existing=()):
+    """
+    Count how many chunks suggested each item (near-duplicates share a vote)
+
+    Returns:
+        list of (first-seen original, votes), most votes first, minus anything already in memory
+    """
+    known = SimilarityIndex.from_items(existing)
+    seen = SimilarityIndex()
+    votes = Counter()
+    for item in items:
+        if not normalize(item) or known.find_duplicate(item) is not None:
+            continue
+        key = seen.find_duplicate(item)
+        if key is None:
+            key = item
+            seen.add(key, item)
+        votes[key] += 1
+    return votes.most_common()
+
+
+def merge_analyses(analyses, current_memory):
+    """
+    Reduce per-chunk analyses into one analysis dict (same shape as a single call)
+
+    Args:
+        analyses: List of per-chunk analysis dicts
+        current_memory: Current personality memory (suggestions already in it are dropped)
+
+    Returns:
+        Merged analysis dict
+    """
+    existing = {
+        "voice_patterns_found": [],
+        "new_voice_donts": current_memory.get("voice_donts", []),
+        "new_style_notes": current_memory.get("style_notes", []),
+        "context_updates": current_memory.get("context_memories", [])
+    }
+
+    merged = {"votes": {}}
+    for field in LIST_FIELDS:
+        items = [item for analysis in analyses for item in analysis.get(field, []) or [] if isinstance(item, str)]
+        voted = _vote(items, existing[field])[:REDUCE_LIMITS[field]]
+        merged[field] = [item for item, _ in voted]
+        merged["votes"][field] = {item: count for item, count in voted}
+
+    # Voice examples - dedupe on content, skip anything already in memory
+    examples = [e for analysis in analyses for e in analysis.get("new_voice_examples", []) or [] if isinstance(e, dict) and e.get("content")]
+    by_content = {}
+    for example in examples:
+        by_content.setdefault(example["content"], example)
+    voted = _vote([e["content"] for e in examples], [e.get("content", "") for e in current_memory.get("voice_examples", [])])
+    merged["new_voice_examples"] = [by_content[content] for content, _ in voted][:REDUCE_LIMITS["new_voice_examples"]]
+
+    # Current state - majority vote per field
+    states = [a["current_state"] for a in analyses if isinstance(a.get("current_state"), dict) and a["current_state"]]
+    if states:
+        state = {}
+        for key in ("phase", "energy"):
+            voted = _vote([s[key] for s in states if isinstance(s.get(key), str)])
+            if voted:
+                state[key] = voted[0][0]
+        for key, limit in (("focus", 3), ("avoid_this_week", 2)):
+            values = [v for s in states for v in s.get(key, []) or [] if isinstance(v, str)]
+            state[key] = [item for item, _ in _vote(values)[:limit]]
+        merged["current_state"] = state
+
+    # Chunks never see the stored examples, so they can't nominate weak ones
+    merged["remove_weak_examples"] = []
+
+    reasons = [a.get("reasoning", "") for a in analyses if a.get("reasoning")]
+    merged["reasoning"] = f"Merged from {len(analyses)} chunk analyses. {' '.join(reasons[:3])}".strip()
+
+    return merged
@@ -0,0 +1,172 @@
+"""
+Similarity Index - Near-duplicate detection for memory notes
+MinHash signatures over character shingles, bucketed with LSH so an insert
+only compares against the handful of notes that share a band - not the
+whole list
+
+Estimated Jaccard >= threshold counts as a duplicate. With 16 bands of 4
+rows, pairs at 0.6 similarity become candidates ~90% of the time and pairs
+at 0.3 only ~12%, and every candidate is verified against its signature.
+"""
+
+import re
+import random
+import hashlib
+import threading
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+
+DEFAULT_THRESHOLD = 0.6
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize(text):
+    """Case, punctuation and spacing insensitive form of a note"""
+    return re.sub(r"[^a-z0-9 ]+", "", re.sub(r"\s+", " ", str(text).lower())).strip()
+
+
+def shingles(text):
+    """Character n-grams of the normalized text (short notes become one shingle)"""
+    norm = normalize(text)
+    if len(norm) <= SHINGLE_SIZE:
+        return {norm} if norm else set()
+    return {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def signature(text):
+    """MinHash signature (tuple of NUM_PERM ints), or None for empty text"""
+    hashes = [_hash(s) for s in shingles(text)]
+    if not hashes:
+        return None
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    if sig_a is None or sig_b is None:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _bands(sig):
+    return [(band, sig[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+class SimilarityIndex:
+    """
+    LSH index of text items
+
+    Items are identified by a caller-chosen key (the note itself, a list
+    position, ...). Adding the same key twice replaces the first entry.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.signatures = {}
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_items(cls, items, threshold=DEFAULT_THRESHOLD):
+        """Build an index keyed by the items themselves"""
+        index = cls(threshold)
+        for item in items:
+            index.add(item, item)
+        return index
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def add(self, key, text):
+        sig = signature(text)
+        with self._lock:
+            self._remove(key)
+            self.signatures[key] = sig
+            if sig is not None:
+                for band in _bands(sig):
+                    self.buckets.setdefault(band, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return
+        for band in _bands(sig):
+            bucket = self.buckets.get(band)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band]
+
+    def query(self, text, threshold=None):
+        """
+        Find items similar to text
+
+        Returns:
+            list of (key, similarity), most similar first
+        """
+        threshold = self.threshold if threshold is None else threshold
+        sig = signature(text)
+        if sig is None:
+            return []
+
+        with self._lock:
+            candidates = set()
+            for band in _bands(sig):
+                candidates.update(self.buckets.get(band, ()))
+            scored = [(key, similarity(sig, self.signatures[key])) for key in candidates]
+
+        matches = [(key, score) for key, score in scored if score >= threshold]
+        return sorted(matches, key=lambda m: m[1], reverse=True)
+
+    def find_duplicate(self, text):
+        """Key of the closest near-duplicate of text, or None"""
+        matches = self.query(text)
+        return matches[0][0] if matches else None
+
+
+def cluster(items, threshold=DEFAULT_THRESHOLD):
+    """
+    Group near-duplicate items
+
+    Args:
+        items: List of strings
+        threshold: Estimated Jaccard similarity that counts as a duplicate
+
+    Returns:
+        list of clusters, each a sorted list of item positions (singletons included),
+        ordered by their first member
+    """
+    index = SimilarityIndex(threshold)
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, item in enumerate(items):
+        for j, _ in index.query(item):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        index.add(i, item)
+
+    groups = {}
+    for i in range(len(items)):
+        groups.setdefault(find(i), []).append(i)
+    return [groups[root] for root in sorted(groups)]
@@ -0,0 +1,208 @@
+"""
+Single Flight - Coalesce identical concurrent generation requests
+The first caller for a request fingerprint runs the generation; anyone asking
+for the same fingerprint while it's in flight waits for that call and gets the
+same result instead of firing a second identical LLM request
+
+In-process coalescing covers threads (Flask) and coroutines (asgi_app.py).
+With ZABAL_SINGLE_FLIGHT_DIR set, callers in other processes on the same host
+coalesce too: the leader holds an flock on <dir>/<key>.lock and leaves its
+result in <dir>/<key>.json for whoever was queued behind the lock.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from src.debug_logger import logger
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# Cross-process results are only needed by callers already queued behind the
+# lock, so they're kept briefly
+RESULT_TTL_SECONDS = 60
+
+
+def fingerprint(**fields):
+    """Stable key for a request (prompt version, model, every input and parameter)"""
+    blob = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self, lock_dir=None, result_ttl=RESULT_TTL_SECONDS):
+        """
+        Args:
+            lock_dir: Directory for cross-process lock/result files (None: in-process only)
+            result_ttl: Seconds a cross-process result file is kept
+        """
+        if lock_dir and not FCNTL_AVAILABLE:
+            logger.log("SINGLE FLIGHT", "fcntl unavailable - coalescing within this process only", "basic", force=True)
+            lock_dir = None
+        self.lock_dir = lock_dir
+        self.result_ttl = result_ttl
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Run fn() once among concurrent callers with the same key
+
+        Returns:
+            (result, shared) - shared is True when another caller's run produced it.
+            If that run raised, every waiting caller gets the exception.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            logger.log("SINGLE FLIGHT", f"joined in-flight request {key[:12]}", "basic")
+            return future.result(), True
+
+        try:
+            outcome = self._run_locked(key, fn) if self.lock_dir else (fn(), False)
+            future.set_result(outcome[0])
+            return outcome
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key, coro_fn):
+        """do() for coroutines - coro_fn() returns the awaitable to share"""
+        task = self._tasks.get(key)
+        if task is not None:
+            logger.log("SINGLE FLIGHT", f"joined in-flight request {key[:12]}", "basic")
+            result, _ = await asyncio.shield(task)
+            return result, True
+
+        task = asyncio.ensure_future(self._arun_locked(key, coro_fn) if self.lock_dir else self._arun(coro_fn))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # Shielded so a disconnecting leader doesn't cancel the call its followers wait on
+        return await asyncio.shield(task)
+
+    async def _arun(self, coro_fn):
+        return await coro_fn(), False
+
+    # --- Cross-process ---------------------------------------------------------
+
+    def _run_locked(self, key, fn):
+        lock_file, result = self._acquire(key)
+        try:
+            if result is not None:
+                return result, True
+            result = fn()
+            self._write_result(key, result)
+            return result, False
+        finally:
+            lock_file.close()  # releases the flock
+
+    async def _arun_locked(self, key, coro_fn):
+        lock_file, result = await asyncio.to_thread(self._acquire, key)
+        try:
+            if result is not None:
+                return result, True
+            result = await coro_fn()
+            await asyncio.to_thread(self._write_result, key, result)
+            return result, False
+        finally:
+            lock_file.close()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.lock_dir, key + suffix)
+
+    def _acquire(self, key):
+        """
+        Take the key's lock, waiting for another process's run if there is one
+
+        Returns:
+            (open lock file, that run's result or None)
+        """
+        os.makedirs(self.lock_dir, exist_ok=True)
+        started = time.time()
+        lock_file = open(self._path(key, ".lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.log("SINGLE FLIGHT", f"waiting for another process on {key[:12]}", "basic")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            result = self._read_result(key, started)
+            if result is not None:
+                return lock_file, result
+        except BaseException:
+            lock_file.close()
+            raise
+
+        return lock_file, None
+
+    def _read_result(self, key, since):
+        """Result written by the run we waited on (None if it failed or is older than our wait)"""
+        path = self._path(key, ".json")
+        try:
+            # 1s slack for coarse filesystem timestamps
+            if os.path.getmtime(path) < since - 1:
+                return None
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, key, result):
+        path = self._path(key, ".json")
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(result, f, default=str)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.log("SINGLE FLIGHT", f"couldn't share result for {key[:12]}: {e}", "basic")
+        self._prune()
+
+    def _prune(self):
+        """
+        Remove result files nobody has touched for result_ttl
+
+        Lock files stay: a slow leader may still hold one, and unlinking it
+        would let the next caller lock a fresh file and run a second time.
+        """
+        cutoff = time.time() - self.result_ttl
+        try:
+            names = os.listdir(self.lock_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith((".json", ".tmp")):
+                continue
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Shared coalescer (cross-process when ZABAL_SINGLE_FLIGHT_DIR is set)"""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight(os.getenv("ZABAL_SINGLE_FLIGHT_DIR") or None)
+        return _single_flight
@@ -1,15 +1,29 @@
 import os
+import time
 from datetime import datetime
-from openai import OpenAI
 from dotenv import load_dotenv
+from src.providers import get_openai_client, get_anthropic_client, cached_system, usage_tokens
+from src.archive import get_archive
+from src.prompt_registry import get_prompt_registry
+from src.generation_pool import GenerationPool, estimate_tokens
 
 load_dotenv()
 
-try:
-    from anthropic import Anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
+# Platform sections in the order social_prompt.txt asks for them
+PLATFORMS = [
+    "Twitter (X)",
+    "Twitter (X) Group Chat",
+    "Farcaster — ZAO Channel",
+    "Farcaster — General Channel",
+    "Farcaster — Other Communities",
+    "Telegram Group Chat",
+    "Discord Group Chat",
+]
+
+VIDEO_PLATFORMS = ["TikTok", "YouTube"]
+
+# Reserved against the tokens-per-minute quota for one platform section's reply
+SECTION_COMPLETION_TOKENS = 400
 
 class SocialGenerator:
     def __init__(self):
@@ -19,57 +33,52 @@ class SocialGenerator:
         
         if use_ollama:
             # Ollama uses OpenAI-compatible API
-            self.client = OpenAI(
+            self.client = get_openai_client(
                 api_key="ollama",  # Ollama doesn't need a real API key
                 base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
             )
             self.model = os.getenv("OLLAMA_MODEL", "llama3.2")
             self.provider = "openai"
         elif use_claude:
-            if not ANTHROPIC_AVAILABLE:
-                raise ImportError("Anthropic package not installed. Run: pip install anthropic")
-            self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            self.client = get_anthropic_client(api_key=os.getenv("ANTHROPIC_API_KEY"))
             self.model = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
             self.provider = "claude"
         elif use_openrouter:
-            self.client = OpenAI(
+            self.client = get_openai_client(
                 api_key=os.getenv("OPENROUTER_API_KEY"),
                 base_url="https://openrouter.ai/api/v1"
             )
             self.model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.3-70b-instruct:free")
             self.provider = "openai"
         else:
-            self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.client = get_openai_client(api_key=os.getenv("OPENAI_API_KEY"))
             self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
             self.provider = "openai"
         
         self.prompt_path = os.path.join(os.path.dirname(__file__), "..", "prompts", "social_prompt.txt")
+        self.prompts = get_prompt_registry()
+        self.template_version = None
+        self.last_usage = None
         
     def load_prompt(self):
-        with open(self.prompt_path, 'r') as f:
-            return f.read()
+        template = self.prompts.get("social")
+        # Remembered so save_* can record which prompt version produced the output
+        self.template_version = template.version
+        return template.text
     
-    def generate(self, newsletter_content, newsletter_link=None, has_video=False):
-        system_prompt = self.load_prompt()
-        
-        user_message = f"Newsletter Content:\n\n{newsletter_content}\n\n"
-        
-        if has_video:
-            user_message += "Note: This newsletter includes a video element. Please generate TikTok and YouTube content as well.\n\n"
-        
-        user_message += "Generate platform-native social posts following the exact format and voice guidelines."
-        
+    def _complete(self, system_prompt, user_message):
+        """Run a single completion against the configured provider; returns (text, usage)"""
         if self.provider == "claude":
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=4096,
-                system=system_prompt,
+                system=cached_system(system_prompt),
                 messages=[
                     {"role": "user", "content": user_message}
                 ],
                 temperature=0.7,
             )
-            content = response.content[0].text
+            return response.content[0].text, usage_tokens(response.usage)
         else:
             response = self.client.chat.completions.create(
                 model=self.model,
@@ -79,7 +88,82 @@ class SocialGenerator:
                 ],
                 temperature=0.7,
             )
-            content = response.choices[0].message.content
+            return response.choices[0].message.content, usage_tokens(response.usage)
+    
+    def generate(self, newsletter_content, newsletter_link=None, has_video=False):
+        system_prompt = self.load_prompt()
+        
+        user_message = f"Newsletter Content:\n\n{newsletter_content}\n\n"
+        
+        if has_video:
+            user_message += "Note: This newsletter includes a video element. Please generate TikTok and YouTube content as well.\n\n"
+        
+        user_message += "Generate platform-native social posts following the exact format and voice guidelines."
+        
+        content, self.last_usage = self._complete(system_prompt, user_message)
+        
+        if newsletter_link:
+            content += f"\n\nNewsletter Link:\n{newsletter_link}"
+        
+        return content
+    
+    def generate_platform(self, newsletter_content, platform, system_prompt=None):
+        """Generate the post for a single platform section; returns (text, usage)"""
+        if system_prompt is None:
+            system_prompt = self.load_prompt()
+        
+        user_message = f"Newsletter Content:\n\n{newsletter_content}\n\n"
+        user_message += (
+            f"Generate ONLY the \"{platform}\" section, following the exact format and voice guidelines "
+            "for that platform. Do not include a heading, other platforms, or the newsletter link."
+        )
+        
+        text, usage = self._complete(system_prompt, user_message)
+        return text.strip(), usage
+    
+    def generate_fanout(self, newsletter_content, newsletter_link=None, has_video=False, timer=None):
+        """
+        Generate every platform section concurrently and assemble them in prompt order
+        
+        Every section resends the system prompt and newsletter, so the calls go
+        through a GenerationPool: workers and requests/tokens per minute come
+        from config/rate_limits.json, and 429s are retried with backoff.
+        
+        Args:
+            newsletter_content: Finalized newsletter text
+            newsletter_link: Optional link appended once at the end
+            has_video: Include TikTok and YouTube sections
+            timer: Optional StageTimer that receives one stage per platform
+        
+        Returns:
+            Assembled social content, same layout as generate()
+        """
+        platforms = PLATFORMS + (VIDEO_PLATFORMS if has_video else [])
+        system_prompt = self.load_prompt()
+        
+        reserve = estimate_tokens(system_prompt) + estimate_tokens(newsletter_content) + SECTION_COMPLETION_TOKENS
+        
+        with GenerationPool() as pool:
+            def run(platform):
+                start = time.perf_counter()
+                try:
+                    return pool.call(self.generate_platform, newsletter_content, platform, system_prompt, estimated_tokens=reserve)
+                finally:
+                    if timer is not None:
+                        timer.record(platform, start, time.perf_counter(), parent="social")
+            
+            futures = [pool.submit(run, platform) for platform in platforms]
+            results = [future.result() for future in futures]
+        
+        # Summed here, after the join - the platform threads don't share state
+        sections = [text for text, _ in results]
+        usages = [usage for _, usage in results]
+        self.last_usage = {key: sum(u[key] for u in usages) for key in usages[0]}
+        
+        content = "\n\n".join(
+            f"{i}. {platform}\n\n{section}"
+            for i, (platform, section) in enumerate(zip(platforms, sections), 1)
+        )
         
         if newsletter_link:
             content += f"\n\nNewsletter Link:\n{newsletter_link}"
@@ -88,8 +172,9 @@ class SocialGenerator:
     
     def save_social_content(self, content, filename=None):
         if filename is None:
-            today = datetime.now()
-            filename = f"social_{today.strftime('%Y%m%d')}.txt"
+            # Regular saves go to the deduplicated archive
+            entry = get_archive().put("social", content, template_version=self.template_version)
+            return f"archive:{entry['id']}"
         
         output_dir = os.path.join(os.path.dirname(__file__), "..", "output", "social")
         os.makedirs(output_dir, exist_ok=True)
@@ -1,26 +1,75 @@
 import os
+import asyncio
 from datetime import datetime
-from openai import OpenAI
+from src.providers import get_openai_client, get_async_openai_client, GROQ_BASE_URL
+from src.debug_logger import logger
+from src.archive import get_archive
+from src.prompt_registry import get_prompt_registry
+from src.single_flight import fingerprint
+from src.length_model import get_length_model
 
 class SocialGenerator:
     def __init__(self):
         # Hardcoded Groq configuration - completely free
-        self.client = OpenAI(
-            api_key=os.getenv("GROQ_API_KEY", "gsk_demo_key_placeholder"),
-            base_url="https://api.groq.com/openai/v1"
-        )
+        self.api_key = os.getenv("GROQ_API_KEY", "gsk_demo_key_placeholder")
+        self.client = get_openai_client(api_key=self.api_key, base_url=GROQ_BASE_URL)
         self.model = "llama-3.3-70b-versatile"
         self.provider = "groq"
         
         self.prompt_path = os.path.join(os.path.dirname(__file__), "..", "prompts", "social_prompt.txt")
+        self.prompts = get_prompt_registry()
         
+    @property
+    def async_client(self):
+        """AsyncOpenAI client for the async serving mode (asgi_app.py)"""
+        return get_async_openai_client(api_key=self.api_key, base_url=GROQ_BASE_URL)
+    
     def load_prompt(self):
-        with open(self.prompt_path, 'r') as f:
-            return f.read()
+        return self.prompts.get("social").text
+    
+    def fingerprint(self, newsletter_content, newsletter_link=None, has_video=False):
+        """Key identifying one generation request - identical keys can share a single LLM call"""
+        return fingerprint(
+            mode="social",
+            model=self.model,
+            prompt=self.prompts.get("social").version,
+            newsletter_content=newsletter_content,
+            newsletter_link=newsletter_link,
+            has_video=has_video
+        )
+    
+    def generate_social_content(self, newsletter_content, newsletter_link=None, has_video=False, date=None):
+        template = self.prompts.get("social")
+        
+        try:
+            response = self.client.chat.completions.create(
+                **self._completion_args(template, newsletter_content, newsletter_link, has_video)
+            )
+            
+            social_content = response.choices[0].message.content
+            
+            return self._finish(social_content, template, newsletter_link, has_video, date)
+            
+        except Exception as e:
+            raise Exception(f"Error generating social content: {str(e)}") from e
     
-    def generate_social_content(self, newsletter_content, newsletter_link=None, has_video=False):
-        prompt_template = self.load_prompt()
+    async def agenerate_social_content(self, newsletter_content, newsletter_link=None, has_video=False, date=None):
+        """generate_social_content() on the async client"""
+        template = self.prompts.get("social")
         
+        try:
+            response = await self.async_client.chat.completions.create(
+                **self._completion_args(template, newsletter_content, newsletter_link, has_video)
+            )
+            
+            social_content = response.choices[0].message.content
+            
+            return await asyncio.to_thread(self._finish, social_content, template, newsletter_link, has_video, date)
+            
+        except Exception as e:
+            raise Exception(f"Error generating social content: {str(e)}") from e
+    
+    def _completion_args(self, template, newsletter_content, newsletter_link, has_video):
         user_message = f"""Newsletter Content:
 {newsletter_content}"""
         
@@ -30,38 +79,33 @@ class SocialGenerator:
         if has_video:
             user_message += "\n\nNote: Video content available for TikTok/YouTube"
         
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": template.text},
+                {"role": "user", "content": user_message}
+            ],
+            'temperature': 0.7,
+            'max_tokens': get_length_model().max_tokens("social")
+        }
+    
+    def _finish(self, social_content, template, newsletter_link, has_video, date):
+        # Archive (deduplicated, compressed) through the configured storage backend
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": prompt_template},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7,
-                max_tokens=2000
+            entry = get_archive().put(
+                "social",
+                social_content,
+                date=date,
+                template_version=template.version,
+                params={'newsletter_link': newsletter_link, 'has_video': has_video}
             )
-            
-            social_content = response.choices[0].message.content
-            
-            # Save to file (skip in serverless environments like Vercel)
+            filepath = f"archive:{entry['id']}"
+        except OSError as e:
+            logger.log("SAVE FAILED", str(e), "basic", force=True)
             filepath = None
-            try:
-                output_dir = os.path.join(os.path.dirname(__file__), "..", "output", "social")
-                os.makedirs(output_dir, exist_ok=True)
-                
-                filename = f"social_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-                filepath = os.path.join(output_dir, filename)
-                
-                with open(filepath, 'w') as f:
-                    f.write(social_content)
-            except (OSError, PermissionError):
-                # Read-only filesystem (Vercel) - skip file saving
-                filepath = "Not saved (serverless environment)"
-            
-            return {
-                'social_content': social_content,
-                'filepath': filepath or "Not saved"
-            }
-            
-        except Exception as e:
-            raise Exception(f"Error generating social content: {str(e)}")
+        
+        return {
+            'social_content': social_content,
+            'filepath': filepath or "Not saved",
+            'template_version': template.version
+        }
@@ -0,0 +1,499 @@
+"""
+Storage - Pluggable persistence for generated output, prompts and memory
+Keys are repo-relative paths ("output/newsletters/x.txt", "memory/personality.json")
+so the local backend keeps today's layout on disk
+
+Backends:
+    local   - files under the repo (default when the repo is writable)
+    tmp     - /tmp write-through cache in front of the repo (default on read-only
+              serverless filesystems like Vercel)
+    sqlite  - single-file SQLite store (ZABAL_STORAGE_PATH)
+    memory  - in-process dict, for tests and dry runs
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from src.debug_logger import logger
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive flock on path, held across processes (a no-op without fcntl)"""
+    if not FCNTL_AVAILABLE:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class Storage:
+    """Base interface - backends implement the bytes methods, text comes for free"""
+
+    def read_bytes(self, key):
+        raise NotImplementedError
+
+    def write_bytes(self, key, data):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def list(self, prefix=""):
+        """Keys under prefix, sorted"""
+        raise NotImplementedError
+
+    def stamp(self, key):
+        """Cheap change marker for key (None if missing) - used to validate caches"""
+        raise NotImplementedError
+
+    def location(self, key):
+        """Human-readable location reported back to the UI/CLI"""
+        return key
+
+    def exists(self, key):
+        return self.stamp(key) is not None
+
+    def read(self, key):
+        return self.read_bytes(key).decode("utf-8")
+
+    def write(self, key, content):
+        self.write_bytes(key, content.encode("utf-8"))
+        return self.location(key)
+
+    def write_many(self, items):
+        """Write several {key: bytes} at once (backends may do it in one transaction)"""
+        for key, data in items.items():
+            self.write_bytes(key, data)
+
+    @contextmanager
+    def batch(self):
+        """Group writes - plain backends just write immediately"""
+        yield self
+
+    @contextmanager
+    def lock(self, key):
+        """
+        Hold key for a read-modify-write shared with other processes (the CLI
+        and the web app) - in-process backends have nothing to coordinate
+        """
+        yield self
+
+
+class LocalStorage(Storage):
+    def __init__(self, root=REPO_ROOT):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def read_bytes(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(key)
+
+    def write_bytes(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write-then-rename so readers never see a half-written file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix=""):
+        directory = prefix.rpartition("/")[0]
+        base = self._path(directory) if directory else self.root
+        if not os.path.isdir(base):
+            return []
+
+        keys = []
+        for dirpath, _, filenames in os.walk(base):
+            rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+            for filename in filenames:
+                if filename.endswith((".tmp", ".lock")):
+                    continue
+                key = filename if rel_dir == "." else f"{rel_dir}/{filename}"
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def stamp(self, key):
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def location(self, key):
+        return self._path(key)
+
+    @contextmanager
+    def lock(self, key):
+        with file_lock(self._path(key) + ".lock"):
+            yield self
+
+
+class MemoryStorage(Storage):
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.data = {}
+        self.stamps = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def read_bytes(self, key):
+        with self._lock:
+            if key in self.data:
+                return self.data[key]
+        if self.seed is not None:
+            return self.seed.read_bytes(key)
+        raise KeyError(key)
+
+    def write_bytes(self, key, data):
+        with self._lock:
+            self._counter += 1
+            self.data[key] = bytes(data)
+            self.stamps[key] = self._counter
+
+    def delete(self, key):
+        with self._lock:
+            self.data.pop(key, None)
+            self.stamps.pop(key, None)
+
+    def list(self, prefix=""):
+        with self._lock:
+            keys = {k for k in self.data if k.startswith(prefix)}
+        if self.seed is not None:
+            keys.update(self.seed.list(prefix))
+        return sorted(keys)
+
+    def stamp(self, key):
+        with self._lock:
+            if key in self.stamps:
+                return ("memory", self.stamps[key])
+        if self.seed is not None:
+            return self.seed.stamp(key)
+        return None
+
+    def location(self, key):
+        return f"memory://{key}"
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path, seed=None):
+        self.path = path
+        self.seed = seed
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    key TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    updated INTEGER NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        # One connection per thread; WAL lets readers run while a write commits
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def read_bytes(self, key):
+        row = self._connect().execute("SELECT data FROM files WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return bytes(row[0])
+        if self.seed is not None:
+            return self.seed.read_bytes(key)
+        raise KeyError(key)
+
+    def write_bytes(self, key, data):
+        self.write_many({key: data})
+
+    def write_many(self, items):
+        now = time.time_ns()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (key, data, updated) VALUES (?, ?, ?)",
+                [(key, sqlite3.Binary(data), now) for key, data in items.items()]
+            )
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files WHERE key = ?", (key,))
+
+    def list(self, prefix=""):
+        # Escape LIKE wildcards so "_" in filenames doesn't match anything
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        rows = self._connect().execute(
+            "SELECT key FROM files WHERE key LIKE ? ESCAPE '\\'", (pattern,)
+        ).fetchall()
+        keys = {row[0] for row in rows}
+        if self.seed is not None:
+            keys.update(self.seed.list(prefix))
+        return sorted(keys)
+
+    def stamp(self, key):
+        row = self._connect().execute("SELECT updated FROM files WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return ("sqlite", row[0])
+        if self.seed is not None:
+            return self.seed.stamp(key)
+        return None
+
+    def location(self, key):
+        return f"sqlite://{self.path}#{key}"
+
+    @contextmanager
+    def lock(self, key):
+        with file_lock(f"{self.path}.{key.replace('/', '_')}.lock"):
+            yield self
+
+
+class TmpCacheStorage(Storage):
+    """
+    Write-through cache: every write lands in /tmp (always writable) and is
+    then attempted against the base store; reads prefer the /tmp copy
+    """
+
+    def __init__(self, base, cache_dir=None):
+        self.base = base
+        self.cache = LocalStorage(cache_dir or os.path.join("/tmp", "zabal"))
+        self.base_writable = True
+
+    def read_bytes(self, key):
+        try:
+            return self.cache.read_bytes(key)
+        except KeyError:
+            return self.base.read_bytes(key)
+
+    def write_bytes(self, key, data):
+        self.cache.write_bytes(key, data)
+
+        if self.base_writable:
+            try:
+                self.base.write_bytes(key, data)
+            except OSError as e:
+                # Read-only filesystem (Vercel) - keep serving from /tmp
+                self.base_writable = False
+                logger.log("STORAGE", f"Base store is read-only ({e}); writes stay in {self.cache.root}", "basic", force=True)
+
+    def delete(self, key):
+        self.cache.delete(key)
+        if self.base_writable:
+            try:
+                self.base.delete(key)
+            except OSError:
+                pass
+
+    def list(self, prefix=""):
+        return sorted(set(self.cache.list(prefix)) | set(self.base.list(prefix)))
+
+    def stamp(self, key):
+        return self.cache.stamp(key) or self.base.stamp(key)
+
+    def location(self, key):
+        if self.cache.exists(key):
+            return self.cache.location(key)
+        return self.base.location(key)
+
+    @contextmanager
+    def lock(self, key):
+        # Every process on this host writes through the same /tmp cache
+        with self.cache.lock(key):
+            yield self
+
+
+class CachedStorage(Storage):
+    """
+    Read cache and write batching in front of any backend
+
+    Reads are served from memory while the backend's stamp() is unchanged, so
+    repeated history listings and memory loads only cost a stat/lookup.
+    Inside `with storage.batch():` writes are buffered per thread and flushed
+    together through write_many().
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _pending(self):
+        return getattr(self._local, "pending", None)
+
+    @contextmanager
+    def batch(self):
+        outer = self._pending() is not None
+        if not outer:
+            self._local.pending = {}
+        try:
+            yield self
+        finally:
+            if not outer:
+                pending = self._local.pending
+                self._local.pending = None
+                if pending:
+                    self.backend.write_many(pending)
+                    self._invalidate(pending)
+
+    def _invalidate(self, keys):
+        with self._lock:
+            for key in keys:
+                self._cache.pop(key, None)
+
+    def read_bytes(self, key):
+        pending = self._pending()
+        if pending and key in pending:
+            return pending[key]
+
+        stamp = self.backend.stamp(key)
+        if stamp is None:
+            raise KeyError(key)
+
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        data = self.backend.read_bytes(key)
+        with self._lock:
+            self._cache[key] = (stamp, data)
+        return data
+
+    def write_bytes(self, key, data):
+        pending = self._pending()
+        if pending is not None:
+            pending[key] = data
+            return
+
+        self.backend.write_bytes(key, data)
+        self._invalidate([key])
+
+    def write_many(self, items):
+        pending = self._pending()
+        if pending is not None:
+            pending.update(items)
+            return
+
+        self.backend.write_many(items)
+        self._invalidate(items)
+
+    def delete(self, key):
+        pending = self._pending()
+        if pending:
+            pending.pop(key, None)
+        self.backend.delete(key)
+        self._invalidate([key])
+
+    def list(self, prefix=""):
+        keys = set(self.backend.list(prefix))
+        pending = self._pending()
+        if pending:
+            keys.update(k for k in pending if k.startswith(prefix))
+        return sorted(keys)
+
+    def stamp(self, key):
+        pending = self._pending()
+        if pending and key in pending:
+            return ("pending", id(pending[key]))
+        return self.backend.stamp(key)
+
+    def location(self, key):
+        return self.backend.location(key)
+
+    @contextmanager
+    def lock(self, key):
+        with self.backend.lock(key):
+            yield self
+
+
+def _repo_writable():
+    return os.access(REPO_ROOT, os.W_OK)
+
+
+def create_storage(kind=None):
+    """
+    Build a storage backend
+
+    Args:
+        kind: "local", "tmp", "sqlite", "memory" or "auto" (default: ZABAL_STORAGE env, else auto)
+
+    Returns:
+        CachedStorage wrapping the chosen backend
+    """
+    kind = (kind or os.getenv("ZABAL_STORAGE", "auto")).lower()
+    repo = LocalStorage(REPO_ROOT)
+
+    if kind == "auto":
+        kind = "local" if _repo_writable() else "tmp"
+
+    if kind == "local":
+        backend = repo
+    elif kind == "tmp":
+        backend = TmpCacheStorage(repo, os.getenv("ZABAL_TMP_DIR"))
+    elif kind == "sqlite":
+        default_path = os.path.join(REPO_ROOT if _repo_writable() else "/tmp", "output", "zabal.db")
+        backend = SQLiteStorage(os.getenv("ZABAL_STORAGE_PATH", default_path), seed=repo)
+    elif kind == "memory":
+        backend = MemoryStorage(seed=repo)
+    else:
+        raise ValueError(f"Unknown storage backend: {kind}")
+
+    return CachedStorage(backend)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Shared storage for this process (built on first use)"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+        return _storage
+
+
+def set_storage(storage):
+    """Swap the shared storage (e.g. MemoryStorage in tests)"""
+    global _storage
+    with _storage_lock:
+        _storage = storage
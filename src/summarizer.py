@@ -0,0 +1,237 @@
+"""
+Input Summarizer - Extractive compression of oversized daily inputs
+A pasted journal dump can run to thousands of tokens. Above a threshold, the
+input is cut down to its most salient sentences before prompting: sentences
+are TF-IDF vectors, ranked with TextRank (PageRank over their cosine
+similarity graph), and the top ones are kept, in their original order, until
+the target size is reached. A single sentence bigger than the whole target
+(a run-on dump with no full stops) is ranked clause by clause. Runs locally
+in milliseconds; NumPy is used when installed, with a pure-Python fallback.
+
+Thresholds (in estimated tokens) come from the environment:
+    ZABAL_COMPRESS_TOKENS   compress inputs above this (default 1200, 0 disables)
+    ZABAL_COMPRESS_TARGET   size to compress down to (default 600)
+"""
+
+import os
+import re
+import math
+import importlib.util
+from collections import Counter
+from src.rule_engine import Document, Span
+from src.generation_pool import estimate_tokens
+
+# Checked without importing - NumPy is only loaded the first time an input
+# actually needs compressing, so it stays off the cold-start path
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+DEFAULT_THRESHOLD_TOKENS = 1200
+DEFAULT_TARGET_TOKENS = 600
+
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+# A sentence this similar (cosine) to one already kept adds nothing new
+REDUNDANCY_THRESHOLD = 0.8
+
+# Where an over-long sentence is cut into clauses
+CLAUSE_BREAK = re.compile(r"[,;:]\s+|\s+[-–—]+\s+")
+
+WORD = re.compile(r"[a-z0-9']{2,}")
+STOPWORDS = {
+    "the", "and", "a", "an", "to", "of", "in", "on", "for", "with", "at", "by", "from", "as",
+    "is", "was", "are", "were", "be", "been", "it", "its", "this", "that", "these", "those",
+    "i", "me", "my", "we", "our", "you", "your", "he", "she", "they", "them", "their",
+    "but", "or", "so", "if", "then", "than", "too", "very", "just", "not", "no", "do", "did",
+    "have", "has", "had", "will", "would", "could", "should", "can", "about", "into", "out",
+    "up", "down", "over", "again", "there", "here", "what", "which", "who", "when", "where",
+    "how", "all", "some", "more", "most", "also", "really", "got", "get", "i'm", "it's"
+}
+
+
+def thresholds():
+    """(threshold_tokens, target_tokens) from the environment"""
+    threshold = int(os.getenv("ZABAL_COMPRESS_TOKENS", DEFAULT_THRESHOLD_TOKENS))
+    target = int(os.getenv("ZABAL_COMPRESS_TARGET", DEFAULT_TARGET_TOKENS))
+    return threshold, (min(target, threshold) if threshold > 0 else target)
+
+
+def _terms(sentence):
+    return [word for word in WORD.findall(sentence.lower()) if word not in STOPWORDS]
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b[t] for t, w in a.items() if t in b)
+
+
+def _tfidf(sentences):
+    """One {term: weight} vector per sentence, L2-normalized"""
+    counts = [Counter(_terms(s)) for s in sentences]
+    document_frequency = Counter(term for c in counts for term in c)
+    n = len(sentences)
+    vectors = []
+    for c in counts:
+        vector = {term: (1 + math.log(tf)) * math.log((1 + n) / (1 + document_frequency[term])) + 1e-9 for term, tf in c.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        vectors.append({term: w / norm for term, w in vector.items()})
+    return vectors
+
+
+def _textrank_numpy(vectors):
+    import numpy as np
+
+    vocabulary = {term: i for i, term in enumerate({t for v in vectors for t in v})}
+    matrix = np.zeros((len(vectors), max(1, len(vocabulary))))
+    for row, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            matrix[row, vocabulary[term]] = weight
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    out_weight[out_weight == 0] = 1.0
+    transition = (similarity / out_weight).T
+
+    n = len(vectors)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * transition @ scores
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            scores = updated
+            break
+        scores = updated
+    return scores.tolist()
+
+
+def _textrank_python(vectors):
+    n = len(vectors)
+    # Sparse similarity graph: neighbours[i] = [(j, similarity)]
+    neighbours = [[] for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            value = _cosine(vectors[i], vectors[j])
+            if value > 0:
+                neighbours[i].append((j, value))
+                neighbours[j].append((i, value))
+    out_weight = [sum(value for _, value in edges) or 1.0 for edges in neighbours]
+    incoming = [[(j, value / out_weight[j]) for j, value in edges] for edges in neighbours]
+
+    scores = [1.0 / n] * n
+    for _ in range(MAX_ITERATIONS):
+        updated = [(1 - DAMPING) / n + DAMPING * sum(weight * scores[j] for j, weight in edges) for edges in incoming]
+        delta = sum(abs(u - s) for u, s in zip(updated, scores))
+        scores = updated
+        if delta < TOLERANCE:
+            break
+    return scores
+
+
+def textrank(vectors):
+    """TextRank score per sentence vector (higher is more central)"""
+    if len(vectors) < 2:
+        return [1.0] * len(vectors)
+    return _textrank_numpy(vectors) if NUMPY_AVAILABLE else _textrank_python(vectors)
+
+
+def _clauses(span):
+    """Split an over-long sentence at clause punctuation (, ; : and dashes)"""
+    parts = []
+    start = 0
+    for match in CLAUSE_BREAK.finditer(span.text):
+        # Each clause keeps its trailing punctuation so kept clauses still read
+        if span.text[start:match.start()].strip():
+            parts.append(Span(span.start + start, span.start + match.end(), span.text[start:match.end()].strip()))
+        start = match.end()
+    if span.text[start:].strip():
+        parts.append(Span(span.start + start, span.end, span.text[start:].strip()))
+    return parts
+
+
+def _units(doc, target_tokens):
+    """
+    (span, line number) pairs to rank: the document's sentences, with any
+    sentence that's bigger than the whole target split into clauses
+    """
+    units = []
+    for number, line in enumerate(doc.lines):
+        for span in line["sentences"]:
+            if estimate_tokens(span.text) > target_tokens:
+                units.extend((clause, number) for clause in _clauses(span))
+            else:
+                units.append((span, number))
+    return units
+
+
+def compress(text, threshold_tokens=None, target_tokens=None):
+    """
+    Compress text to its most salient sentences if it's over the threshold
+
+    Args:
+        text: Daily input (or Roj context)
+        threshold_tokens: Compress only above this many estimated tokens (default from env)
+        target_tokens: Keep sentences up to about this many tokens (default from env)
+
+    Returns:
+        None if the text is under the threshold, else a dict with the
+        compressed text, original_tokens, compressed_tokens, ratio,
+        sentences_kept, sentences_total and method
+    """
+    default_threshold, default_target = thresholds()
+    threshold_tokens = default_threshold if threshold_tokens is None else threshold_tokens
+    target_tokens = default_target if target_tokens is None else target_tokens
+
+    original_tokens = estimate_tokens(text)
+    if not text or threshold_tokens <= 0 or original_tokens <= threshold_tokens:
+        return None
+
+    units = _units(Document(text), target_tokens)
+    if len(units) < 2:
+        return None
+    spans = [span for span, _ in units]
+
+    vectors = _tfidf([span.text for span in spans])
+    scores = textrank(vectors)
+    ranked = sorted(range(len(spans)), key=lambda i: -scores[i])
+
+    # Most central first, skipping near-repeats of what's already kept
+    keep = set()
+    budget = 0
+    for i in ranked:
+        tokens = estimate_tokens(spans[i].text)
+        if keep and budget + tokens > target_tokens:
+            continue
+        if any(_cosine(vectors[i], vectors[k]) >= REDUNDANCY_THRESHOLD for k in keep):
+            continue
+        keep.add(i)
+        budget += tokens
+
+    # Original order; sentences from the same line stay on one line
+    lines = []
+    last_line = None
+    for i in sorted(keep):
+        line = units[i][1]
+        if lines and line == last_line:
+            lines[-1] += " " + spans[i].text
+        else:
+            lines.append(spans[i].text)
+        last_line = line
+    compressed = "\n".join(lines)
+
+    compressed_tokens = estimate_tokens(compressed)
+    return {
+        "text": compressed,
+        "original_tokens": original_tokens,
+        "compressed_tokens": compressed_tokens,
+        "ratio": round(compressed_tokens / original_tokens, 3),
+        "sentences_kept": len(keep),
+        "sentences_total": len(spans),
+        "method": "textrank-numpy" if NUMPY_AVAILABLE else "textrank"
+    }
+
+
+def compression_stats(compression):
+    """{name: compress() result without the text} for results and the archive"""
+    return {name: {k: v for k, v in result.items() if k != "text"} for name, result in (compression or {}).items()}
@@ -0,0 +1,63 @@
+"""
+Stage Timer - Wall-clock timing for multi-stage generation runs
+Stages may overlap (pipelined work), so offsets are kept relative to one origin
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+class StageTimer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, parent=None):
+        """Time the enclosed block as a named stage (optionally nested under parent)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), parent)
+
+    def record(self, name, start, end, parent=None):
+        """Record a stage from perf_counter() start/end values (thread-safe)"""
+        with self._lock:
+            self.stages.append({
+                "name": name,
+                "parent": parent,
+                "start": start - self.origin,
+                "seconds": end - start
+            })
+
+    def wall_time(self):
+        """Seconds from origin to the end of the last finished stage"""
+        with self._lock:
+            if not self.stages:
+                return 0.0
+            return max(s["start"] + s["seconds"] for s in self.stages)
+
+    def summary(self):
+        """
+        Get stage breakdown ordered by start offset
+
+        Nested stages are listed but only top-level stages count towards
+        serial_seconds, so overlap is what pipelining actually saved.
+
+        Returns:
+            dict with stages, wall_seconds, serial_seconds and overlap_seconds
+        """
+        with self._lock:
+            stages = sorted(self.stages, key=lambda s: s["start"])
+
+        wall = self.wall_time()
+        serial = sum(s["seconds"] for s in stages if s["parent"] is None)
+
+        return {
+            "stages": stages,
+            "wall_seconds": wall,
+            "serial_seconds": serial,
+            "overlap_seconds": max(0.0, serial - wall)
+        }
@@ -0,0 +1,145 @@
+"""
+Warmup - Preload everything the first generation would otherwise pay for
+Parses the lens registry, compiles the editorial rule engines, loads both
+prompt templates and assembles the stable prompt prefix, fits the length
+model, and opens pooled connections to the provider, so the first request
+after a deploy or cold start runs as fast as the hundredth
+
+Runs in a background thread (off the import path); /readyz reports when it's done
+"""
+
+import os
+import time
+import threading
+from src.debug_logger import logger
+from src.timing import StageTimer
+
+# Connection warmup is one cheap request; don't let a slow provider hold readiness forever
+CONNECT_TIMEOUT_SECONDS = 5
+
+
+def connect(client):
+    """
+    Open (and pool) a connection to an OpenAI-compatible provider
+
+    Any HTTP answer means DNS, TCP and TLS are done, so a 401 from a
+    placeholder key still counts as warm.
+    """
+    try:
+        client.with_options(timeout=CONNECT_TIMEOUT_SECONDS, max_retries=0).models.list()
+    except Exception as e:
+        if getattr(e, "status_code", None) is None:
+            raise
+
+
+async def aconnect(client):
+    """connect() for an AsyncOpenAI client (asgi_app.py, inside the serving loop)"""
+    try:
+        await client.with_options(timeout=CONNECT_TIMEOUT_SECONDS, max_retries=0).models.list()
+    except Exception as e:
+        if getattr(e, "status_code", None) is None:
+            raise
+
+
+class Warmup:
+    def __init__(self):
+        self.ready = threading.Event()
+        self.started = None
+        self.seconds = None
+        self.stages = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def steps(self):
+        """(name, callable) pairs in run order"""
+        return [
+            ("config", self._config),
+            ("lenses", self._lenses),
+            ("rules", self._rules),
+            ("prompts", self._prompts),
+            ("length_model", self._length_model),
+            ("provider", self._provider)
+        ]
+
+    def run(self):
+        """Run every step; a failing step is recorded and the rest still run"""
+        self.started = time.time()
+        timer = StageTimer()
+        for name, step in self.steps():
+            try:
+                with timer.stage(name):
+                    step()
+            except Exception as e:
+                self.errors[name] = str(e)
+                logger.log("WARMUP FAILED", f"{name}: {e}", "basic", force=True)
+
+        self.stages = {stage["name"]: round(stage["seconds"], 3) for stage in timer.summary()["stages"]}
+        self.seconds = round(timer.wall_time(), 3)
+        self.ready.set()
+        logger.log("WARMUP", f"ready in {self.seconds}s ({', '.join(f'{k} {v}s' for k, v in self.stages.items())})", "basic")
+        return self.status()
+
+    def start(self):
+        """Run in a daemon thread (once)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "warmup_seconds": self.seconds,
+            "stages": self.stages,
+            "errors": self.errors
+        }
+
+    # --- Steps --------------------------------------------------------------
+
+    def _config(self):
+        logger.is_enabled("log_prompt_assembly")
+
+    def _lenses(self):
+        from src.lens_selector import LensSelector
+        LensSelector()
+
+    def _rules(self):
+        from src.constitution_checker import get_checker
+        checker = get_checker()
+        for content_type in ("newsletter", "social"):
+            checker.engine(content_type)
+
+    def _prompts(self):
+        from src.prompt_registry import get_prompt_registry
+        from src.memory_manager import MemoryManager
+        registry = get_prompt_registry()
+        registry.get("social")
+        # Builds the memory store and caches the prefix every newsletter request starts with
+        MemoryManager().get_stable_prefix(registry.get("newsletter").text)
+
+    def _length_model(self):
+        from src.length_model import get_length_model
+        get_length_model()
+
+    def _provider(self):
+        from src.providers import get_openai_client, GROQ_BASE_URL
+        connect(get_openai_client(api_key=os.getenv("GROQ_API_KEY", "gsk_demo_key_placeholder"), base_url=GROQ_BASE_URL))
+
+
+_warmup = Warmup()
+
+
+def get_warmup():
+    """Shared warmup state for this process"""
+    return _warmup
+
+
+def start_warmup():
+    """Start the background warmup unless ZABAL_WARMUP=false"""
+    if os.getenv("ZABAL_WARMUP", "true").lower() == "true":
+        _warmup.start()
+    else:
+        _warmup.ready.set()
+    return _warmup
@@ -90,10 +90,8 @@ function resetParameters() {
     }
 }
 
-// Newsletter form submission
-document.getElementById('newsletter-form').addEventListener('submit', async function generateNewsletter(e) {
-    e.preventDefault();
-    
+// Request body for /generate/newsletter (and /generate/prepare) from the form
+function newsletterRequestBody() {
     const dailyInput = document.getElementById('daily-input').value;
     const badassQuote = document.getElementById('badass-quote').value;
     const lensOverride = document.getElementById('lens-override').value;
@@ -112,50 +110,98 @@ document.getElementById('newsletter-form').addEventListener('submit', async func
         personal_universal: parseInt(document.getElementById('personal_universal').value)
     };
     
-    if (!dailyInput) {
+    return {
+        daily_input: dailyInput,
+        badass_quote: badassQuote,
+        lens_override: lensOverride !== 'auto' ? lensOverride : null,
+        roj_context: rojContext || null,
+        editing_instructions: editingInstructions || null,
+        parameters: parameters,
+        candidates: parseInt(document.getElementById('candidates').value)
+    };
+}
+
+// Prepare the prompt while the user types: the server picks the lens and
+// assembles the prompt, and the generate request reuses it by token
+const PREPARE_DEBOUNCE_MS = 600;
+let prepareTimer = null;
+let preparedToken = null;
+
+function schedulePrepare() {
+    clearTimeout(prepareTimer);
+    preparedToken = null;
+    prepareTimer = setTimeout(prepareNewsletter, PREPARE_DEBOUNCE_MS);
+}
+
+async function prepareNewsletter() {
+    const body = newsletterRequestBody();
+    const info = document.getElementById('prepare-info');
+    if (!body.daily_input.trim()) {
+        info.textContent = '';
+        return;
+    }
+    
+    try {
+        const response = await fetch('/generate/prepare', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(body)
+        });
+        const data = await response.json();
+        // Ignore answers for input that has changed since
+        if (!data.success || JSON.stringify(newsletterRequestBody()) !== JSON.stringify(body)) return;
+        
+        preparedToken = data.token;
+        info.textContent = `Lens: ${data.lens.replace(/_/g, ' ')} (${data.lens_reason}) · ~${data.prompt_tokens.toLocaleString()} prompt tokens${compressionText(data.compression)}`;
+        // Tokens expire server-side; drop ours a little earlier
+        setTimeout(() => { if (preparedToken === data.token) preparedToken = null; }, (data.expires_in - 5) * 1000);
+    } catch (error) {
+        // Preparation is only a head start - generation works without it
+    }
+}
+
+document.getElementById('daily-input').addEventListener('input', schedulePrepare);
+['badass-quote', 'roj-context', 'editing-instructions'].forEach(id => {
+    document.getElementById(id).addEventListener('input', schedulePrepare);
+});
+document.getElementById('lens-override').addEventListener('change', schedulePrepare);
+document.getElementById('advanced-params').addEventListener('input', schedulePrepare);
+
+// Newsletter form submission
+document.getElementById('newsletter-form').addEventListener('submit', async function generateNewsletter(e) {
+    e.preventDefault();
+    
+    const body = newsletterRequestBody();
+    
+    if (!body.daily_input) {
         showError('Please enter your daily input');
         return;
     }
     
+    body.prepared_token = preparedToken;
+    
     showLoading(true);
     
     try {
+        if (document.getElementById('speculative-draft').checked) {
+            await generateSpeculative(body);
+            return;
+        }
+        
         const response = await fetch('/generate/newsletter', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                daily_input: dailyInput,
-                badass_quote: badassQuote,
-                lens_override: lensOverride !== 'auto' ? lensOverride : null,
-                roj_context: rojContext || null,
-                editing_instructions: editingInstructions || null,
-                parameters: parameters
-            })
+            body: JSON.stringify(body)
         });
         
         const data = await response.json();
         
         if (data.success) {
-            // Show output
-            document.getElementById('newsletter-output').style.display = 'block';
-            
-            // Display as plain text with preserved formatting
-            const contentDiv = document.getElementById('newsletter-content');
-            contentDiv.textContent = data.newsletter;
-            
-            document.getElementById('day-info').textContent = `Day ${data.day_num} - ${data.date}`;
-            document.getElementById('newsletter-saved').textContent = `✓ Saved to: ${data.filepath}`;
-            
-            // Store for social generation
-            window.currentNewsletter = data.newsletter;
-            
-            // Scroll to output
-            document.getElementById('newsletter-output').scrollIntoView({ behavior: 'smooth', block: 'start' });
-            
-            // Scroll to output
-            document.getElementById('newsletter-output').scrollIntoView({ behavior: 'smooth' });
+            showNewsletter(data);
         } else {
             showError(data.error);
         }
@@ -166,6 +212,178 @@ document.getElementById('newsletter-form').addEventListener('submit', async func
     }
 });
 
+// Display a generated newsletter
+function showNewsletter(data) {
+    // Show output
+    document.getElementById('newsletter-output').style.display = 'block';
+    
+    // Display as plain text with preserved formatting
+    const contentDiv = document.getElementById('newsletter-content');
+    contentDiv.textContent = data.newsletter;
+    contentDiv.style.opacity = '';
+    
+    document.getElementById('day-info').textContent = `Day ${data.day_num} - ${data.date}`;
+    document.getElementById('newsletter-saved').textContent = `✓ Saved to: ${data.filepath}`;
+    const usage = data.usage;
+    const repair = data.repair;
+    const repairPart = repair && repair.tokens_saved
+        ? ` · repaired ${repair.substituted.length + repair.rewritten.length} banned phrase(s) in place (~${repair.tokens_saved} tokens saved)`
+        : '';
+    const compressionPart = compressionText(data.compression);
+    document.getElementById('newsletter-timings').textContent = usage
+        ? `Tokens: ${usage.prompt_tokens} prompt (${usage.cached_tokens} cached) + ${usage.completion_tokens} completion${repairPart}${compressionPart}`
+        : (repairPart + compressionPart).replace(' · ', '');
+    
+    showAlternatives(data);
+    
+    // Store for social generation
+    window.currentNewsletter = data.newsletter;
+    
+    // Scroll to output
+    document.getElementById('newsletter-output').scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+// Edit the newsletter on screen instead of regenerating it (paragraph edits applied server-side)
+async function reviseNewsletter() {
+    const instructions = document.getElementById('revise-instructions').value.trim();
+    if (!window.currentNewsletter || !instructions) {
+        showError('Describe the change you want first');
+        return;
+    }
+    
+    showLoading(true);
+    
+    try {
+        const response = await fetch('/generate/newsletter/revise', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                newsletter: window.currentNewsletter,
+                editing_instructions: instructions,
+                daily_input: document.getElementById('daily-input').value || null
+            })
+        });
+        
+        const data = await response.json();
+        
+        if (data.success) {
+            showNewsletter(data);
+            const revision = data.revision;
+            document.getElementById('newsletter-timings').textContent +=
+                ` · revised ${revision.paragraphs_changed} paragraph(s) with ${revision.output_tokens} output tokens (a full rewrite is ~${revision.regeneration_output_tokens})`;
+            document.getElementById('revise-instructions').value = '';
+        } else {
+            showError(data.error);
+        }
+    } catch (error) {
+        showError('Failed to revise newsletter: ' + error.message);
+    } finally {
+        showLoading(false);
+    }
+}
+
+// " · daily input compressed to 15% (4,239 → 624 tokens)" for oversized inputs, else ''
+function compressionText(compression) {
+    const input = compression && compression.daily_input;
+    if (!input) return '';
+    return ` · daily input compressed to ${Math.round(input.ratio * 100)}% (${input.original_tokens.toLocaleString()} → ${input.compressed_tokens.toLocaleString()} tokens, ${input.sentences_kept}/${input.sentences_total} sentences)`;
+}
+
+// Runners-up from a multi-candidate generation, each swappable into the main view
+function showAlternatives(data) {
+    const container = document.getElementById('newsletter-alternatives');
+    const alternatives = data.alternatives || [];
+    container.style.display = alternatives.length ? 'block' : 'none';
+    if (!alternatives.length) {
+        container.innerHTML = '';
+        return;
+    }
+    
+    container.innerHTML = `<p class="info-text" style="font-size: 0.85rem; color: #666;">Best of ${alternatives.length + 1} (score ${data.score})</p>` +
+        alternatives.map((alt, i) => `
+            <details style="margin-top: 8px;">
+                <summary>Alternative ${i + 1} - score ${alt.score}${alt.issues.length ? ` · ${alt.issues.length} issue(s)` : ''}</summary>
+                <div class="content-box-plain" style="margin-top: 8px;">${escapeHtml(alt.newsletter)}</div>
+                <button type="button" class="btn-secondary" onclick="useAlternative(${i})" style="margin-top: 8px;">Use this version</button>
+            </details>`).join('');
+    window.currentAlternatives = alternatives;
+}
+
+function useAlternative(index) {
+    const alt = window.currentAlternatives[index];
+    document.getElementById('newsletter-content').textContent = alt.newsletter;
+    window.currentNewsletter = alt.newsletter;
+    document.getElementById('newsletter-saved').textContent = 'Alternative selected (not saved - copy it or regenerate)';
+}
+
+// Two-tier generation: show the local draft as soon as it streams in, then swap in the refined version
+async function generateSpeculative(body) {
+    const response = await fetch('/generate/newsletter/speculative', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body)
+    });
+    
+    if (!response.ok) {
+        const data = await response.json();
+        showError(data.error);
+        return;
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) {
+                handleSpeculativeEvent(JSON.parse(line));
+            }
+        }
+    }
+}
+
+function handleSpeculativeEvent(event) {
+    if (event.type === 'draft') {
+        // Let the user read the draft while the large model refines it
+        showLoading(false);
+        document.getElementById('newsletter-output').style.display = 'block';
+        
+        const contentDiv = document.getElementById('newsletter-content');
+        contentDiv.textContent = event.draft;
+        contentDiv.style.opacity = '0.6';
+        
+        document.getElementById('day-info').textContent = `Draft (${event.model}, ${event.seconds}s) - refining...`;
+        document.getElementById('newsletter-saved').textContent = '';
+        document.getElementById('newsletter-timings').textContent = '';
+        document.getElementById('newsletter-output').scrollIntoView({ behavior: 'smooth', block: 'start' });
+    } else if (event.type === 'final') {
+        showNewsletter(event);
+        
+        const t = event.timings;
+        const draftPart = t.draft_error
+            ? `draft skipped (${t.draft_model} unavailable)`
+            : `draft ${t.draft_seconds}s (${t.draft_model})`;
+        const tokens = event.usage ? ` · ${event.usage.cached_tokens}/${event.usage.prompt_tokens} prompt tokens cached` : '';
+        document.getElementById('newsletter-timings').textContent =
+            `⏱ ${draftPart} · refine ${t.refine_seconds}s (${t.refine_model}) · total ${t.total_seconds}s${tokens}`;
+    } else {
+        document.getElementById('newsletter-content').style.opacity = '';
+        showError(event.error);
+    }
+}
+
 // Social form submission
 document.getElementById('social-form').addEventListener('submit', async (e) => {
     e.preventDefault();
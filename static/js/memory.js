@@ -1,15 +1,17 @@
 // Memory & Voice Management
 
-let currentMemory = null;
+// Items per section (each with id and revision) and the store revision they reflect
+let memoryItems = null;
+let memoryRevision = 0;
 
-// Load memory when tab is opened
+// Load memory when tab is opened - only the changes since the last load
 async function loadMemory() {
     try {
-        const response = await fetch('/memory/get');
+        const response = await fetch(`/memory/changes?since=${memoryRevision}`);
         const data = await response.json();
-        
+
         if (data.success) {
-            currentMemory = data.memory;
+            applyMemoryChanges(data);
             displayMemory();
         }
     } catch (error) {
@@ -17,29 +19,95 @@ async function loadMemory() {
     }
 }
 
+// Merge a /memory/changes response into memoryItems
+function applyMemoryChanges(data) {
+    if (data.full || !memoryItems) {
+        memoryItems = data.items;
+    } else {
+        for (const [field, change] of Object.entries(data.changes)) {
+            const items = memoryItems[field] || [];
+            const deleted = new Set(change.delete);
+            const updated = new Map(change.upsert.map(item => [item.id, item]));
+
+            memoryItems[field] = items
+                .filter(item => !deleted.has(item.id) && !updated.has(item.id))
+                .concat(change.upsert)
+                .sort((a, b) => (a.position ?? 0) - (b.position ?? 0) || a.id - b.id);
+        }
+    }
+    memoryRevision = data.revision;
+}
+
 // Display all memory sections
 function displayMemory() {
-    if (!currentMemory) return;
-    
+    if (!memoryItems) return;
+
     displayVoiceExamples();
     displayVoiceDonts();
     displayStyleNotes();
     displayContextMemories();
 }
 
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// Add one item; the server rejects near-duplicates with 409
+async function addMemoryItem(field, body) {
+    const response = await fetch(`/memory/items/${field}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+
+    if (response.status === 409) {
+        alert('Something very similar is already saved.');
+        return false;
+    }
+    if (response.ok) {
+        await loadMemory();
+    }
+    return response.ok;
+}
+
+// Delete one item, only if nobody changed it since we loaded it
+async function removeMemoryItem(field, id) {
+    const item = (memoryItems[field] || []).find(i => i.id === id);
+    if (!item) return;
+
+    try {
+        const response = await fetch(`/memory/items/${field}/${id}`, {
+            method: 'DELETE',
+            headers: { 'If-Match': `"${item.revision}"` }
+        });
+
+        if (response.status === 412) {
+            alert('This item was changed by someone else. Reloaded the latest version.');
+        } else if (!response.ok && response.status !== 404) {
+            alert('Failed to remove item');
+        }
+        await loadMemory();
+    } catch (error) {
+        alert('Failed to remove item');
+    }
+}
+
 // Voice Examples
 function displayVoiceExamples() {
     const container = document.getElementById('voice-examples-list');
-    if (!currentMemory.voice_examples || currentMemory.voice_examples.length === 0) {
+    const examples = memoryItems.voice_examples || [];
+    if (examples.length === 0) {
         container.innerHTML = '<p style="color: #999; font-style: italic;">No voice examples yet. Add your actual writing to help the AI match your style.</p>';
         return;
     }
-    
-    container.innerHTML = currentMemory.voice_examples.map((example, index) => `
+
+    container.innerHTML = examples.map(example => `
         <div class="memory-item">
-            <strong>${example.title}</strong>
-            <p style="margin: 8px 0; color: #666; font-size: 0.9rem;">${example.content.substring(0, 150)}...</p>
-            <button onclick="removeVoiceExample(${index})" class="btn-remove">Remove</button>
+            <strong>${escapeHtml(example.title)}</strong>
+            <p style="margin: 8px 0; color: #666; font-size: 0.9rem;">${escapeHtml(example.content.substring(0, 150))}...</p>
+            <button onclick="removeVoiceExample(${example.id})" class="btn-remove">Remove</button>
         </div>
     `).join('');
 }
@@ -57,98 +125,77 @@ function cancelAddVoiceExample() {
 async function addVoiceExample() {
     const title = document.getElementById('voice-example-title').value;
     const content = document.getElementById('voice-example-content').value;
-    
+
     if (!title || !content) {
         alert('Please fill in both title and content');
         return;
     }
-    
+
     try {
-        const response = await fetch('/memory/add', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                type: 'voice_example',
-                title: title,
-                content: content
-            })
-        });
-        
-        if (response.ok) {
+        if (await addMemoryItem('voice_examples', { title: title, content: content })) {
             cancelAddVoiceExample();
-            await loadMemory();
         }
     } catch (error) {
         alert('Failed to add voice example');
     }
 }
 
-async function removeVoiceExample(index) {
-    currentMemory.voice_examples.splice(index, 1);
-    await saveMemory();
+async function removeVoiceExample(id) {
+    await removeMemoryItem('voice_examples', id);
 }
 
 // Voice Don'ts
 function displayVoiceDonts() {
     const container = document.getElementById('voice-donts-list');
-    if (!currentMemory.voice_donts || currentMemory.voice_donts.length === 0) {
+    const donts = memoryItems.voice_donts || [];
+    if (donts.length === 0) {
         container.innerHTML = '<p style="color: #999; font-style: italic;">No phrases to avoid yet.</p>';
         return;
     }
-    
-    container.innerHTML = '<div class="tags-container">' + 
-        currentMemory.voice_donts.map((phrase, index) => `
+
+    container.innerHTML = '<div class="tags-container">' +
+        donts.map(item => `
             <span class="tag">
-                ${phrase}
-                <button onclick="removeVoiceDont(${index})" class="tag-remove">×</button>
+                ${escapeHtml(item.text)}
+                <button onclick="removeVoiceDont(${item.id})" class="tag-remove">×</button>
             </span>
-        `).join('') + 
+        `).join('') +
         '</div>';
 }
 
 async function addVoiceDont() {
     const input = document.getElementById('voice-dont-input');
     const phrase = input.value.trim();
-    
+
     if (!phrase) return;
-    
+
     try {
-        const response = await fetch('/memory/add', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                type: 'voice_dont',
-                content: phrase
-            })
-        });
-        
-        if (response.ok) {
+        if (await addMemoryItem('voice_donts', { content: phrase })) {
             input.value = '';
-            await loadMemory();
         }
     } catch (error) {
         alert('Failed to add phrase');
     }
 }
 
-async function removeVoiceDont(index) {
-    currentMemory.voice_donts.splice(index, 1);
-    await saveMemory();
+async function removeVoiceDont(id) {
+    await removeMemoryItem('voice_donts', id);
 }
 
 // Style Notes
 function displayStyleNotes() {
     const container = document.getElementById('style-notes-list');
-    if (!currentMemory.style_notes || currentMemory.style_notes.length === 0) {
+    const notes = memoryItems.style_notes || [];
+    if (notes.length === 0) {
         container.innerHTML = '<p style="color: #999; font-style: italic;">No style notes yet.</p>';
         return;
     }
-    
+
     container.innerHTML = '<ul style="list-style: disc; padding-left: 20px;">' +
-        currentMemory.style_notes.map((note, index) => `
+        notes.map(item => `
             <li style="margin: 8px 0;">
-                ${note}
-                <button onclick="removeStyleNote(${index})" class="btn-remove" style="margin-left: 8px;">Remove</button>
+                ${escapeHtml(item.text)}
+                <button onclick="removeStyleNote(${item.id})" class="btn-remove" style="margin-left: 8px;">Remove</button>
             </li>
         `).join('') +
         '</ul>';
@@ -157,46 +204,36 @@ function displayStyleNotes() {
 async function addStyleNote() {
     const input = document.getElementById('style-note-input');
     const note = input.value.trim();
-    
+
     if (!note) return;
-    
+
     try {
-        const response = await fetch('/memory/add', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                type: 'style_note',
-                content: note
-            })
-        });
-        
-        if (response.ok) {
+        if (await addMemoryItem('style_notes', { content: note })) {
             input.value = '';
-            await loadMemory();
         }
     } catch (error) {
         alert('Failed to add style note');
     }
 }
 
-async function removeStyleNote(index) {
-    currentMemory.style_notes.splice(index, 1);
-    await saveMemory();
+async function removeStyleNote(id) {
+    await removeMemoryItem('style_notes', id);
 }
 
 // Context Memories
 function displayContextMemories() {
     const container = document.getElementById('context-memories-list');
-    if (!currentMemory.context_memories || currentMemory.context_memories.length === 0) {
+    const memories = memoryItems.context_memories || [];
+    if (memories.length === 0) {
         container.innerHTML = '<p style="color: #999; font-style: italic;">No context memories yet.</p>';
         return;
     }
-    
+
     container.innerHTML = '<ul style="list-style: disc; padding-left: 20px;">' +
-        currentMemory.context_memories.map((memory, index) => `
+        memories.map(item => `
             <li style="margin: 8px 0;">
-                ${memory}
-                <button onclick="removeContextMemory(${index})" class="btn-remove" style="margin-left: 8px;">Remove</button>
+                ${escapeHtml(item.text)}
+                <button onclick="removeContextMemory(${item.id})" class="btn-remove" style="margin-left: 8px;">Remove</button>
             </li>
         `).join('') +
         '</ul>';
@@ -205,48 +242,20 @@ function displayContextMemories() {
 async function addContextMemory() {
     const input = document.getElementById('context-memory-input');
     const memory = input.value.trim();
-    
+
     if (!memory) return;
-    
+
     try {
-        const response = await fetch('/memory/add', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                type: 'context',
-                content: memory
-            })
-        });
-        
-        if (response.ok) {
+        if (await addMemoryItem('context_memories', { content: memory })) {
             input.value = '';
-            await loadMemory();
         }
     } catch (error) {
         alert('Failed to add context memory');
     }
 }
 
-async function removeContextMemory(index) {
-    currentMemory.context_memories.splice(index, 1);
-    await saveMemory();
-}
-
-// Save entire memory
-async function saveMemory() {
-    try {
-        const response = await fetch('/memory/update', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ memory: currentMemory })
-        });
-        
-        if (response.ok) {
-            await loadMemory();
-        }
-    } catch (error) {
-        alert('Failed to save memory');
-    }
+async function removeContextMemory(id) {
+    await removeMemoryItem('context_memories', id);
 }
 
 // Load memory when memory tab is opened
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app's modules as src.* from the repo root, like web_app.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,141 @@
+"""
+Round trips for the formats memory and generated output are stored in:
+the content-addressed archive (delta chains, legacy .txt migration) and the
+SQLite memory store (revisions, If-Match conflicts, the change log)
+"""
+
+from random import Random
+from datetime import datetime
+
+import pytest
+
+from src import memory_store
+from src.archive import OutputArchive, MAX_DELTA_CHAIN
+from src.memory_store import MemoryStore, ConflictError
+from src.storage import MemoryStorage, CachedStorage
+
+DAY = datetime(2026, 1, 23)
+WORDS = ["ship", "build", "zao", "music", "onchain", "gym", "calm", "fix", "review", "community"]
+
+
+def issue(version):
+    """One paragraph changes per version; the text is varied enough that deltas beat full copies"""
+    random = Random(23)
+    paragraphs = [" ".join(random.choice(WORDS) + str(random.randrange(1000)) for _ in range(40)) for _ in range(20)]
+    paragraphs[version % 20] = f"Paragraph {version % 20} rewritten for version {version}."
+    return "Year of the ZABAL - Day 23\n\n" + "\n\n".join(paragraphs)
+
+
+@pytest.fixture
+def archive():
+    return OutputArchive(CachedStorage(MemoryStorage()))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MemoryStore(str(tmp_path / "personality.db"))
+
+
+def test_archive_round_trip_across_delta_chain(archive):
+    versions = [issue(v) for v in range(MAX_DELTA_CHAIN + 3)]
+    entries = [archive.put("newsletter", text, date=DAY, day_num=23) for text in versions]
+
+    assert [e["version"] for e in entries] == list(range(1, len(versions) + 1))
+    assert any(e["base"] for e in entries)
+    assert max(e["depth"] for e in entries) <= MAX_DELTA_CHAIN
+    for entry, text in zip(entries, versions):
+        assert archive.get(entry["id"]) == text
+
+
+def test_archive_identical_put_returns_existing_entry(archive):
+    first = archive.put("newsletter", issue(1), date=DAY)
+    again = archive.put("newsletter", issue(1), date=DAY)
+
+    assert again["id"] == first["id"]
+    assert len(archive.list(kind="newsletter")) == 1
+
+
+def test_migrate_text_files(archive):
+    storage = archive.storage
+    storage.write("output/newsletters/newsletter_day_23_20260123_080000.txt", issue(1))
+    storage.write("output/newsletters/newsletter_day_23_20260123_090000.txt", issue(2))
+    # Same text as the latest version - links to its entry instead of adding one
+    storage.write("output/newsletters/newsletter_day_23_20260123_093000.txt", issue(2))
+    storage.write("output/social/social_20260123_100000.txt", "1. Twitter (X)\n\nShipped.")
+
+    result = archive.migrate_text_files()
+    assert result == {"imported": 4, "skipped": 0, "deleted": 0}
+    assert archive.get("newsletter_2026-01-23_v2") == issue(2)
+    assert len(archive.list(kind="newsletter")) == 2
+    assert archive.list(kind="social")[0]["date"] == "2026-01-23"
+    assert len(archive.imported_sources()) == 4
+
+    # Second run finds everything already imported
+    assert archive.migrate_text_files() == {"imported": 0, "skipped": 4, "deleted": 0}
+
+
+def test_import_data_noop_keeps_revision(store):
+    store.import_data({"style_notes": ["Short paragraphs."], "voice_donts": ["hustle"], "current_state": {"focus": "ZAO"}})
+    revision = store.revision()
+
+    assert store.import_data(store.export()) == {"added": 0, "removed": 0}
+    assert store.revision() == revision
+
+    memory = store.export()
+    memory["style_notes"].append("One lens per issue.")
+    assert store.import_data(memory) == {"added": 1, "removed": 0}
+    assert store.revision() == revision + 1
+
+
+def test_update_item_conflict(store):
+    item_id = store.add_item("style_notes", "Short paragraphs.")
+    stale = store.get_item("style_notes", item_id)["revision"]
+
+    assert store.update_item("style_notes", item_id, "Shorter paragraphs.", if_revision=stale)
+    with pytest.raises(ConflictError) as error:
+        store.update_item("style_notes", item_id, "Even shorter.", if_revision=stale)
+
+    assert error.value.current_revision == store.get_item("style_notes", item_id)["revision"]
+    assert store.get_item("style_notes", item_id)["text"] == "Shorter paragraphs."
+
+
+def test_delete_item_conflict(store):
+    item_id = store.add_item("voice_donts", "hustle")
+    stale = store.get_item("voice_donts", item_id)["revision"]
+    store.update_item("voice_donts", item_id, "grind")
+
+    with pytest.raises(ConflictError):
+        store.delete_item("voice_donts", item_id, if_revision=stale)
+    assert store.get_item("voice_donts", item_id) is not None
+
+    current = store.get_item("voice_donts", item_id)["revision"]
+    assert store.delete_item("voice_donts", item_id, if_revision=current)
+    assert store.get_item("voice_donts", item_id) is None
+
+
+def test_changes_since(store):
+    start = store.add_item("style_notes", "Short paragraphs.")
+    since = store.revision()
+    added = store.add_item("style_notes", "One lens per issue.")
+    store.delete_item("style_notes", start)
+
+    changes = store.changes_since(since)
+    assert changes["full"] is False
+    assert [item["id"] for item in changes["changes"]["style_notes"]["upsert"]] == [added]
+    assert changes["changes"]["style_notes"]["delete"] == [start]
+
+
+def test_changes_since_truncated_log_returns_full(store, monkeypatch):
+    monkeypatch.setattr(memory_store, "MAX_CHANGES", 3)
+    store.add_item("style_notes", "Note 0")
+    since = store.revision()
+    for i in range(1, 6):
+        store.add_item("style_notes", f"Note {i}")
+
+    changes = store.changes_since(since)
+    assert changes["full"] is True
+    assert len(changes["items"]["style_notes"]) == 6
+
+    # Recent enough revisions are still served from the log
+    recent = store.changes_since(store.revision() - 1)
+    assert recent["full"] is False
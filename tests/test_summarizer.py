@@ -0,0 +1,42 @@
+from src.summarizer import compress
+from src.rule_engine import split_sentences
+
+TOPICS = ["gym", "deploy", "coffee", "review", "design", "walk", "docs", "music", "family", "tests"]
+
+
+def lowercase_dump(count):
+    """A casual journal dump: every sentence starts lowercase"""
+    return " ".join(
+        f"went to the {TOPICS[i % 10]} then worked on {TOPICS[(i * 3) % 10]} and felt {TOPICS[(i * 7) % 10]}."
+        for i in range(count)
+    )
+
+
+def test_lowercase_sentences_are_split():
+    spans = split_sentences("went to the gym. then shipped the fix. felt good.")
+    assert [span.text for span in spans] == ["went to the gym.", "then shipped the fix.", "felt good."]
+
+
+def test_abbreviations_and_ellipses_still_continue():
+    spans = split_sentences("use tools e.g. this one. and then... nothing happened.")
+    assert [span.text for span in spans] == ["use tools e.g. this one.", "and then... nothing happened."]
+
+
+def test_lowercase_dump_is_compressed():
+    result = compress(lowercase_dump(500), threshold_tokens=1200, target_tokens=600)
+    assert result is not None
+    assert result["sentences_total"] == 500
+    assert result["compressed_tokens"] <= 700
+    assert result["ratio"] < 0.2
+
+
+def test_single_run_on_sentence_falls_back_to_clauses():
+    text = ", ".join(f"then i did the {TOPICS[i % 10]} thing with {TOPICS[(i * 3) % 10]}" for i in range(800)) + "."
+    result = compress(text, threshold_tokens=1200, target_tokens=600)
+    assert result is not None
+    assert result["sentences_total"] > 1
+    assert result["compressed_tokens"] <= 700
+
+
+def test_short_input_is_left_alone():
+    assert compress("went to the gym. felt good.", threshold_tokens=1200, target_tokens=600) is None
@@ -49,6 +49,10 @@ def main():
         print("🔇 Quiet mode enabled")
     updater = ZABALContextUpdater()
     
+    if '--compact' in args:
+        compact(updater, dry_run='--dry-run' in args)
+        return
+    
     print("=" * 60)
     print("ZABAL CONTEXT UPDATER")
     print("=" * 60)
@@ -122,5 +126,36 @@ def main():
     
     print("\n✅ Context updated successfully!")
 
+def compact(updater, dry_run=False):
+    """Collapse near-duplicate notes already in personality.json"""
+    from src.memory_manager import MemoryManager
+    
+    print("=" * 60)
+    print("ZABAL MEMORY COMPACTION" + (" (dry run)" if dry_run else ""))
+    print("=" * 60)
+    
+    memory_manager = MemoryManager()
+    report = memory_manager.compact(dry_run=True)
+    
+    if not report:
+        print("\n✅ No near-duplicates found.")
+        return
+    
+    for field, clusters in report.items():
+        print(f"\n{field}:")
+        for group in clusters:
+            print(f"  ✓ keep:   {group['kept']}")
+            for removed in group["removed"]:
+                print(f"    remove: {removed}")
+    
+    if dry_run:
+        return
+    
+    backup_path = updater.backup_current_memory()
+    memory_manager.compact()
+    removed = sum(len(group["removed"]) for clusters in report.values() for group in clusters)
+    print(f"\n💾 Backup saved: {backup_path}")
+    print(f"✅ Removed {removed} near-duplicate item(s)")
+
 if __name__ == "__main__":
     main()
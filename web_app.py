@@ -5,23 +5,135 @@ Simple Flask app for generating newsletters and social content
 """
 
 import os
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify
+import json
+import gzip
+import queue
+import threading
+from flask import Flask, Response, render_template, request, jsonify
 from dotenv import load_dotenv
-from src.newsletter_generator_simple import NewsletterGenerator
+from src.newsletter_generator_simple import NewsletterGenerator, MAX_CANDIDATES
 from src.social_generator_simple import SocialGenerator
-from src.memory_manager import MemoryManager
+from src.storage import get_storage
+from src.archive import get_archive
+from src.backup_store import get_backup_store
+from src.prompt_registry import get_prompt_registry
+from src.single_flight import get_single_flight
+from src.warmup import get_warmup, start_warmup
 
 load_dotenv()
 
 app = Flask(__name__)
-memory_manager = MemoryManager()
+_memory_manager = None
+
+# Preload lenses, rules, prompts and provider connections in the background
+# (ZABAL_WARMUP=false to skip); /readyz turns 200 once it's done
+start_warmup()
+
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
+
+MEMORY_FIELDS = ['voice_examples', 'voice_donts', 'style_notes', 'context_memories', 'current_projects']
+
+@app.after_request
+def gzip_response(response):
+    """Gzip JSON/text responses for clients that accept it"""
+    if (
+        'gzip' not in request.headers.get('Accept-Encoding', '').lower()
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200 or response.status_code >= 300
+        or 'Content-Encoding' in response.headers
+        or not (response.mimetype or '').startswith(('application/json', 'text/'))
+    ):
+        return response
+    
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+    
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Content-Length'] = str(len(response.get_data()))
+    response.vary.add('Accept-Encoding')
+    return response
+
+def if_match_revision():
+    """Revision from an If-Match header ("12" or W/"12"); None if absent or *"""
+    header = (request.headers.get('If-Match') or '').strip()
+    if not header or header == '*':
+        return None
+    if header.startswith('W/'):
+        header = header[2:]
+    try:
+        return int(header.strip('"'))
+    except ValueError:
+        return -1  # unparseable - never matches
+
+def get_memory_manager():
+    """Build the shared MemoryManager on first use so cold starts don't pay for it"""
+    global _memory_manager
+    if _memory_manager is None:
+        from src.memory_manager import MemoryManager
+        _memory_manager = MemoryManager()
+    return _memory_manager
+
+def newsletter_payload(result, coalesced=False):
+    """Response body for a generated newsletter (shared with asgi_app.py)"""
+    payload = {
+        'coalesced': coalesced,
+        'success': True,
+        'newsletter': result['newsletter'],
+        'filepath': result['filepath'],
+        'day_num': result['day_num'],
+        'date': result['date'],
+        'template_version': result['template_version'],
+        'repair': result.get('repair'),
+        'compression': result.get('compression'),
+        'usage': result['usage']
+    }
+    # Multi-candidate generations also return the winner's score and the runners-up
+    if 'alternatives' in result:
+        payload['score'] = result['score']
+        payload['alternatives'] = result['alternatives']
+    # Revisions return the applied paragraph edits
+    if 'edits' in result:
+        payload['edits'] = result['edits']
+        payload['revision'] = result['revision']
+    return payload
+
+def candidate_count(data):
+    """Requested number of candidates, clamped to 1..MAX_CANDIDATES"""
+    try:
+        return max(1, min(int(data.get('candidates') or 1), MAX_CANDIDATES))
+    except (TypeError, ValueError):
+        return 1
+
+def social_payload(result, coalesced=False):
+    """Response body for generated social content (shared with asgi_app.py)"""
+    return {
+        'coalesced': coalesced,
+        'success': True,
+        'social_content': result['social_content'],
+        'filepath': result['filepath'],
+        'template_version': result['template_version']
+    }
 
 @app.route('/')
 def index():
     """Main page"""
     return render_template('index.html')
 
+@app.route('/healthz')
+def healthz():
+    """Liveness - the process is up and serving"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness - 503 until the startup warmup has finished"""
+    status = get_warmup().status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 @app.route('/generate/newsletter', methods=['POST'])
 def generate_newsletter():
     """Generate newsletter from daily input"""
@@ -33,21 +145,123 @@ def generate_newsletter():
         roj_context = data.get('roj_context', '')
         editing_instructions = data.get('editing_instructions', '')
         parameters = data.get('parameters', None)
+        candidates = candidate_count(data)
         
         if not daily_input:
             return jsonify({'error': 'Daily input is required'}), 400
         
-        # Generate newsletter (with optional lens override and parameters)
+        # Generate newsletter (with optional lens override and parameters);
+        # an identical request already in flight is joined instead of repeated
         gen = NewsletterGenerator()
-        result = gen.generate_newsletter(daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters)
+        args = (daily_input, badass_quote, lens_override, roj_context, editing_instructions, parameters)
+        result, coalesced = get_single_flight().do(
+            gen.fingerprint(*args, candidates=candidates),
+            lambda: gen.generate_newsletter(*args, candidates=candidates, prepared=data.get('prepared_token'))
+        )
         
-        return jsonify({
-            'success': True,
-            'newsletter': result['newsletter'],
-            'filepath': result['filepath'],
-            'day_num': result['day_num'],
-            'date': result['date']
-        })
+        return jsonify(newsletter_payload(result, coalesced))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/generate/prepare', methods=['POST'])
+def prepare_newsletter():
+    """
+    Pick the lens and assemble the prompt while the daily input is being typed
+    
+    Takes the same body as /generate/newsletter; returns the predicted lens,
+    the prompt's token estimate and a short-lived token to send back as
+    'prepared_token' with the generate request.
+    """
+    try:
+        data = request.json or {}
+        daily_input = data.get('daily_input', '')
+        
+        if not daily_input:
+            return jsonify({'error': 'Daily input is required'}), 400
+        
+        result = NewsletterGenerator().prepare(
+            daily_input,
+            data.get('badass_quote', ''),
+            data.get('lens_override', None),
+            data.get('roj_context', ''),
+            data.get('editing_instructions', ''),
+            data.get('parameters', None)
+        )
+        
+        return jsonify({'success': True, **result})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/generate/newsletter/speculative', methods=['POST'])
+def generate_newsletter_speculative():
+    """
+    Draft with the small local model, then refine with the large one
+    
+    Streams newline-delimited JSON: a {"type": "draft"} event as soon as the
+    draft is ready, then {"type": "final"} (or {"type": "error"}).
+    """
+    data = request.json or {}
+    daily_input = data.get('daily_input', '')
+    if not daily_input:
+        return jsonify({'error': 'Daily input is required'}), 400
+    
+    events = queue.Queue()
+    
+    def run():
+        try:
+            gen = NewsletterGenerator()
+            
+            def on_draft(draft, seconds):
+                events.put({'type': 'draft', 'draft': draft, 'seconds': round(seconds, 2), 'model': gen.draft_model})
+            
+            args = (
+                daily_input,
+                data.get('badass_quote', ''),
+                data.get('lens_override', None),
+                data.get('roj_context', ''),
+                data.get('editing_instructions', ''),
+                data.get('parameters', None)
+            )
+            result, coalesced = get_single_flight().do(
+                gen.fingerprint(*args, mode="speculative"),
+                lambda: gen.generate_speculative(*args, on_draft=on_draft, prepared=data.get('prepared_token'))
+            )
+            # Joined requests missed the leader's draft event
+            if coalesced and result['draft']:
+                on_draft(result['draft'], result['timings']['draft_seconds'] or 0)
+            events.put({'type': 'final', **newsletter_payload(result, coalesced), 'timings': result['timings']})
+        except Exception as e:
+            events.put({'type': 'error', 'error': str(e)})
+    
+    threading.Thread(target=run, daemon=True).start()
+    
+    def stream():
+        while True:
+            event = events.get()
+            yield json.dumps(event) + "\n"
+            if event['type'] != 'draft':
+                break
+    
+    return Response(stream(), mimetype='application/x-ndjson')
+
+@app.route('/generate/newsletter/revise', methods=['POST'])
+def revise_newsletter():
+    """Apply editing instructions to an existing newsletter as paragraph edits"""
+    try:
+        data = request.json or {}
+        newsletter = data.get('newsletter', '')
+        instructions = data.get('editing_instructions', '')
+        
+        if not newsletter or not instructions:
+            return jsonify({'error': 'Newsletter and editing instructions are required'}), 400
+        
+        gen = NewsletterGenerator()
+        args = (newsletter, instructions, data.get('daily_input') or None, data.get('parameters', None))
+        result, coalesced = get_single_flight().do(gen.revision_fingerprint(*args), lambda: gen.revise(*args))
+        
+        return jsonify(newsletter_payload(result, coalesced))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -64,15 +278,12 @@ def generate_social():
         if not newsletter_content:
             return jsonify({'error': 'Newsletter content is required'}), 400
         
-        # Generate social content
+        # Generate social content (joining an identical request already in flight)
         gen = SocialGenerator()
-        result = gen.generate_social_content(newsletter_content, newsletter_link, has_video)
+        args = (newsletter_content, newsletter_link, has_video)
+        result, coalesced = get_single_flight().do(gen.fingerprint(*args), lambda: gen.generate_social_content(*args))
         
-        return jsonify({
-            'success': True,
-            'social_content': result['social_content'],
-            'filepath': result['filepath']
-        })
+        return jsonify(social_payload(result, coalesced))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -81,22 +292,33 @@ def generate_social():
 def list_newsletters():
     """List all saved newsletters"""
     try:
-        output_dir = os.path.join(os.path.dirname(__file__), "output", "newsletters")
-        if not os.path.exists(output_dir):
-            return jsonify({'newsletters': []})
+        archive = get_archive()
+        entries = archive.list(kind="newsletter")
         
-        files = []
-        for filename in sorted(os.listdir(output_dir), reverse=True):
-            if filename.endswith('.txt'):
-                filepath = os.path.join(output_dir, filename)
-                with open(filepath, 'r') as f:
-                    content = f.read()
-                    # Extract title (first line)
-                    title = content.split('\n')[0] if content else filename
+        files = [{
+            'filename': entry['id'],
+            'title': entry['title'] or entry['id'],
+            'path': f"archive:{entry['id']}",
+            'date': entry['date'],
+            'day_num': entry['day_num'],
+            'version': entry['version'],
+            'lens': entry['lens'],
+            'template_version': entry.get('template_version')
+        } for entry in entries]
+        
+        # Legacy .txt files that haven't been migrated into the archive yet
+        storage = get_storage()
+        migrated = archive.imported_sources()
+        for key in reversed(storage.list("output/newsletters/")):
+            if key.endswith('.txt') and key not in migrated:
+                filename = key.rsplit('/', 1)[-1]
+                content = storage.read(key)
+                # Extract title (first line)
+                title = content.split('\n')[0] if content else filename
                 files.append({
                     'filename': filename,
                     'title': title,
-                    'path': filepath
+                    'path': storage.location(key)
                 })
         
         return jsonify({'newsletters': files})
@@ -106,16 +328,18 @@ def list_newsletters():
 
 @app.route('/history/newsletter/<filename>')
 def get_newsletter(filename):
-    """Get specific newsletter content"""
+    """Get specific newsletter content (archive id or legacy filename)"""
     try:
-        output_dir = os.path.join(os.path.dirname(__file__), "output", "newsletters")
-        filepath = os.path.join(output_dir, filename)
-        
-        if not os.path.exists(filepath):
+        if '/' in filename or filename.startswith('.'):
             return jsonify({'error': 'Newsletter not found'}), 404
         
-        with open(filepath, 'r') as f:
-            content = f.read()
+        try:
+            if filename.endswith('.txt'):
+                content = get_storage().read(f"output/newsletters/{filename}")
+            else:
+                content = get_archive().get(filename)
+        except KeyError:
+            return jsonify({'error': 'Newsletter not found'}), 404
         
         return jsonify({
             'success': True,
@@ -133,18 +357,16 @@ def get_prompt(prompt_type):
         if prompt_type not in ['newsletter', 'social']:
             return jsonify({'error': 'Invalid prompt type'}), 400
         
-        prompt_path = os.path.join(os.path.dirname(__file__), "prompts", f"{prompt_type}_prompt.txt")
-        
-        if not os.path.exists(prompt_path):
+        try:
+            template = get_prompt_registry().get(prompt_type)
+        except KeyError:
             return jsonify({'error': 'Prompt file not found'}), 404
         
-        with open(prompt_path, 'r') as f:
-            content = f.read()
-        
         return jsonify({
             'success': True,
-            'content': content,
-            'type': prompt_type
+            'content': template.text,
+            'type': prompt_type,
+            'version': template.version
         })
     
     except Exception as e:
@@ -217,40 +439,104 @@ def save_prompt():
         if prompt_type not in ['newsletter', 'social']:
             return jsonify({'error': 'Invalid prompt type'}), 400
         
-        # Backup current prompt
-        prompt_path = os.path.join(os.path.dirname(__file__), "prompts", f"{prompt_type}_prompt.txt")
-        backup_dir = os.path.join(os.path.dirname(__file__), "prompts", "backups")
-        os.makedirs(backup_dir, exist_ok=True)
+        storage = get_storage()
+        prompt_key = f"prompts/{prompt_type}_prompt.txt"
         
-        if os.path.exists(prompt_path):
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_path = os.path.join(backup_dir, f"{prompt_type}_prompt_{timestamp}.txt")
-            with open(prompt_path, 'r') as f:
-                backup_content = f.read()
-            with open(backup_path, 'w') as f:
-                f.write(backup_content)
+        # Version the current prompt (skipped if it matches the last backup), then save
+        backup = None
+        if storage.exists(prompt_key):
+            backup = get_backup_store(prompt_type).backup()
+        storage.write(prompt_key, content)
         
-        # Save new prompt
-        with open(prompt_path, 'w') as f:
-            f.write(content)
+        # Swap the new text into the registry now rather than waiting for the watcher
+        template = get_prompt_registry().invalidate(prompt_type, content)
         
         return jsonify({
             'success': True,
             'message': 'Prompt saved successfully',
-            'backup_created': True
+            'backup_created': backup is not None,
+            'backup_version': backup['version'] if backup else None,
+            'version': template.version
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/prompts/versions')
+def list_prompt_versions():
+    """List backed-up versions of a prompt, newest first"""
+    try:
+        prompt_type = request.args.get('type', 'newsletter')
+        if prompt_type not in ['newsletter', 'social']:
+            return jsonify({'error': 'Invalid prompt type'}), 400
+        
+        return jsonify({
+            'success': True,
+            'versions': get_backup_store(prompt_type).list_versions()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/prompts/restore', methods=['POST'])
+def restore_prompt():
+    """Restore a backed-up prompt version (the current prompt is backed up first)"""
+    try:
+        data = request.json
+        prompt_type = data.get('prompt_type', '')
+        version = data.get('version')
+        
+        if prompt_type not in ['newsletter', 'social'] or version is None:
+            return jsonify({'error': 'Missing or invalid fields'}), 400
+        
+        store = get_backup_store(prompt_type)
+        store.restore(version)
+        template = get_prompt_registry().invalidate(prompt_type)
+        return jsonify({
+            'success': True,
+            'message': f'Restored {prompt_type} prompt v{version}',
+            'content': template.text,
+            'version': template.version
+        })
+    except KeyError:
+        return jsonify({'error': f'Unknown version: {version}'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/memory/get')
 def get_memory():
-    """Get all personality memory"""
+    """
+    Get personality memory
+    
+    Without arguments returns the whole memory (personality.json shape).
+    With ?field=<section>&offset=&limit= returns one page of that section,
+    including item ids, timestamps and usage counts.
+    """
     try:
-        memory = memory_manager.load_memory()
+        memory_manager = get_memory_manager()
+        field = request.args.get('field')
+        
+        if field:
+            offset = max(request.args.get('offset', 0, type=int), 0)
+            limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+            try:
+                items = memory_manager.get_items(field, offset=offset, limit=limit)
+                total = memory_manager.store.count(field)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            return jsonify({
+                'success': True,
+                'field': field,
+                'items': items,
+                'offset': offset,
+                'limit': limit,
+                'total': total,
+                'next_offset': offset + len(items) if offset + len(items) < total else None
+            })
+        
         return jsonify({
             'success': True,
-            'memory': memory
+            'memory': memory_manager.load_memory()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -263,21 +549,31 @@ def add_memory():
         memory_type = data.get('type', '')
         content = data.get('content', '')
         
+        memory_manager = get_memory_manager()
+        
         if memory_type == 'voice_example':
             title = data.get('title', '')
-            memory_manager.add_voice_example(title, content)
+            item_id = memory_manager.add_voice_example(title, content)
         elif memory_type == 'style_note':
-            memory_manager.add_style_note(content)
+            item_id = memory_manager.add_style_note(content)
         elif memory_type == 'voice_dont':
-            memory_manager.add_voice_dont(content)
+            item_id = memory_manager.add_voice_dont(content)
         elif memory_type == 'context':
-            memory_manager.add_context_memory(content)
+            item_id = memory_manager.add_context_memory(content)
         else:
             return jsonify({'error': 'Invalid memory type'}), 400
         
+        if item_id is None:
+            return jsonify({
+                'success': False,
+                'duplicate': True,
+                'message': 'Already in memory (near-duplicate of an existing item)'
+            })
+        
         return jsonify({
             'success': True,
-            'message': 'Memory added successfully'
+            'message': 'Memory added successfully',
+            'id': item_id
         })
     
     except Exception as e:
@@ -289,6 +585,15 @@ def update_memory():
     try:
         data = request.json
         memory_data = data.get('memory', {})
+        memory_manager = get_memory_manager()
+        
+        # Whole-memory writes only apply to the revision the client loaded
+        expected = if_match_revision()
+        if expected is not None and expected != memory_manager.store.revision():
+            return jsonify({
+                'error': 'Memory was changed by someone else - reload and try again',
+                'revision': memory_manager.store.revision()
+            }), 412
         
         if memory_manager.save_memory(memory_data):
             return jsonify({
@@ -301,5 +606,86 @@ def update_memory():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/memory/changes')
+def memory_changes():
+    """Items changed since ?since=<revision> (a full snapshot for since=0 or a stale revision)"""
+    try:
+        since = request.args.get('since', 0, type=int)
+        result = get_memory_manager().changes_since(since)
+        response = jsonify({'success': True, **result})
+        response.headers['ETag'] = f'"{result["revision"]}"'
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def memory_item_response(field, item_id, status=200):
+    """JSON for one item with its revision as the ETag"""
+    memory_manager = get_memory_manager()
+    item = memory_manager.store.get_item(field, item_id)
+    response = jsonify({'success': True, 'item': item, 'revision': memory_manager.store.revision()})
+    response.status_code = status
+    response.headers['ETag'] = f'"{item["revision"]}"'
+    return response
+
+@app.route('/memory/items/<field>', methods=['POST'])
+def add_memory_item(field):
+    """Add one item to a memory section"""
+    try:
+        if field not in MEMORY_FIELDS:
+            return jsonify({'error': f'Unknown memory section: {field}'}), 404
+        
+        data = request.json or {}
+        if field == 'voice_examples':
+            value = {'title': data.get('title', '').strip(), 'content': data.get('content', '').strip()}
+            if not value['title'] or not value['content']:
+                return jsonify({'error': 'Missing title or content'}), 400
+        else:
+            value = data.get('content', '').strip()
+            if not value:
+                return jsonify({'error': 'Missing content'}), 400
+        
+        item_id = get_memory_manager().add_item(field, value)
+        if item_id is None:
+            return jsonify({'error': 'Near-duplicate of an existing item', 'duplicate': True}), 409
+        
+        return memory_item_response(field, item_id, status=201)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/memory/items/<field>/<int:item_id>', methods=['PATCH', 'DELETE'])
+def change_memory_item(field, item_id):
+    """Edit or delete one item - send If-Match: "<item revision>" to avoid overwriting someone else's edit"""
+    from src.memory_store import ConflictError
+    
+    try:
+        if field not in MEMORY_FIELDS:
+            return jsonify({'error': f'Unknown memory section: {field}'}), 404
+        
+        memory_manager = get_memory_manager()
+        expected = if_match_revision()
+        
+        if request.method == 'DELETE':
+            if not memory_manager.delete_item(field, item_id, if_revision=expected):
+                return jsonify({'error': 'Item not found'}), 404
+            return jsonify({'success': True, 'revision': memory_manager.store.revision()})
+        
+        data = request.json or {}
+        if field == 'voice_examples':
+            value = {k: v for k, v in data.items() if isinstance(v, str)}
+        else:
+            value = data.get('content', '').strip()
+            if not value:
+                return jsonify({'error': 'Missing content'}), 400
+        
+        if not memory_manager.update_item(field, item_id, value, if_revision=expected):
+            return jsonify({'error': 'Item not found'}), 404
+        return memory_item_response(field, item_id)
+    
+    except ConflictError as e:
+        current = get_memory_manager().store.get_item(field, item_id)
+        return jsonify({'error': str(e), 'conflict': True, 'item': current}), 412
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -4,19 +4,38 @@ import os
 import sys
 import argparse
 from datetime import datetime
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
-from rich.markdown import Markdown
-from rich import print as rprint
-import pyperclip
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from newsletter_generator import NewsletterGenerator
-from social_generator import SocialGenerator
+# rich, pyperclip and the provider SDKs are imported where they're used so
+# `--help` and argument errors don't pay for them
 
-console = Console()
+class _LazyConsole:
+    """Creates the rich Console on first use"""
+    def __init__(self):
+        self._console = None
+    
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+console = _LazyConsole()
+
+def show_panel(content, title):
+    from rich.panel import Panel
+    from rich.markdown import Markdown
+    console.print(Panel(Markdown(content), title=title, border_style="green"))
+
+def show_usage(usage):
+    if usage:
+        cached = f" ({usage['cached_tokens']} cached)" if usage['cached_tokens'] else ""
+        console.print(f"[dim]Tokens: {usage['prompt_tokens']} prompt{cached} + {usage['completion_tokens']} completion[/dim]")
+
+def copy_to_clipboard(content):
+    import pyperclip
+    pyperclip.copy(content)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -43,6 +62,40 @@ def main():
     full_parser.add_argument('--link', '-l', help='Newsletter link URL')
     full_parser.add_argument('--video', '-v', action='store_true', help='Include video platforms (TikTok, YouTube)')
     full_parser.add_argument('--copy', '-c', action='store_true', help='Copy social content to clipboard')
+    full_parser.add_argument('--sequential', action='store_true', help='Wait for the newsletter to be saved before starting social generation')
+    
+    batch_parser = subparsers.add_parser('batch', help='Backfill newsletters for a range of days')
+    batch_parser.add_argument('--input-dir', required=True, help='Folder of daily input files named by date (e.g. 2026-01-23.txt)')
+    batch_parser.add_argument('--from', dest='from_date', help='First date to generate (YYYY-MM-DD)')
+    batch_parser.add_argument('--to', dest='to_date', help='Last date to generate, inclusive (YYYY-MM-DD)')
+    batch_parser.add_argument('--concurrency', '-j', type=int, help='Parallel generations (default from config/rate_limits.json)')
+    batch_parser.add_argument('--social', action='store_true', help='Also generate social content for each day')
+    batch_parser.add_argument('--manifest', help='Manifest/checkpoint path (default output/batch/manifest_<from>_<to>.json)')
+    batch_parser.add_argument('--force', action='store_true', help='Regenerate days already marked done in the manifest')
+    
+    archive_parser = subparsers.add_parser('archive', help='Manage the compressed output archive')
+    archive_parser.add_argument('action', choices=['migrate', 'stats', 'list', 'show', 'lengths'], help='migrate legacy .txt files, show stats, list entries, show one entry, or show the learned max_tokens budgets')
+    archive_parser.add_argument('entry_id', nargs='?', help='Entry id for show (e.g. newsletter_2026-01-23_v2)')
+    archive_parser.add_argument('--kind', help='Filter list by kind (newsletter, social)')
+    archive_parser.add_argument('--delete', action='store_true', help='Delete .txt files after migrating them')
+    
+    backups_parser = subparsers.add_parser('backups', help='List, restore or prune versioned backups of memory and prompts')
+    backups_parser.add_argument('action', choices=['list', 'show', 'restore', 'prune', 'migrate'], help='list versions, show or restore one, apply retention, or import old full-copy backups')
+    backups_parser.add_argument('target', choices=['memory', 'newsletter', 'social'], help='memory (personality.json) or a prompt')
+    backups_parser.add_argument('version', nargs='?', type=int, help='Version number for show/restore')
+    backups_parser.add_argument('--delete', action='store_true', help='Delete old backup files after migrating them')
+    
+    memory_parser = subparsers.add_parser('memory', help='Import/export the SQLite memory store as personality.json')
+    memory_parser.add_argument('action', choices=['stats', 'export', 'import'], help='show section sizes, write personality.json, or load it into the store')
+    memory_parser.add_argument('--file', default='memory/personality.json', help='Storage key of the JSON file (default memory/personality.json)')
+    
+    eval_parser = subparsers.add_parser('eval', help='Compare two newsletter prompt versions over a corpus of daily inputs')
+    eval_parser.add_argument('corpus', nargs='+', help='Daily input files and/or folders of .txt/.md files')
+    eval_parser.add_argument('--a', default='current', help='Prompt A: current, v<N> (a prompt backup) or a file path (default current)')
+    eval_parser.add_argument('--b', required=True, help='Prompt B: current, v<N> or a file path')
+    eval_parser.add_argument('--runs', type=int, default=1, help='Generations per prompt and input (default 1)')
+    eval_parser.add_argument('--concurrency', '-j', type=int, help='Parallel generations (default from config/rate_limits.json)')
+    eval_parser.add_argument('--no-cache', action='store_true', help='Ignore cached responses from earlier runs')
     
     interactive_parser = subparsers.add_parser('interactive', help='Interactive mode (recommended)')
     
@@ -56,8 +109,22 @@ def main():
         run_social(args)
     elif args.command == 'full':
         run_full(args)
+    elif args.command == 'batch':
+        run_batch(args)
+    elif args.command == 'archive':
+        run_archive(args)
+    elif args.command == 'backups':
+        run_backups(args)
+    elif args.command == 'memory':
+        run_memory(args)
+    elif args.command == 'eval':
+        run_eval(args)
 
 def run_interactive():
+    from rich.prompt import Prompt, Confirm
+    from newsletter_generator import NewsletterGenerator
+    from social_generator import SocialGenerator
+    
     console.print("\n[bold cyan]Year of the ZABAL - Content Generator[/bold cyan]\n")
     
     workflow = Prompt.ask(
@@ -99,11 +166,12 @@ def run_interactive():
         
         newsletter_path = gen.save_newsletter(newsletter)
         
-        console.print(Panel(Markdown(newsletter), title="Newsletter Generated", border_style="green"))
+        show_panel(newsletter, "Newsletter Generated")
         console.print(f"\n[green]✓[/green] Saved to: {newsletter_path}")
+        show_usage(gen.last_usage)
         
         if Confirm.ask("\nCopy newsletter to clipboard?"):
-            pyperclip.copy(newsletter)
+            copy_to_clipboard(newsletter)
             console.print("[green]✓[/green] Copied to clipboard!")
     
     if workflow in ["social", "both"]:
@@ -144,16 +212,18 @@ def run_interactive():
         
         social_path = social_gen.save_social_content(social_content)
         
-        console.print(Panel(Markdown(social_content), title="Social Content Generated", border_style="green"))
+        show_panel(social_content, "Social Content Generated")
         console.print(f"\n[green]✓[/green] Saved to: {social_path}")
         
         if Confirm.ask("\nCopy social content to clipboard?"):
-            pyperclip.copy(social_content)
+            copy_to_clipboard(social_content)
             console.print("[green]✓[/green] Copied to clipboard!")
     
     console.print("\n[bold green]Done![/bold green]\n")
 
 def run_newsletter(args):
+    from newsletter_generator import NewsletterGenerator
+    
     daily_input = read_input(args.input)
     badass_quote = args.quote
     
@@ -164,14 +234,17 @@ def run_newsletter(args):
     
     newsletter_path = gen.save_newsletter(newsletter)
     
-    console.print(Panel(Markdown(newsletter), title="Newsletter Generated", border_style="green"))
+    show_panel(newsletter, "Newsletter Generated")
     console.print(f"\n[green]✓[/green] Saved to: {newsletter_path}")
+    show_usage(gen.last_usage)
     
     if args.copy:
-        pyperclip.copy(newsletter)
+        copy_to_clipboard(newsletter)
         console.print("[green]✓[/green] Copied to clipboard!")
 
 def run_social(args):
+    from social_generator import SocialGenerator
+    
     newsletter = read_input(args.newsletter)
     
     console.print("\n[yellow]Generating social content...[/yellow]")
@@ -181,14 +254,85 @@ def run_social(args):
     
     social_path = social_gen.save_social_content(social_content)
     
-    console.print(Panel(Markdown(social_content), title="Social Content Generated", border_style="green"))
+    show_panel(social_content, "Social Content Generated")
     console.print(f"\n[green]✓[/green] Saved to: {social_path}")
     
     if args.copy:
-        pyperclip.copy(social_content)
+        copy_to_clipboard(social_content)
         console.print("[green]✓[/green] Copied to clipboard!")
 
 def run_full(args):
+    if args.sequential:
+        run_full_sequential(args)
+        return
+    
+    from concurrent.futures import ThreadPoolExecutor
+    from newsletter_generator import NewsletterGenerator
+    from social_generator import SocialGenerator
+    from src.timing import StageTimer
+    from src.constitution_checker import validate_output
+    
+    daily_input = read_input(args.input)
+    badass_quote = args.quote
+    timer = StageTimer()
+    
+    console.print("\n[yellow]Generating newsletter...[/yellow]\n")
+    
+    gen = NewsletterGenerator()
+    with timer.stage("newsletter (stream)"):
+        newsletter = gen.generate(
+            daily_input,
+            badass_quote,
+            on_token=lambda text: console.out(text, end="", highlight=False)
+        )
+    console.print()
+    
+    with timer.stage("newsletter (validate)"):
+        newsletter, issues, was_fixed = validate_output(newsletter, "newsletter", auto_fix_enabled=True)
+    
+    # Newsletter body is final - social generation runs while we save and render
+    social_gen = SocialGenerator()
+    
+    def social_stage():
+        with timer.stage("social"):
+            return social_gen.generate_fanout(newsletter, args.link, args.video, timer=timer)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        social_future = executor.submit(social_stage)
+        
+        with timer.stage("newsletter (save)"):
+            newsletter_path = gen.save_newsletter(newsletter)
+        
+        with timer.stage("newsletter (render)"):
+            show_panel(newsletter, "Newsletter Generated")
+        console.print(f"\n[green]✓[/green] Saved to: {newsletter_path}")
+        show_usage(gen.last_usage)
+        
+        if issues:
+            console.print(f"[yellow]![/yellow] {len(issues)} constitution issue(s) remain: {', '.join(issues)}")
+        
+        console.print("\n[yellow]Generating social content...[/yellow]")
+        social_content = social_future.result()
+    
+    with timer.stage("social (save)"):
+        social_path = social_gen.save_social_content(social_content)
+    
+    show_panel(social_content, "Social Content Generated")
+    console.print(f"\n[green]✓[/green] Saved to: {social_path}")
+    show_usage(social_gen.last_usage)
+    
+    if args.copy:
+        copy_to_clipboard(social_content)
+        console.print("[green]✓[/green] Copied to clipboard!")
+    
+    print_timings(timer)
+    
+    console.print("\n[bold green]Done![/bold green]\n")
+
+def run_full_sequential(args):
+    from newsletter_generator import NewsletterGenerator
+    from social_generator import SocialGenerator
+    
     daily_input = read_input(args.input)
     badass_quote = args.quote
     
@@ -199,7 +343,7 @@ def run_full(args):
     
     newsletter_path = gen.save_newsletter(newsletter)
     
-    console.print(Panel(Markdown(newsletter), title="Newsletter Generated", border_style="green"))
+    show_panel(newsletter, "Newsletter Generated")
     console.print(f"\n[green]✓[/green] Saved to: {newsletter_path}")
     
     console.print("\n[yellow]Generating social content...[/yellow]")
@@ -209,15 +353,236 @@ def run_full(args):
     
     social_path = social_gen.save_social_content(social_content)
     
-    console.print(Panel(Markdown(social_content), title="Social Content Generated", border_style="green"))
+    show_panel(social_content, "Social Content Generated")
     console.print(f"\n[green]✓[/green] Saved to: {social_path}")
     
     if args.copy:
-        pyperclip.copy(social_content)
+        copy_to_clipboard(social_content)
         console.print("[green]✓[/green] Copied to clipboard!")
     
     console.print("\n[bold green]Done![/bold green]\n")
 
+def print_timings(timer):
+    from rich.table import Table
+    
+    summary = timer.summary()
+    
+    table = Table(title="Stage Timings")
+    table.add_column("Stage")
+    table.add_column("Start", justify="right")
+    table.add_column("Duration", justify="right")
+    
+    for stage in summary["stages"]:
+        name = stage["name"] if stage["parent"] is None else f"  └ {stage['name']}"
+        table.add_row(name, f"+{stage['start']:.2f}s", f"{stage['seconds']:.2f}s")
+    
+    console.print()
+    console.print(table)
+    console.print(
+        f"Wall time: {summary['wall_seconds']:.2f}s "
+        f"(sequential: {summary['serial_seconds']:.2f}s, overlap saved: {summary['overlap_seconds']:.2f}s)"
+    )
+
+def run_batch(args):
+    from src.batch_runner import BatchRunner, parse_date
+    
+    try:
+        start = parse_date(args.from_date)
+        end = parse_date(args.to_date)
+    except ValueError as e:
+        console.print(f"[red]✗[/red] {e}")
+        sys.exit(1)
+    
+    runner = BatchRunner(
+        args.input_dir,
+        start=start,
+        end=end,
+        concurrency=args.concurrency,
+        social=args.social,
+        manifest_path=args.manifest,
+        force=args.force
+    )
+    
+    def on_progress(date_str, item):
+        if item["status"] == "done":
+            console.print(f"[green]✓[/green] {date_str} (Day {item['day_num']}) in {item['seconds']}s → {item['filepath']}")
+        else:
+            console.print(f"[red]✗[/red] {date_str}: {item.get('error')}")
+    
+    console.print(f"\n[yellow]Backfilling from {args.input_dir}...[/yellow]")
+    
+    try:
+        manifest = runner.run(on_progress)
+    except KeyboardInterrupt:
+        console.print(f"\n[yellow]Interrupted.[/yellow] Re-run the same command to resume from {runner.manifest_path}")
+        sys.exit(130)
+    
+    done = sum(1 for item in manifest["items"].values() if item.get("status") == "done")
+    console.print(f"\n[bold]{done}/{manifest['total']} days done[/bold] ({manifest['skipped']} resumed from checkpoint)")
+    if manifest.get("failed"):
+        console.print(f"[red]Failed:[/red] {', '.join(manifest['failed'])}")
+    console.print(f"Manifest: {runner.manifest_path}\n")
+
+def run_archive(args):
+    from src.archive import get_archive
+    
+    archive = get_archive()
+    
+    if args.action == 'migrate':
+        result = archive.migrate_text_files(delete=args.delete)
+        console.print(f"[green]✓[/green] Imported {result['imported']} file(s), skipped {result['skipped']} already archived")
+        if args.delete:
+            console.print(f"[green]✓[/green] Deleted {result['deleted']} migrated .txt file(s)")
+        args.action = 'stats'
+    
+    if args.action == 'stats':
+        stats = archive.stats()
+        ratio = stats['stored_bytes'] / stats['original_bytes'] if stats['original_bytes'] else 0
+        console.print(
+            f"{stats['entries']} entries, {stats['unique_blobs']} unique blobs, {stats['deltas']} stored as deltas\n"
+            f"{stats['original_bytes']:,} bytes → {stats['stored_bytes']:,} bytes stored ({ratio:.0%}, {stats['codec']})"
+        )
+    elif args.action == 'list':
+        for entry in archive.list(kind=args.kind):
+            lens = f" [{entry['lens']}]" if entry.get('lens') else ""
+            prompt = f" prompt:{entry['template_version']}" if entry.get('template_version') else ""
+            console.print(f"{entry['id']}{lens}{prompt}  {entry['title'][:60]}", highlight=False)
+    elif args.action == 'lengths':
+        from src.length_model import get_length_model, MIN_SAMPLES
+        for row in get_length_model().summary():
+            if args.kind and row['kind'] != args.kind:
+                continue
+            budget = row['max_tokens'] if row['samples'] >= MIN_SAMPLES else f"{row['max_tokens']} (default, needs {MIN_SAMPLES} samples)"
+            console.print(f"{row['kind']:<11} {row['lens'] or 'any lens':<22} {row['samples']:>4} samples  median {row['median_tokens']:>5}  p95 {row['p95_tokens']:>5}  → max_tokens {budget}", highlight=False)
+    elif args.action == 'show':
+        if not args.entry_id:
+            console.print("[red]✗[/red] show needs an entry id")
+            sys.exit(1)
+        try:
+            console.out(archive.get(args.entry_id), highlight=False)
+        except KeyError:
+            console.print(f"[red]✗[/red] No archive entry {args.entry_id}")
+            sys.exit(1)
+
+def run_backups(args):
+    from src.backup_store import get_backup_store
+    
+    store = get_backup_store(args.target)
+    
+    if args.action == 'migrate':
+        result = store.migrate_legacy(delete=args.delete)
+        console.print(f"[green]✓[/green] Imported {result['imported']} backup(s), {result['duplicates']} identical to the previous one")
+        if args.delete:
+            console.print(f"[green]✓[/green] Deleted {result['deleted']} old backup file(s)")
+        args.action = 'list'
+    
+    if args.action == 'list':
+        versions = store.list_versions()
+        if not versions:
+            console.print(f"No backups for {args.target} yet")
+        for entry in versions:
+            kind = "delta" if entry.get('base') else "full"
+            label = f"  ({entry['label']})" if entry.get('label') else ""
+            console.print(f"v{entry['version']}  {entry['created'][:19]}  {entry['size']:,} → {entry['stored_size']:,} bytes {kind}{label}", highlight=False)
+    elif args.action == 'prune':
+        removed = store.prune()
+        console.print(f"[green]✓[/green] Pruned {removed} version(s)")
+    elif args.action in ('show', 'restore'):
+        if args.version is None:
+            console.print(f"[red]✗[/red] {args.action} needs a version number")
+            sys.exit(1)
+        try:
+            if args.action == 'show':
+                console.out(store.get(args.version), highlight=False)
+            else:
+                location = store.restore(args.version)
+                console.print(f"[green]✓[/green] Restored v{args.version} to {location}")
+        except KeyError:
+            console.print(f"[red]✗[/red] No version {args.version} of {args.target}")
+            sys.exit(1)
+
+def run_memory(args):
+    from src.memory_manager import MemoryManager
+    from src.memory_store import FIELDS
+    
+    memory_manager = MemoryManager()
+    
+    if args.action == 'export':
+        location = memory_manager.export_json(args.file)
+        console.print(f"[green]✓[/green] Exported memory to {location}")
+    elif args.action == 'import':
+        from src.backup_store import get_backup_store
+        get_backup_store('memory').backup(label=f"before import of {args.file}")
+        try:
+            result = memory_manager.import_json(args.file)
+        except KeyError:
+            console.print(f"[red]✗[/red] {args.file} not found")
+            sys.exit(1)
+        console.print(f"[green]✓[/green] Imported {args.file}: {result['added']} added, {result['removed']} removed")
+    
+    console.print(f"Store: {memory_manager.store.path}", highlight=False)
+    for field in FIELDS:
+        console.print(f"  {field}: {memory_manager.store.count(field)}")
+
+def run_eval(args):
+    from rich.table import Table
+    from src.prompt_eval import PromptEval, resolve_prompt, load_corpus
+    
+    try:
+        prompts = {'A': resolve_prompt(args.a), 'B': resolve_prompt(args.b)}
+        corpus = load_corpus(args.corpus)
+    except (ValueError, OSError) as e:
+        console.print(f"[red]✗[/red] {e}")
+        sys.exit(1)
+    
+    if not corpus:
+        console.print("[red]✗[/red] No daily inputs found")
+        sys.exit(1)
+    
+    evaluation = PromptEval(prompts, corpus, runs=args.runs, concurrency=args.concurrency, use_cache=not args.no_cache)
+    
+    def on_result(record):
+        if 'error' in record:
+            console.print(f"[red]✗[/red] {record['prompt']} {record['input']}: {record['error']}")
+        else:
+            cached = " (cached)" if record['cached'] else f" in {record['latency']:.1f}s"
+            console.print(f"[green]✓[/green] {record['prompt']} {record['input']}: {len(record['issues'])} issue(s), {record['words']} words{cached}", highlight=False)
+    
+    console.print(f"\n[yellow]Evaluating A ({args.a}) vs B ({args.b}) on {len(corpus)} input(s)...[/yellow]")
+    report = evaluation.run(on_result)
+    location = evaluation.save_report(report)
+    
+    table = Table(title="Prompt Comparison")
+    table.add_column("")
+    for label in report['prompts']:
+        table.add_column(f"{label} ({report['prompts'][label]['template_version']})", justify="right")
+    
+    rows = [
+        ("Generations", 'generations', "{}"),
+        ("Errors", 'errors', "{}"),
+        ("Mean issues", 'mean_issues', "{:.2f}"),
+        ("Issue-free", 'clean_rate', "{:.0%}"),
+        ("Auto-fixed", 'auto_fixed', "{}"),
+        ("Mean words", 'mean_words', "{:.0f}"),
+        ("Prompt tokens", 'mean_prompt_tokens', "{:.0f}"),
+        ("Completion tokens", 'mean_completion_tokens', "{:.0f}"),
+        ("Latency p50", 'latency_p50', "{:.2f}s"),
+        ("Latency p95", 'latency_p95', "{:.2f}s"),
+    ]
+    for title, key, fmt in rows:
+        table.add_row(title, *(fmt.format(summary[key]) for summary in report['prompts'].values()))
+    
+    console.print()
+    console.print(table)
+    for label, summary in report['prompts'].items():
+        if summary['issue_types']:
+            types = ", ".join(f"{name} ×{count}" for name, count in sorted(summary['issue_types'].items()))
+            console.print(f"{label} issues: {types}", highlight=False)
+    
+    winner = report['winner']
+    console.print(f"\n[bold]{'Winner: ' + winner if winner else 'No clear winner'}[/bold] (fewest issues, then fewest tokens)")
+    console.print(f"Report: {location}\n")
+
 def read_input(input_arg):
     if input_arg is None:
         console.print("Enter input (press Ctrl+D or Ctrl+Z when done):")